@@ -0,0 +1,110 @@
+"""
+Admission control for simulation sessions.
+
+Every session holds one slot from the moment it is started until it ends.
+Slots are capped over all tasks (SIM_MAX_SESSIONS) and per task
+(SIM_MAX_SESSIONS_PER_TASK), so a burst of starts cannot oversubscribe the
+CPU. A start that finds no free slot waits in a FIFO queue and is told its
+position whenever it changes; once the queue is full (SIM_ADMISSION_QUEUE)
+further starts are rejected with a retry hint.
+"""
+import asyncio
+
+import config
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Server busy, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, task_id, notify):
+        self.task_id = task_id
+        self.notify = notify
+        self.future = asyncio.get_running_loop().create_future()
+        self.position = None
+
+
+class Admission:
+    def __init__(self, max_sessions=config.MAX_SESSIONS, max_per_task=config.MAX_SESSIONS_PER_TASK,
+                 queue_limit=config.ADMISSION_QUEUE, retry_after=config.RETRY_AFTER):
+        self.max_sessions = max_sessions
+        self.max_per_task = max_per_task
+        self.queue_limit = queue_limit
+        self.retry_after = retry_after
+        self.running = {}  # task_id -> slots held
+        self.waiters = []
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def total(self):
+        return sum(self.running.values())
+
+    async def acquire(self, task_id, notify=None):
+        """Wait for a slot for task_id; notify(position) reports the queue position.
+
+        Raises AdmissionRejected when the queue is full. If the caller is
+        cancelled while waiting it leaves the queue (or gives back a slot
+        granted in the meantime).
+        """
+        if self._fits(task_id) and not any(waiter.task_id == task_id for waiter in self.waiters):
+            self._take(task_id)
+            return
+        if len(self.waiters) >= self.queue_limit:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after)
+        waiter = _Waiter(task_id, notify)
+        self.waiters.append(waiter)
+        self._notify()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(task_id)
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+                self._notify()
+            raise
+
+    def release(self, task_id):
+        """Give back a slot and admit whoever in the queue now fits"""
+        self.running[task_id] -= 1
+        if not self.running[task_id]:
+            del self.running[task_id]
+        for waiter in list(self.waiters):
+            if self._fits(waiter.task_id):
+                self.waiters.remove(waiter)
+                self._take(waiter.task_id)
+                waiter.future.set_result(None)
+        self._notify()
+
+    def stats(self):
+        return {
+            "running": self.total,
+            "max_sessions": self.max_sessions,
+            "max_per_task": self.max_per_task,
+            "per_task": dict(self.running),
+            "queued": len(self.waiters),
+            "queue_limit": self.queue_limit,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def _fits(self, task_id):
+        if self.total >= self.max_sessions:
+            return False
+        return not self.max_per_task or self.running.get(task_id, 0) < self.max_per_task
+
+    def _take(self, task_id):
+        self.running[task_id] = self.running.get(task_id, 0) + 1
+        self.admitted += 1
+
+    def _notify(self):
+        for position, waiter in enumerate(self.waiters, 1):
+            if waiter.position != position:
+                waiter.position = position
+                if waiter.notify is not None:
+                    waiter.notify(position)
@@ -0,0 +1,160 @@
+"""
+Headless batch runs.
+
+A batch job runs one task for a list of seeds with the same parameters and
+collects each run's final metrics. Runs go to their own process pool, apart
+from the live-session workers, so a long batch never delays a live tick;
+a job's parallelism caps how many of its runs are in flight at once. With a
+RunCache, seeds already run with the same parameters are served from it.
+"""
+import asyncio
+import multiprocessing
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+
+MAX_SEEDS = 1000
+MAX_JOBS = 100  # finished jobs kept for GET, oldest dropped first
+
+# Jobs still running, so their tasks are not garbage collected
+_pending = set()
+
+
+def run_headless(factory, seed, params):
+    """Run one simulation to completion in a worker; returns its summary"""
+    started = time.perf_counter()
+    frames = factory(seed=seed, **params)
+    try:
+        while True:
+            next(frames)
+    except StopIteration as done:
+        summary = dict(done.value or {})
+    summary["seconds"] = round(time.perf_counter() - started, 4)
+    return summary
+
+
+def aggregate(summaries):
+    """Mean/min/max of every numeric metric, and of each agent's count"""
+    values = {}
+    per_agent = {}
+    for summary in summaries:
+        for key, value in summary.items():
+            if key == "per_agent":
+                for agent_id, count in value.items():
+                    per_agent.setdefault(str(agent_id), []).append(float(count))
+            elif key not in ("seed", "cached") and isinstance(value, (bool, int, float)):
+                values.setdefault(key, []).append(float(value))
+    return {
+        "runs": len(summaries),
+        "metrics": {key: _describe(numbers) for key, numbers in values.items()},
+        "per_agent": {agent_id: _describe(counts) for agent_id, counts in per_agent.items()},
+    }
+
+
+def _describe(numbers):
+    return {
+        "mean": round(sum(numbers) / len(numbers), 4),
+        "min": min(numbers),
+        "max": max(numbers),
+    }
+
+
+class BatchJob:
+    def __init__(self, task_id, params, seeds, parallelism):
+        self.id = uuid.uuid4().hex[:12]
+        self.task_id = task_id
+        self.params = params
+        self.seeds = seeds
+        self._order = {seed: index for index, seed in enumerate(seeds)}
+        self.parallelism = parallelism
+        self.status = "running"
+        self.runs = []  # {"seed": ..., **summary} or {"seed": ..., "error": ...}
+        self.cached = 0
+        self.started = time.time()
+        self.finished = None
+
+    def info(self):
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "status": self.status,
+            "params": self.params,
+            "parallelism": self.parallelism,
+            "completed": len(self.runs),
+            "cached": self.cached,
+            "total": len(self.seeds),
+            "elapsed": round((self.finished or time.time()) - self.started, 3),
+        }
+
+    def report(self):
+        succeeded = [run for run in self.runs if "error" not in run]
+        return {
+            **self.info(),
+            "aggregate": aggregate(succeeded),
+            "errors": len(self.runs) - len(succeeded),
+            "runs": sorted(self.runs, key=lambda run: self._order[run["seed"]]),
+        }
+
+
+class BatchRunner:
+    def __init__(self, workers=config.WORKERS, cache=None):
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.jobs = OrderedDict()
+        self._executor = None
+
+    def submit(self, task_id, factory, params, seeds, parallelism):
+        """Start a job in the background and return it"""
+        job = BatchJob(task_id, params, seeds, max(1, min(parallelism, self.workers)))
+        self.jobs[job.id] = job
+        while len(self.jobs) > MAX_JOBS:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status == "running":
+                break
+            self.jobs.popitem(last=False)
+        task = asyncio.create_task(self._run(job, factory))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, job, factory):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(job.parallelism)
+
+        async def run_seed(seed):
+            key = None
+            if self.cache is not None and self.cache.enabled:
+                key = self.cache.key(job.task_id, factory, job.params, seed)
+                entry = await self.cache.get_async(key)
+                if entry is not None:
+                    job.cached += 1
+                    job.runs.append({"seed": seed, **entry[0]["summary"], "cached": True})
+                    return
+            async with slots:
+                try:
+                    summary = await loop.run_in_executor(self._executor, run_headless, factory, seed, job.params)
+                except Exception as error:
+                    job.runs.append({"seed": seed, "error": f"{type(error).__name__}: {error}"})
+                    return
+            job.runs.append({"seed": seed, **summary})
+            if key is not None:
+                metrics = {name: value for name, value in summary.items() if name != "seconds"}
+                header = {"task_id": job.task_id, "params": job.params, "seed": seed, "summary": metrics}
+                await self.cache.put_async(key, header)
+
+        await asyncio.gather(*(run_seed(seed) for seed in job.seeds))
+        job.status = "done"
+        job.finished = time.time()
@@ -0,0 +1,229 @@
+"""
+On-disk cache of completed simulation runs.
+
+A seeded run is deterministic: the same task, parameters and seed always
+produce the same frames and final metrics. Completed runs are stored under
+a content address, the sha256 of (task, params, seed, engine source), so a
+change to an engine's code misses instead of serving stale runs.
+
+Each entry is a gzip file of JSON lines: a header with the task, params,
+seed and summary, then (for runs recorded from a live session) one line
+per tick (a keyframe or delta) or control message. Batch runs store the
+header only.
+The cache is bounded by total size and evicts the least recently used
+entries first.
+"""
+import asyncio
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+
+import config
+from workers import ReplayFrames
+
+# A recording bigger than this share of the cache is abandoned
+MAX_ENTRY_SHARE = 8
+
+# Part of every key; bump it when the stored frames change meaning, so old
+# entries miss (2: one frame per tick instead of per frame sent; 3: skipped
+# ticks diffed as they ran, not after the generator had moved on)
+FORMAT = 3
+
+# Cache writes still in flight, so their tasks are not garbage collected
+_pending = set()
+
+
+def _code_version(factory):
+    """sha256 of the source files of the functions behind factory"""
+    functions = [factory]
+    while isinstance(functions[0], partial):
+        head = functions.pop(0)
+        functions = [head.func, *[arg for arg in head.args if callable(arg)], *functions]
+    paths = set()
+    for function in functions:
+        # Lazily imported engines name their files instead of being inspected
+        paths.update(getattr(function, "source_files", None) or [inspect.getsourcefile(function)])
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+class RunCache:
+    def __init__(self, directory=config.CACHE_DIR, max_bytes=config.CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None  # key -> size on disk, least recently used first
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def key(self, task_id, factory, params, seed):
+        if factory not in self._versions:
+            self._versions[factory] = _code_version(factory)
+        identity = json.dumps([FORMAT, task_id, params, seed, self._versions[factory]], sort_keys=True)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def get(self, key, frames=False):
+        """(header, frames) for key, or None on a miss.
+
+        With frames=False only the header is read; with frames=True an entry
+        stored without frames counts as a miss.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load()
+            found = key in self._entries
+        entry = self._read(key, frames) if found else None
+        if entry is None or (frames and entry[1] is None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, header, frames=None):
+        """Store an entry, replacing any header-only one, then evict down to size"""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as out:
+            out.write(json.dumps({**header, "frames": frames is not None}) + "\n")
+            for frame in frames or ():
+                out.write(frame + "\n")
+        os.replace(temporary, path)
+        with self._lock:
+            self._load()
+            self._entries[key] = os.path.getsize(path)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    async def get_async(self, key, frames=False):
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key, frames)
+
+    async def put_async(self, key, header, frames=None):
+        await asyncio.get_running_loop().run_in_executor(None, self.put, key, header, frames)
+
+    def recorder(self, key, header):
+        return RunRecorder(self, key, header, self.max_bytes // MAX_ENTRY_SHARE)
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            size = sum(self._entries.values())
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.jsonl.gz")
+
+    def _read(self, key, frames):
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as entry:
+                header = json.loads(entry.readline())
+                if not header.pop("frames") or not frames:
+                    return header, None
+                return header, [line.rstrip("\n") for line in entry]
+        except (OSError, ValueError, EOFError):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+    def _load(self):
+        """Index the entries already on disk, oldest access first"""
+        if self._entries is not None:
+            return
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".jsonl.gz"):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-len(".jsonl.gz")], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._evict()
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        while total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+class RunRecorder:
+    """Collects a live session's frames and stores them when the run completes"""
+
+    def __init__(self, cache, key, header, max_bytes):
+        self.cache = cache
+        self.key = key
+        self.header = header
+        self.max_bytes = max_bytes
+        self.frames = []
+        self.size = 0
+
+    def add(self, frame):
+        """Record one frame (keyframe, delta or control message)"""
+        if self.frames is None:
+            return
+        text = json.dumps(frame)
+        self.size += len(text)
+        if self.size > self.max_bytes:
+            self.frames = None  # too big to be worth caching
+            return
+        self.frames.append(text)
+
+    def finish(self, summary):
+        if self.frames is None:
+            return
+        task = asyncio.create_task(
+            self.cache.put_async(self.key, {**self.header, "summary": summary}, self.frames))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+        self.frames = None
+
+    def close(self):
+        """Drop an unfinished run; only completed runs are cached"""
+        self.frames = None
+
+
+class CachedFrames(ReplayFrames):
+    """Frame source that replays a cached run"""
+
+    def __init__(self, header, frames):
+        super().__init__()
+        self.final_summary = header.get("summary")
+        self.records = (json.loads(frame) for frame in frames)
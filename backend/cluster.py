@@ -0,0 +1,396 @@
+"""
+Sessions shared between server worker processes on one host.
+
+With `uvicorn --workers N` every worker has its own SessionRegistry and
+ConnectionManager, so a viewer can land on a worker that does not run the
+session it wants. With SIM_CLUSTER=1 the workers cooperate without any
+broker:
+
+    registry   a directory (SIM_CLUSTER_DIR) every worker can read:
+               sessions/{id}.json   one per running session: task, scenario
+                                    and the owning worker's socket
+               shared/{key}.json    claim on a shared task/scenario, created
+                                    with O_EXCL so one worker runs it
+    frame bus  a Unix socket per worker. A viewer on another worker is
+               relayed: its worker connects to the owner, which subscribes a
+               Relay connection to the session and writes it the same
+               encoded keyframes, deltas and control messages a local viewer
+               gets. Commands (pause, speed, seek, ...) go back up the
+               socket as JSON lines.
+
+A session always runs in the worker that started it; the others only relay
+its frames, so a viewer costs the owner no more than a local one. Entries of
+workers that died are ignored and removed when they are found.
+
+Wire format, after the viewer's JSON hello line
+({"session": id} or {"task_id", "scenario"}, plus "encoding" and
+"read_only"): records of <BI (kind, payload length) then the payload, with
+kind 0 a JSON control message, 1 a keyframe and 2 a delta. The first record
+is {"type": "attached", ...} or {"type": "error", ...}.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import struct
+
+import config
+from connections import Connection
+from sessions import MAX_FPS, MAX_SPEED, MIN_FPS, MIN_SPEED
+
+RECORD = struct.Struct("<BI")
+KINDS = {"control": 0, "keyframe": 1, "delta": 2}
+KIND_NAMES = {code: kind for kind, code in KINDS.items()}
+
+# Seconds a viewer waits for a claimed shared session to show up on its owner
+ATTACH_TIMEOUT = 2.0
+
+# Commands a relayed viewer may send, and the session method each calls
+COMMANDS = {
+    "pause": "pause",
+    "resume": "resume",
+    "step": "step",
+    "speed": "set_speed",
+    "fps": "set_fps",
+    "seek": "seek",
+    "broadcast": "broadcast",
+}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as out:
+        json.dump(data, out)
+    os.replace(temporary, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class Cluster:
+    def __init__(self, directory=config.CLUSTER_DIR):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.socket = os.path.join(directory, "workers", f"{self.pid}.sock")
+        self.registry = None
+        self.manager = None
+        self._server = None
+        self._claims = {}  # session id -> claim path, for shared sessions started here
+
+    async def start(self, registry, manager):
+        """Listen for relayed viewers of this worker's sessions"""
+        self.registry = registry
+        self.manager = manager
+        for folder in ("workers", "sessions", "shared"):
+            os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+        _remove(self.socket)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.socket)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        _remove(self.socket)
+        for path in list(self._claims.values()):
+            _remove(path)
+        self._claims.clear()
+
+    # ============= REGISTRY =============
+    def claim(self, task_id, scenario):
+        """Try to become the owner of task/scenario's shared session; False if a live worker is"""
+        path = self._claim_path(task_id, scenario)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                owner = _read_json(path)
+                if owner is not None and owner["pid"] != self.pid and _alive(owner["pid"]):
+                    return False
+                if owner is not None and owner["pid"] == self.pid:
+                    return True
+                _remove(path)  # left behind by a worker that is gone
+                continue
+            with os.fdopen(fd, "w") as out:
+                json.dump({"pid": self.pid, "socket": self.socket}, out)
+            return True
+        return False
+
+    def announce(self, session):
+        """Publish a session that started in this worker"""
+        _write_json(self._session_path(session.id), {
+            "id": session.id,
+            "task_id": session.task_id,
+            "scenario": session.scenario,
+            "pid": self.pid,
+            "socket": self.socket,
+        })
+        if session.shared:
+            self._claims[session.id] = self._claim_path(session.task_id, session.scenario)
+
+    def forget(self, session):
+        _remove(self._session_path(session.id))
+        claim = self._claims.pop(session.id, None)
+        if claim is not None:
+            _remove(claim)
+
+    def remote_sessions(self):
+        """Sessions running in the other live workers"""
+        found = []
+        folder = os.path.join(self.directory, "sessions")
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return found
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            entry = _read_json(os.path.join(folder, name))
+            if entry is None or entry["pid"] == self.pid:
+                continue
+            if not _alive(entry["pid"]):
+                _remove(os.path.join(folder, name))
+                continue
+            found.append(entry)
+        return found
+
+    # ============= VIEWER SIDE =============
+    async def attach(self, connection, session_id=None, task_id=None, scenario=None):
+        """RemoteSession relaying another worker's session to connection, or None.
+
+        Looks the session up by id, or by task/scenario for shared sessions.
+        """
+        if session_id is not None:
+            entry = _read_json(self._session_path(session_id))
+            hello = {"session": session_id}
+        else:
+            entry = _read_json(self._claim_path(task_id, scenario))
+            hello = {"task_id": task_id, "scenario": scenario}
+        if entry is None or entry["pid"] == self.pid or not _alive(entry["pid"]):
+            return None
+        hello.update(encoding=connection.encoding, read_only=connection.read_only)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + ATTACH_TIMEOUT
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(entry["socket"])
+            except OSError:
+                return None
+            writer.write(json.dumps(hello).encode() + b"\n")
+            reply = await _read_record(reader)
+            if reply is not None and reply[0] == "control":
+                message = json.loads(reply[1])
+                if message.get("type") == "attached":
+                    return RemoteSession(connection, reader, writer, message)
+            writer.close()
+            # Claimed but not started yet, or just finished: look again shortly
+            if session_id is not None or loop.time() >= deadline:
+                return None
+            await asyncio.sleep(0.05)
+            entry = _read_json(self._claim_path(task_id, scenario))
+            if entry is None or entry["pid"] == self.pid:
+                return None
+
+    # ============= OWNER SIDE =============
+    async def _serve(self, reader, writer):
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+        except ValueError:
+            hello = {}
+        if "session" in hello:
+            session = self.registry.get(hello["session"])
+        else:
+            session = self.registry.running(hello.get("task_id"), hello.get("scenario"))
+        if session is None or not session.running:
+            writer.write(_record("control", json.dumps({"type": "error", "message": "Session not found"})))
+            writer.close()
+            return
+        relay = Relay(self.manager, writer, session.task_id, hello.get("encoding", "json"),
+                      bool(hello.get("read_only")))
+        self.manager.add(relay)
+        relay.send_json({"type": "attached", "info": session.info(),
+                         "seekable": hasattr(session.frames, "seek")})
+        session.subscribe(relay)
+        session.on_end(relay.end)
+        try:
+            async for line in reader:
+                try:
+                    command = json.loads(line)
+                    method = getattr(session, COMMANDS[command["command"]])
+                    method(*command.get("args", ()))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # The viewer left or its worker went away
+            await asyncio.shield(self.registry.leave(session, relay))
+            self.manager.disconnect(relay)
+
+    def _session_path(self, session_id):
+        return os.path.join(self.directory, "sessions", f"{session_id}.json")
+
+    def _claim_path(self, task_id, scenario):
+        key = hashlib.sha256(json.dumps([task_id, scenario]).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, "shared", f"{key}.json")
+
+
+def _record(kind, data):
+    payload = data.encode() if isinstance(data, str) else data
+    return RECORD.pack(KINDS[kind], len(payload)) + payload
+
+
+async def _read_record(reader):
+    """(kind, payload bytes) or None at the end of the stream"""
+    try:
+        kind, length = RECORD.unpack(await reader.readexactly(RECORD.size))
+        return KIND_NAMES[kind], await reader.readexactly(length)
+    except (asyncio.IncompleteReadError, ConnectionError, KeyError):
+        return None
+
+
+class Relay(Connection):
+    """A viewer in another worker: its queue drains into that worker's socket"""
+
+    transport = "relay"
+
+    def __init__(self, manager, writer, task_id, encoding, read_only):
+        self.writer = writer
+        self.read_only = read_only
+        super().__init__(manager, None, task_id, encoding)
+
+    async def _write_loop(self):
+        try:
+            async for kind, data in self._outgoing():
+                self.writer.write(_record(kind, data))
+                await self.writer.drain()
+                # Frames are counted in the metrics by the worker that delivers them
+                self.frames_sent += 1
+                self.bytes_sent += len(data)
+        except (ConnectionError, RuntimeError):
+            self.manager.evict(self)
+        finally:
+            self.writer.close()
+
+    async def _close_socket(self):
+        self.writer.close()
+
+
+class RemoteSession:
+    """Local stand-in for a session running in another worker, for one viewer"""
+
+    recorders = ()
+    unwatched = False
+
+    def __init__(self, connection, reader, writer, attached):
+        info = attached["info"]
+        self.id = info["id"]
+        self.task_id = info["task_id"]
+        self.scenario = info["scenario"]
+        self.speed = info["speed"]
+        self.fps = info["fps"]
+        self.seekable = attached["seekable"]
+        self.remote_info = info
+        self.reader = reader
+        self.writer = writer
+        self.subscribers = [connection]
+        self._task = asyncio.create_task(self._read_loop())
+
+    @property
+    def shared(self):
+        return self.scenario is not None
+
+    @property
+    def running(self):
+        return not self._task.done()
+
+    def on_end(self, callback):
+        if self._task.done():
+            callback()
+        else:
+            self._task.add_done_callback(lambda _: callback())
+
+    def unsubscribe(self, connection):
+        if connection in self.subscribers:
+            self.subscribers.remove(connection)
+
+    def pause(self):
+        self._send("pause")
+
+    def resume(self):
+        self._send("resume")
+
+    def step(self, count=1):
+        self._send("step", count)
+
+    def set_speed(self, speed):
+        self.speed = min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+        self._send("speed", self.speed)
+        return self.speed
+
+    def set_fps(self, fps):
+        self.fps = min(MAX_FPS, max(MIN_FPS, float(fps)))
+        self._send("fps", self.fps)
+        return self.fps
+
+    def seek(self, step):
+        if not self.seekable:
+            return False
+        self._send("seek", int(step))
+        return True
+
+    def broadcast(self, message):
+        """Sent by the owner, so the viewers of every worker get it"""
+        self._send("broadcast", message)
+
+    async def stop(self):
+        """Stop relaying; the owner drops its Relay and decides whether the run goes on"""
+        self.writer.close()
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def info(self):
+        return {**self.remote_info, "speed": self.speed, "fps": self.fps,
+                "subscribers": len(self.subscribers), "relayed": True}
+
+    def _send(self, command, *args):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps({"command": command, "args": args}).encode() + b"\n")
+
+    async def _read_loop(self):
+        binary = self.subscribers[0].encoding == "binary"
+        while True:
+            record = await _read_record(self.reader)
+            if record is None:
+                return
+            kind, payload = record
+            for connection in self.subscribers:
+                if kind == "control":
+                    connection.send_json(json.loads(payload))
+                else:
+                    connection.send_frame(payload if binary else payload.decode(), kind)
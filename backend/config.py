@@ -0,0 +1,88 @@
+"""
+Server settings, read once from SIM_* environment variables.
+"""
+import hashlib
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_choice(name, default, choices):
+    value = os.environ.get(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+def _env_list(name):
+    """Comma-separated values, blanks dropped"""
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+def _available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on Windows/macOS
+        return os.cpu_count() or 1
+
+
+# ============= CONNECTIONS =============
+# Outbound frames buffered per viewer before the overflow policy kicks in
+QUEUE_SIZE = _env_int("SIM_QUEUE_SIZE", 32)
+
+# "drop": discard queued frames and resync the viewer with a keyframe
+# "disconnect": close the socket of a viewer that cannot keep up
+OVERFLOW_POLICIES = ("drop", "disconnect")
+OVERFLOW_POLICY = _env_choice("SIM_OVERFLOW_POLICY", "drop", OVERFLOW_POLICIES)
+
+# ============= WORKERS =============
+# Processes that run simulation ticks off the event loop; 0 runs them in-process
+WORKERS = _env_int("SIM_WORKERS", _available_cores())
+# Task engines each worker imports at startup (task ids, or "all"); the rest
+# are imported in a worker the first time one of their runs lands on it
+PRELOAD = _env_list("SIM_PRELOAD")
+
+# ============= RUN CACHE =============
+# Completed seeded runs, evicted least recently used first; 0 bytes disables
+CACHE_DIR = os.environ.get("SIM_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "runs"))
+CACHE_BYTES = _env_int("SIM_CACHE_BYTES", 256 * 1024 * 1024)
+
+# ============= RECORDINGS =============
+# Session frame logs for replay and seeking; SIM_RECORD=1 records every session
+RECORD_DIR = os.environ.get("SIM_RECORD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "recordings"))
+RECORD_ALL = bool(_env_int("SIM_RECORD", 0))
+
+# ============= ADMISSION =============
+# Sessions running at once, over all tasks and per task (0: no per-task cap)
+MAX_SESSIONS = _env_int("SIM_MAX_SESSIONS", 64)
+MAX_SESSIONS_PER_TASK = _env_int("SIM_MAX_SESSIONS_PER_TASK", 0)
+# Starts waiting for a free slot; past this they are rejected with a retry hint
+ADMISSION_QUEUE = _env_int("SIM_ADMISSION_QUEUE", 32)
+RETRY_AFTER = _env_int("SIM_RETRY_AFTER", 5)
+
+# Average time one tick may take, in milliseconds (0: no budget)
+TICK_BUDGET_MS = _env_int("SIM_TICK_BUDGET_MS", 250)
+# "throttle": halve the session's speed, stopping it once at the minimum
+# "terminate": stop the session
+BUDGET_POLICIES = ("throttle", "terminate")
+BUDGET_POLICY = _env_choice("SIM_TICK_BUDGET_POLICY", "throttle", BUDGET_POLICIES)
+
+# ============= START PARAMETERS =============
+# Upper bounds for the grid size and agent count clients may ask for
+MAX_GRID_SIZE = _env_int("SIM_MAX_GRID_SIZE", 500)
+MAX_AGENTS = _env_int("SIM_MAX_AGENTS", 256)
+
+# ============= STATIC FILES =============
+# Folder holding frontend/ and the task folders, served under /app/
+STATIC_ROOT = os.environ.get("SIM_STATIC_ROOT", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ============= CLUSTER =============
+# SIM_CLUSTER=1 lets the workers of `uvicorn --workers N` serve each other's
+# sessions through a shared directory and Unix sockets (not on Windows). The
+# default directory is per checkout and short, as socket paths are limited.
+CLUSTER = bool(_env_int("SIM_CLUSTER", 0))
+CLUSTER_DIR = os.environ.get("SIM_CLUSTER_DIR", os.path.join(
+    tempfile.gettempdir(), "sim-cluster-" + hashlib.sha256(os.path.abspath(__file__).encode()).hexdigest()[:8]))
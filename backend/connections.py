@@ -0,0 +1,254 @@
+"""
+WebSocket and HTTP streaming viewers with non-blocking fan-out.
+
+Every connection owns a bounded outbound queue drained by its own writer
+task, so publishing a frame never waits on the network and one slow browser
+cannot stall the other viewers of a task. When a queue fills up the
+configured overflow policy either drops the queued frames and resyncs the
+viewer with a keyframe, or disconnects it. Connections whose socket fails
+are evicted from the manager automatically.
+
+A StreamConnection is a read-only viewer on a plain HTTP response instead
+of a WebSocket: the same queue is drained by the response body as
+Server-Sent Events or newline-delimited JSON, and it gets the very frames
+(already encoded as JSON) that WebSocket viewers of the session get.
+"""
+import asyncio
+import itertools
+import json
+from collections import deque
+from typing import Dict, List
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+import config
+from metrics import BYTES_SENT, FRAMES_DROPPED, FRAMES_SENT
+
+# Raised by Starlette/uvicorn when sending on a socket the client closed
+SEND_ERRORS = (WebSocketDisconnect, RuntimeError, OSError)
+
+STREAM_FORMATS = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+# Seconds without a message before a stream sends a keep-alive, so proxies keep it open
+KEEPALIVE = 15.0
+
+_connection_ids = itertools.count(1)
+
+
+class Connection:
+    transport = "websocket"
+    # Read-only viewers do not keep a private session running once its owner leaves
+    read_only = False
+
+    def __init__(self, manager, websocket: WebSocket, task_id: str, encoding="json",
+                 queue_size=config.QUEUE_SIZE, overflow=config.OVERFLOW_POLICY):
+        self.id = next(_connection_ids)
+        self.manager = manager
+        self.websocket = websocket
+        self.task_id = task_id
+        self.encoding = encoding
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.needs_keyframe = True
+        self.closed = False
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.peak_depth = 0
+        self._queue = deque()  # (kind, data) with kind "control", "keyframe" or "delta"
+        self._ready = asyncio.Event()
+        self._ending = False
+        self._writer = self._start_writer()
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def send_json(self, message):
+        """Queue a control message; these are never dropped"""
+        self._enqueue("control", json.dumps(message))
+
+    def send_frame(self, data, kind):
+        """Queue an encoded keyframe or delta without waiting for the network"""
+        if kind == "delta" and self.needs_keyframe:
+            self._count_dropped(1)
+            return
+        if kind == "keyframe":
+            self.needs_keyframe = False
+        self._enqueue(kind, data)
+
+    def _enqueue(self, kind, data):
+        if self.closed:
+            return
+        if len(self._queue) >= self.queue_size:
+            if self.overflow == "disconnect":
+                self.manager.evict(self)
+                asyncio.create_task(self._close_socket())
+                return
+            if kind == "delta":
+                self._drop_frames()
+                self._count_dropped(1)
+                return
+            self._drop_frames()
+        self._queue.append((kind, data))
+        self.peak_depth = max(self.peak_depth, len(self._queue))
+        self._ready.set()
+
+    def _drop_frames(self):
+        """Discard queued frames; the next frame this viewer gets is a keyframe"""
+        kept = deque(item for item in self._queue if item[0] == "control")
+        self._count_dropped(len(self._queue) - len(kept))
+        self._queue = kept
+        self.needs_keyframe = True
+
+    def _count_dropped(self, count):
+        self.dropped += count
+        FRAMES_DROPPED.inc(self.encoding, amount=count)
+
+    def end(self):
+        """Finish once everything queued so far has been sent (streams only end this way)"""
+        self._ending = True
+        self._ready.set()
+
+    async def _outgoing(self, idle=None):
+        """Queued (kind, data) in order; None after idle seconds without any.
+
+        Stops once the connection is closed, or ended and drained.
+        """
+        while True:
+            while not self._queue:
+                if self.closed or self._ending:
+                    return
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), idle)
+                except asyncio.TimeoutError:
+                    yield None
+            yield self._queue.popleft()
+
+    def _count_sent(self, kind, encoding, size):
+        self.frames_sent += 1
+        self.bytes_sent += size
+        FRAMES_SENT.inc(kind, encoding)
+        BYTES_SENT.inc(encoding, amount=size)
+
+    def _start_writer(self):
+        return asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self):
+        try:
+            async for kind, data in self._outgoing():
+                if isinstance(data, bytes):
+                    await self.websocket.send_bytes(data)
+                    self._count_sent(kind, "binary", len(data))
+                else:
+                    await self.websocket.send_text(data)
+                    self._count_sent(kind, "json", len(data))
+        except SEND_ERRORS:
+            self.manager.evict(self)
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=1013)  # try again later
+        except SEND_ERRORS:
+            pass
+
+    def close(self):
+        self.closed = True
+        self._queue.clear()
+        self._ready.set()
+        if self._writer is not None and not self._writer.done() and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "transport": self.transport,
+            "encoding": self.encoding,
+            "queue_depth": self.depth,
+            "peak_queue_depth": self.peak_depth,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+        }
+
+
+class StreamConnection(Connection):
+    """Read-only viewer whose frames are the body of an HTTP streaming response"""
+
+    read_only = True
+
+    def __init__(self, manager, task_id: str, format="sse",
+                 queue_size=config.QUEUE_SIZE, overflow=config.OVERFLOW_POLICY):
+        super().__init__(manager, None, task_id, "json", queue_size, overflow)
+        self.transport = format
+
+    def _start_writer(self):
+        return None  # the response drains the queue through body()
+
+    async def body(self):
+        """Response body: every queued message as an SSE event or an NDJSON line"""
+        try:
+            async for item in self._outgoing(idle=KEEPALIVE):
+                if item is None:
+                    yield ": keep-alive\n\n" if self.transport == "sse" else "\n"
+                    continue
+                kind, data = item
+                chunk = self._format(kind, data)
+                yield chunk
+                self._count_sent(kind, "json", len(chunk))
+        finally:
+            # Client gone or stream ended; either way the viewer is done
+            self.manager.disconnect(self)
+
+    def _format(self, kind, data):
+        if self.transport == "ndjson":
+            return f"{data}\n"
+        # Frames are named events; control messages use the default "message" event
+        event = f"event: {kind}\n" if kind != "control" else ""
+        return f"{event}data: {data}\n\n"
+
+    async def _close_socket(self):
+        self.close()
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.active_connections: Dict[str, List[Connection]] = {}
+        self.evicted = 0
+
+    async def connect(self, websocket: WebSocket, task_id: str, encoding="json"):
+        await websocket.accept()
+        connection = Connection(self, websocket, task_id, encoding)
+        self.add(connection)
+        return connection
+
+    def disconnect(self, connection: Connection):
+        connections = self.active_connections.get(connection.task_id, [])
+        if connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[connection.task_id]
+        connection.close()
+
+    def evict(self, connection: Connection):
+        """Drop a connection whose socket failed or that fell too far behind"""
+        if not connection.closed:
+            self.evicted += 1
+        self.disconnect(connection)
+
+    def send_message(self, message: dict, task_id: str):
+        for connection in self.active_connections.get(task_id, []):
+            connection.send_json(message)
+
+    def add(self, connection: Connection):
+        """Track a connection made elsewhere (HTTP streams, relays)"""
+        self.active_connections.setdefault(connection.task_id, []).append(connection)
+
+    def stats(self):
+        return {
+            "connections": [connection.stats()
+                            for connections in self.active_connections.values()
+                            for connection in connections],
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,352 @@
+"""
+Frame protocol for grid simulations.
+
+Simulations yield plain state dicts ({"step", "grid", "agents", ...}). A
+FrameStream remembers the last state it saw and turns each new state into
+a small delta holding only the changed cells and the agents that moved.
+Sessions send a full keyframe when a viewer subscribes and every
+KEYFRAME_INTERVAL frames, and deltas in between:
+
+    {"type": "keyframe", "step": 40, "grid": [[...]], "agents": [...], ...}
+    {"type": "delta", "step": 41, "cells": [[x, y, value], ...], "agents": [...], ...}
+
+Any other key in the state (progress, counters) is copied into every frame,
+except the KEYFRAME_KEYS: bulky values that rarely change (a precomputed
+plan) are sent in keyframes only. A state that carries a new value for one
+forces a keyframe; states that leave it out keep the last one. EVENT_KEYS
+hold lists of things that happened on that tick (agents that arrived):
+when ticks are skipped or coalesced their lists are concatenated, so no
+event is lost.
+
+Clients that connect with ?encoding=binary get the same frames packed by
+encode_binary() instead of JSON text (control messages stay JSON):
+
+    header   24 bytes  <2sBBBBIHHIHI  magic b"MF", version, kind (1 keyframe,
+                                      2 delta), flags, reserved, step, width,
+                                      height, cell count, agent count,
+                                      trailer length
+    cells    keyframe  width*height uint8 values, row-major; bit-packed
+                       (MSB first) when flags & FLAG_BITPACKED
+             delta     cell count uint32 flat indices (y*width+x), then
+                       cell count uint8 values; the header still carries
+                       the grid size so indices can be unflattened
+    agents   agent count records of <HHH (id, x, y)
+    trailer  UTF-8 JSON with every other key; agent fields other than
+             id/x/y go in trailer["agents"], in record order
+"""
+import json
+import struct
+import sys
+from array import array
+
+KEYFRAME_INTERVAL = 50
+
+ENCODINGS = ("json", "binary")
+
+FRAME_TYPES = ("keyframe", "delta")
+
+BINARY_MAGIC = b"MF"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<2sBBBBIHHIHI")
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+FLAG_BITPACKED = 1
+
+# bytes.translate tables between 0/1 cell values and "0"/"1" digits
+_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+# Keys the stream tracks itself; everything else is passed through as-is
+STATE_KEYS = ("type", "step", "grid", "agents")
+
+# Keys sent in keyframes only (see the module docstring)
+KEYFRAME_KEYS = ("plan",)
+
+# Per-tick event lists, merged across skipped ticks (see the module docstring)
+EVENT_KEYS = ("arrived",)
+
+
+def is_state(message):
+    """State dicts carry no "type"; anything typed is a control message"""
+    return "type" not in message
+
+
+def has_events(message):
+    return any(key in message for key in EVENT_KEYS)
+
+
+def merge_events(messages):
+    """{key: every event of messages, in order} for the EVENT_KEYS they carry"""
+    events = {}
+    for message in messages:
+        for key in EVENT_KEYS:
+            if key in message:
+                events.setdefault(key, []).extend(message[key])
+    return events
+
+
+def with_events(skipped, message):
+    """message carrying the events of the skipped messages before it as well"""
+    if not skipped:
+        return message
+    return {**message, **merge_events([*skipped, message])}
+
+
+class FrameStream:
+    def __init__(self):
+        self.started = False
+        self.step = 0
+        self.grid = None
+        self.agents = {}
+        self.extras = {}
+        self.fixed = {}  # KEYFRAME_KEYS values
+
+    def update(self, state):
+        """Record state and return the delta from the previous one.
+
+        Returns None when the change cannot be expressed as a delta (first
+        state, resized grid, agents added or removed, a new KEYFRAME_KEYS
+        value); callers must send a keyframe instead.
+        """
+        complete = self.grid is not None or "grid" not in state
+        self.started = True
+        self.step = state.get("step", self.step)
+        self.extras = {}
+        for key, value in state.items():
+            if key in KEYFRAME_KEYS:
+                if self.fixed.get(key) != value:
+                    self.fixed[key] = value
+                    complete = False
+            elif key not in STATE_KEYS:
+                self.extras[key] = value
+        delta = {"type": "delta", "step": self.step, **self.extras}
+
+        grid = state.get("grid")
+        if grid is not None:
+            if not self._same_shape(grid):
+                self.grid = [list(row) for row in grid]
+                complete = False
+            else:
+                cells = self._diff_grid(grid)
+                if cells:
+                    delta["cells"] = cells
+
+        agents = state.get("agents")
+        if agents is not None:
+            if len(agents) != len(self.agents) or any(a["id"] not in self.agents for a in agents):
+                self.agents = {agent["id"]: dict(agent) for agent in agents}
+                complete = False
+            else:
+                moved = []
+                for agent in agents:
+                    if self.agents[agent["id"]] != agent:
+                        snapshot = dict(agent)
+                        self.agents[agent["id"]] = snapshot
+                        moved.append(snapshot)
+                if moved:
+                    delta["agents"] = moved
+
+        return delta if complete else None
+
+    def apply(self, frame):
+        """Mirror another stream from the keyframes and deltas it produced.
+
+        Returns the delta to forward, or None for a keyframe, like update().
+        """
+        self.started = True
+        self.step = frame.get("step", self.step)
+        self.extras = {key: value for key, value in frame.items()
+                       if key not in STATE_KEYS and key not in KEYFRAME_KEYS and key != "cells"}
+        if frame["type"] == "keyframe":
+            self.fixed = {key: frame[key] for key in KEYFRAME_KEYS if key in frame}
+            self.grid = frame.get("grid")
+            self.agents = {agent["id"]: agent for agent in frame.get("agents", [])}
+            return None
+        for x, y, value in frame.get("cells", ()):
+            self.grid[y][x] = value
+        for agent in frame.get("agents", ()):
+            self.agents[agent["id"]] = agent
+        return frame
+
+    def keyframe(self):
+        """Full snapshot of the latest state.
+
+        The grid rows are shared with the stream, so the frame must be
+        serialised before the next update() call.
+        """
+        frame = {"type": "keyframe", "step": self.step}
+        if self.grid is not None:
+            frame["grid"] = self.grid
+        frame["agents"] = list(self.agents.values())
+        frame.update(self.fixed)
+        frame.update(self.extras)
+        return frame
+
+    @property
+    def shape(self):
+        """(width, height) of the tracked grid, (0, 0) when there is none"""
+        if not self.grid:
+            return 0, 0
+        return len(self.grid[0]), len(self.grid)
+
+    def _same_shape(self, grid):
+        if self.grid is None or len(grid) != len(self.grid):
+            return False
+        return not grid or len(grid[0]) == len(self.grid[0])
+
+    def _diff_grid(self, grid):
+        cells = []
+        for y, (row, previous) in enumerate(zip(grid, self.grid)):
+            # Whole-row comparison runs in C; only changed rows are walked
+            if row == previous:
+                continue
+            for x, value in enumerate(row):
+                if value != previous[x]:
+                    cells.append([x, y, value])
+                    previous[x] = value
+        return cells
+
+
+def coalesce(frames):
+    """One keyframe or delta with the same effect as applying frames in order.
+
+    Used to skip ticks of an already-diffed stream (a replay) without
+    sending every frame; returns None for an empty list. The events of every
+    frame are kept (see EVENT_KEYS).
+    """
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    if any(frame["type"] == "keyframe" for frame in frames):
+        stream = FrameStream()
+        for frame in frames[max(i for i, frame in enumerate(frames) if frame["type"] == "keyframe"):]:
+            stream.apply(frame)
+        return {**stream.keyframe(), **merge_events(frames)}
+    cells = {}
+    agents = {}
+    for frame in frames:
+        for x, y, value in frame.get("cells", ()):
+            cells[(x, y)] = value
+        for agent in frame.get("agents", ()):
+            agents[agent["id"]] = agent
+    merged = {key: value for key, value in frames[-1].items() if key not in ("cells", "agents")}
+    merged.update(merge_events(frames))
+    if cells:
+        merged["cells"] = [[x, y, value] for (x, y), value in cells.items()]
+    if agents:
+        merged["agents"] = list(agents.values())
+    return merged
+
+
+def encode_frame(frame, encoding, shape=(0, 0)):
+    """Serialise a keyframe or delta for the wire: JSON text or binary bytes"""
+    if encoding == "binary":
+        return encode_binary(frame, shape)
+    return json.dumps(frame)
+
+
+# ============= BINARY ENCODING =============
+def encode_binary(frame, shape=(0, 0)):
+    """Pack a keyframe or delta frame into the binary wire format.
+
+    shape is the (width, height) of the stream's grid, needed for deltas;
+    keyframes take it from their own grid. Cell values must fit in uint8.
+    """
+    kind = KIND_KEYFRAME if frame["type"] == "keyframe" else KIND_DELTA
+    flags = 0
+    width, height = shape
+    cell_count = 0
+    sections = []
+
+    if kind == KIND_KEYFRAME:
+        grid = frame.get("grid")
+        if grid:
+            height, width = len(grid), len(grid[0])
+            cells = b"".join(bytes(row) for row in grid)
+            cell_count = len(cells)
+            if max(cells) <= 1:
+                flags |= FLAG_BITPACKED
+                cells = _pack_bits(cells)
+            sections.append(cells)
+    else:
+        changed = frame.get("cells", ())
+        cell_count = len(changed)
+        if changed:
+            indices = array("I", [y * width + x for x, y, _ in changed])
+            if sys.byteorder == "big":
+                indices.byteswap()
+            sections.append(indices.tobytes())
+            sections.append(bytes(value for _, _, value in changed))
+
+    agents = frame.get("agents", ())
+    positions = []
+    extras = []
+    for agent in agents:
+        positions.extend((agent["id"], agent["x"], agent["y"]))
+        extras.append({key: value for key, value in agent.items() if key not in ("id", "x", "y")})
+    sections.append(struct.pack(f"<{len(positions)}H", *positions))
+
+    trailer = {key: value for key, value in frame.items()
+               if key not in ("type", "step", "grid", "cells", "agents")}
+    if any(extras):
+        trailer["agents"] = extras
+    trailer = json.dumps(trailer, separators=(",", ":")).encode() if trailer else b""
+    sections.append(trailer)
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, kind, flags, 0, frame["step"],
+                                width, height, cell_count, len(agents), len(trailer))
+    return header + b"".join(sections)
+
+
+def decode_binary(data):
+    """Unpack a binary frame back into its keyframe or delta dict"""
+    (magic, version, kind, flags, _, step, width, height,
+     cell_count, agent_count, trailer_length) = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a binary simulation frame")
+    offset = BINARY_HEADER.size
+    frame = {"type": "keyframe" if kind == KIND_KEYFRAME else "delta", "step": step}
+
+    if kind == KIND_KEYFRAME:
+        if cell_count:
+            if flags & FLAG_BITPACKED:
+                size = (cell_count + 7) // 8
+                cells = _unpack_bits(data[offset:offset + size], cell_count)
+            else:
+                size = cell_count
+                cells = data[offset:offset + size]
+            offset += size
+            frame["grid"] = [list(cells[y * width:(y + 1) * width]) for y in range(height)]
+    elif cell_count:
+        indices = array("I")
+        indices.frombytes(data[offset:offset + 4 * cell_count])
+        if sys.byteorder == "big":
+            indices.byteswap()
+        offset += 4 * cell_count
+        values = data[offset:offset + cell_count]
+        offset += cell_count
+        frame["cells"] = [[index % width, index // width, value] for index, value in zip(indices, values)]
+
+    positions = struct.unpack_from(f"<{3 * agent_count}H", data, offset)
+    offset += 6 * agent_count
+    agents = [{"id": positions[i], "x": positions[i + 1], "y": positions[i + 2]}
+              for i in range(0, len(positions), 3)]
+
+    trailer = json.loads(data[offset:offset + trailer_length]) if trailer_length else {}
+    for agent, extra in zip(agents, trailer.pop("agents", ())):
+        agent.update(extra)
+    if agents or kind == KIND_KEYFRAME:
+        frame["agents"] = agents
+    frame.update(trailer)
+    return frame
+
+
+def _pack_bits(cells):
+    padded = cells + bytes(-len(cells) % 8)
+    return int(padded.translate(_TO_DIGITS), 2).to_bytes(len(padded) // 8, "big")
+
+
+def _unpack_bits(packed, count):
+    digits = bin(int.from_bytes(packed, "big"))[2:].zfill(len(packed) * 8)
+    return digits[:count].encode().translate(_FROM_DIGITS)
@@ -1,17 +1,98 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response, StreamingResponse
 import asyncio
 import json
-from typing import Dict, List
-import sys
-import os
+import math
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import List, Optional
 
-# Add parent directory to path to import simulations
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydantic import BaseModel, Field, StrictInt
 
-app = FastAPI(title="Multi-Agent Simulations API")
+import config
+from admission import Admission, AdmissionRejected
+from batch import MAX_SEEDS, BatchRunner
+from cache import CachedFrames, RunCache
+from cluster import Cluster
+from connections import STREAM_FORMATS, Connection, ConnectionManager, StreamConnection
+from frames import ENCODINGS
+from metrics import REGISTRY
+from monitor import LoopLagMonitor
+from recordings import Recordings, SessionLog
+from sessions import DEFAULT_FPS, SessionRegistry
+from simulations import PARAMETERS, get_simulation, validate_params
+from static import IMMUTABLE, REVALIDATE, StaticAssets, not_modified
+from workers import WorkerPool
+
+manager = ConnectionManager()
+admission = Admission()
+cluster = Cluster() if config.CLUSTER else None
+registry = SessionRegistry(admission, cluster)
+pool = WorkerPool()
+cache = RunCache()
+recordings = Recordings()
+batches = BatchRunner(cache=cache)
+static = StaticAssets()
+loop_monitor = LoopLagMonitor()
+
+# ============= METRICS =============
+# Current-state gauges, read only when /metrics is scraped
+def _sessions_by_task():
+    counts = {}
+    for session in registry.sessions.values():
+        key = (session.task_id, str(session.shared).lower())
+        counts[key] = counts.get(key, 0) + 1
+    return counts.items()
+
+def _subscribers_by_task():
+    counts = {}
+    for session in registry.sessions.values():
+        counts[(session.task_id,)] = counts.get((session.task_id,), 0) + len(session.subscribers)
+    return counts.items()
+
+def _queue_depths():
+    return [((str(connection.id), connection.task_id), connection.depth)
+            for connections in manager.active_connections.values()
+            for connection in connections]
+
+def _loop_lag():
+    lag = loop_monitor.stats()
+    return [((stat,), lag[f"{stat}_ms"] / 1000) for stat in ("mean", "p99", "max")]
+
+REGISTRY.gauge("sim_sessions", "Running sessions", ("task", "shared"), _sessions_by_task)
+REGISTRY.gauge("sim_subscribers", "Viewers attached to running sessions", ("task",), _subscribers_by_task)
+REGISTRY.gauge("sim_connection_queue_depth", "Messages waiting in each viewer's outbound queue",
+               ("connection", "task"), _queue_depths)
+REGISTRY.gauge("sim_connections_evicted_total", "Viewers disconnected for failed sockets or lag", (),
+               lambda: [((), manager.evicted)], kind="counter")
+REGISTRY.gauge("sim_worker_runs", "Runs pinned to each simulation worker", ("worker",),
+               lambda: [((str(index),), runs) for index, runs in enumerate(pool.stats()["runs"])])
+REGISTRY.gauge("sim_event_loop_lag_seconds", "Event loop wake-up lag over the recent window", ("stat",), _loop_lag)
+REGISTRY.gauge("sim_admission_queue", "Starts waiting for a session slot", (), lambda: [((), len(admission.waiters))])
+REGISTRY.gauge("sim_admission_rejected_total", "Starts rejected because the admission queue was full", (),
+               lambda: [((), admission.rejected)], kind="counter")
+REGISTRY.gauge("sim_cache_lookups_total", "Run cache lookups", ("result",),
+               lambda: [(("hit",), cache.hits), (("miss",), cache.misses)], kind="counter")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-warm the worker processes (and preload engines) so the first run does not pay for them
+    await pool.start()
+    # Hash and compress the frontend once instead of on every request
+    await asyncio.get_running_loop().run_in_executor(None, static.build)
+    if cluster is not None:
+        await cluster.start(registry, manager)
+    loop_monitor.start()
+    yield
+    loop_monitor.stop()
+    if cluster is not None:
+        await cluster.stop()
+    await registry.stop_all()
+    pool.shutdown()
+    batches.shutdown()
+
+app = FastAPI(title="Multi-Agent Simulations API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -22,42 +103,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active WebSocket connections
-active_connections: Dict[str, List[WebSocket]] = {}
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, task_id: str):
-        await websocket.accept()
-        if task_id not in self.active_connections:
-            self.active_connections[task_id] = []
-        self.active_connections[task_id].append(websocket)
-
-    def disconnect(self, websocket: WebSocket, task_id: str):
-        if task_id in self.active_connections:
-            self.active_connections[task_id].remove(websocket)
-
-    async def send_message(self, message: dict, task_id: str):
-        if task_id in self.active_connections:
-            for connection in self.active_connections[task_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    pass
-
-manager = ConnectionManager()
-
 @app.get("/")
 async def root():
-    return {"message": "Multi-Agent Simulations API", "version": "1.0"}
+    return {"message": "Multi-Agent Simulations API", "version": "1.0", "frontend": "/app/"}
+
+@app.get("/app")
+async def get_app():
+    return RedirectResponse("/app/frontend/")
+
+@app.get("/app/{path:path}")
+async def get_static(path: str, request: Request, v: Optional[str] = None):
+    """Frontend files, precompressed, with strong ETags; ?v=<hash> links are immutable"""
+    asset = static.get(path)
+    if asset is None:
+        if not path or static.get(f"{path}/") is not None:
+            # Pages link relative to their folder, so folders need the trailing slash
+            return RedirectResponse(f"/app/{path}/" if path else "/app/frontend/")
+        raise HTTPException(status_code=404, detail="Not found")
+    encoding, body, etag = asset.variant(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": IMMUTABLE if v == asset.version else REVALIDATE,
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if not_modified(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=asset.content_type, headers=headers)
 
 @app.get("/api/tasks")
 async def get_tasks():
     """Get list of all available tasks"""
-    return {
-        "tasks": [
+    tasks = [
             {"id": "task2", "name": "Cleaning Simulation", "agents": 4},
             {"id": "task3", "name": "Path Planning (A*)", "agents": 4},
             {"id": "task4", "name": "Warehouse Pickup", "agents": 4},
@@ -67,192 +145,317 @@ async def get_tasks():
             {"id": "task8", "name": "Resource Collection", "agents": 4},
             {"id": "task9", "name": "Firefighters", "agents": 4},
             {"id": "task10", "name": "Map Exploration", "agents": 4}
-        ]
+    ]
+    for task in tasks:
+        # Start parameters the task accepts, with their bounds
+        task["params"] = {name: param.info() for name, param in PARAMETERS.get(task["id"], {}).items()}
+    return {"tasks": tasks}
+
+@app.get("/api/connections")
+async def get_connections():
+    """Per-viewer queue depth, drops and bytes sent"""
+    return manager.stats()
+
+@app.get("/api/sessions")
+async def get_sessions():
+    """Running sessions with their step, speed and subscriber count, and the admission queue.
+
+    In a cluster, sessions of the other workers are listed under "remote".
+    """
+    stats = {
+        "sessions": [session.info() for session in registry.sessions.values()],
+        "admission": admission.stats(),
     }
+    if cluster is not None:
+        stats["remote"] = cluster.remote_sessions()
+    return stats
+
+@app.get("/api/sessions/{session_id}/stream")
+async def stream_session(session_id: str, format: str = "sse"):
+    """Watch a running session over plain HTTP, as Server-Sent Events or NDJSON"""
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(STREAM_FORMATS)}")
+    connection = StreamConnection(manager, None, format)
+    session = await registry.watch(session_id, connection)
+    if session is None:
+        connection.close()
+        raise HTTPException(status_code=404, detail="Session not found")
+    connection.task_id = session.task_id
+    manager.add(connection)
+    session.on_end(connection.end)
+
+    async def body():
+        try:
+            async for chunk in connection.body():
+                yield chunk
+        finally:
+            # Cancelled when the client goes away; the viewer must still leave the session
+            await asyncio.shield(registry.leave(session, connection))
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[format],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Server metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/loop")
+async def get_loop():
+    """Event loop lag and simulation worker load"""
+    return {"lag": loop_monitor.stats(), "workers": pool.stats()}
+
+@app.get("/api/cache")
+async def get_cache():
+    """Size and hit/miss counters of the completed-run cache"""
+    return cache.stats()
+
+@app.get("/api/recordings")
+async def list_recordings():
+    """Recorded sessions, oldest first"""
+    return {"recordings": recordings.list()}
+
+@app.get("/api/recordings/{recording_id}")
+async def get_recording(recording_id: str, step: Optional[int] = None):
+    """A recording's details; with ?step=N also the keyframe of the state at step N"""
+    recording = recordings.open(recording_id)
+    if recording is None:
+        raise HTTPException(status_code=404, detail=f"Unknown recording: {recording_id}")
+    if step is None:
+        return recording.meta
+    # Decodes forward from the nearest keyframe; keep the file reads off the loop
+    frame = await asyncio.get_running_loop().run_in_executor(None, recording.seek, step)
+    return {**recording.meta, "frame": frame}
+
+class RunRequest(BaseModel):
+    params: dict = Field(default_factory=dict)
+    seeds: List[StrictInt]  # no bools or floats such as true or 2.0
+    parallelism: int = 1
+
+@app.post("/api/tasks/{task_id}/runs", status_code=202)
+async def create_runs(task_id: str, request: RunRequest):
+    """Run task_id headless once per seed; poll the returned job for metrics"""
+    simulation = get_simulation(task_id)
+    if simulation is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_id}")
+    if not 1 <= len(request.seeds) <= MAX_SEEDS:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {MAX_SEEDS} seeds")
+    factory, _ = simulation
+    try:
+        params = validate_params(task_id, request.params)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"Invalid params for {task_id}: {error}")
+    seeds = list(dict.fromkeys(request.seeds))
+    job = batches.submit(task_id, factory, params, seeds, request.parallelism)
+    return job.info()
+
+@app.get("/api/tasks/{task_id}/runs")
+async def list_runs(task_id: str):
+    """Batch jobs for task_id, most recent last"""
+    return {"jobs": [job.info() for job in batches.jobs.values() if job.task_id == task_id]}
+
+@app.get("/api/tasks/{task_id}/runs/{job_id}")
+async def get_runs(task_id: str, job_id: str):
+    """Progress, per-seed metrics and aggregates of a batch job"""
+    job = batches.get(job_id)
+    if job is None or job.task_id != task_id:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.report()
 
 @app.websocket("/ws/{task_id}")
-async def websocket_endpoint(websocket: WebSocket, task_id: str):
-    await manager.connect(websocket, task_id)
+async def websocket_endpoint(websocket: WebSocket, task_id: str, encoding: str = "json"):
+    if encoding not in ENCODINGS:
+        encoding = "json"
+    connection = await manager.connect(websocket, task_id, encoding)
+    session = None
+    starting = None  # waits for an admission slot, then starts the session
+
+    async def begin(command, data):
+        nonlocal session
+        try:
+            if command == "start":
+                session = await start_session(task_id, connection, data)
+            else:
+                session = await replay_session(task_id, connection, data)
+        except AdmissionRejected as busy:
+            connection.send_json({"type": "error", "message": str(busy), "retry_after": busy.retry_after})
+            return
+        except Exception as error:
+            # A recording that cannot be created, or params the simulation rejects
+            connection.send_json({"type": "error", "message": f"Session failed to start: {error}"})
+            return
+        if session is None:
+            message = f"Unknown task: {task_id}" if command == "start" else f"Unknown recording for {task_id}"
+            connection.send_json({"type": "error", "message": message})
+
+    async def leave():
+        nonlocal session, starting
+        if starting is not None:
+            starting.cancel()
+            try:
+                await starting
+            except asyncio.CancelledError:
+                pass
+            except Exception as error:
+                connection.send_json({"type": "error", "message": f"Session failed to start: {error}"})
+            starting = None
+        if session:
+            await registry.leave(session, connection)
+            session = None
+
     try:
         while True:
             data = await websocket.receive_json()
             command = data.get("command")
             
-            if command == "start":
-                await run_simulation(task_id, websocket)
+            if command in ("start", "replay"):
+                await leave()
+                seed = data.get("seed")
+                if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+                    connection.send_json({"type": "error", "message": "seed must be an integer"})
+                    continue
+                if command == "replay" and not _is_count(data.get("step", 0)):
+                    connection.send_json({"type": "error", "message": "step must be a non-negative integer"})
+                    continue
+                if command == "start":
+                    invalid = [key for key in ("speed", "fps") if key in data and not _is_rate(data[key])]
+                    if invalid:
+                        connection.send_json({"type": "error", "message": f"{invalid[0]} must be a positive number"})
+                        continue
+                    try:
+                        data["params"] = validate_params(task_id, data.get("params", {}))
+                    except ValueError as error:
+                        connection.send_json({"type": "error", "message": f"Invalid params: {error}"})
+                        continue
+                # Run in the background: the start may wait in the admission queue
+                starting = asyncio.create_task(begin(command, data))
+            elif command == "seek" and session:
+                step = data.get("step", 0)
+                if not _is_count(step):
+                    connection.send_json({"type": "error", "message": "step must be a non-negative integer"})
+                elif not session.seek(step):
+                    connection.send_json({"type": "error", "message": "Only replays can seek"})
             elif command == "stop":
-                await manager.send_message({"type": "stopped"}, task_id)
+                await leave()
+                connection.send_json({"type": "stopped"})
+            elif command == "pause" and session:
+                session.pause()
+                session.broadcast({"type": "paused"})
+            elif command == "resume" and session:
+                session.resume()
+                session.broadcast({"type": "resumed"})
+            elif command == "step" and session:
+                count = data.get("count", 1)
+                if not _is_count(count) or count == 0:
+                    connection.send_json({"type": "error", "message": "count must be a positive integer"})
+                    continue
+                session.step(count)
+            elif command == "speed" and session:
+                speed = data.get("speed", 1.0)
+                if not _is_rate(speed):
+                    connection.send_json({"type": "error", "message": "speed must be a positive number"})
+                    continue
+                session.broadcast({"type": "speed", "speed": session.set_speed(speed)})
+            elif command == "fps" and session:
+                fps = data.get("fps", DEFAULT_FPS)
+                if not _is_rate(fps):
+                    connection.send_json({"type": "error", "message": "fps must be a positive number"})
+                    continue
+                session.broadcast({"type": "fps", "fps": session.set_fps(fps)})
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, task_id)
-
-async def run_simulation(task_id: str, websocket: WebSocket):
-    """Run the appropriate simulation based on task_id"""
-    
-    if task_id == "task2":
-        await run_cleaning_simulation(websocket)
-    elif task_id == "task3":
-        await run_pathfinding_simulation(websocket)
-    elif task_id == "task4":
-        await run_warehouse_simulation(websocket)
-    elif task_id == "task5":
-        await run_rescue_simulation(websocket)
-    elif task_id == "task6":
-        await run_drone_simulation(websocket)
-    elif task_id == "task7":
-        await run_painting_simulation(websocket)
-    elif task_id == "task8":
-        await run_resource_simulation(websocket)
-    elif task_id == "task9":
-        await run_firefighter_simulation(websocket)
-    elif task_id == "task10":
-        await run_exploration_simulation(websocket)
-
-async def run_cleaning_simulation(websocket: WebSocket):
-    """Task 2: Cleaning Simulation"""
-    GRID_SIZE = 20
-    grid = [[1 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-    agents = [
-        {"id": 1, "x": 0, "y": 0, "color": "agent1"},
-        {"id": 2, "x": GRID_SIZE-1, "y": 0, "color": "agent2"},
-        {"id": 3, "x": 0, "y": GRID_SIZE-1, "color": "agent3"},
-        {"id": 4, "x": GRID_SIZE-1, "y": GRID_SIZE-1, "color": "agent4"}
-    ]
-    
-    steps = 0
-    while not all(cell == 0 for row in grid for cell in row):
-        # Clean current positions
-        for agent in agents:
-            grid[agent["y"]][agent["x"]] = 0
-        
-        # Move agents
-        for agent in agents:
-            moves = [(0, -1), (1, 0), (0, 1), (-1, 0)]
-            best_move = None
-            min_dist = float('inf')
-            
-            for dx, dy in moves:
-                nx, ny = agent["x"] + dx, agent["y"] + dy
-                if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE:
-                    occupied = any(a["x"] == nx and a["y"] == ny and a["id"] != agent["id"] for a in agents)
-                    if not occupied:
-                        dist = sum(1 for row in grid for cell in row if cell == 1)
-                        if dist < min_dist:
-                            min_dist = dist
-                            best_move = (nx, ny)
-            
-            if best_move:
-                agent["x"], agent["y"] = best_move
-        
-        steps += 1
-        cleaned = sum(1 for row in grid for cell in row if cell == 0)
-        total = GRID_SIZE * GRID_SIZE
-        
-        await websocket.send_json({
-            "type": "update",
-            "step": steps,
-            "agents": agents,
-            "grid": grid,
-            "progress": round((cleaned / total) * 100, 1)
-        })
-        
-        await asyncio.sleep(0.1)
-    
-    await websocket.send_json({"type": "complete", "steps": steps})
-
-async def run_pathfinding_simulation(websocket: WebSocket):
-    """Task 3: Path Planning"""
-    import random
-    GRID_SIZE = 15
-    
-    # Create grid with obstacles
-    grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-    for _ in range(30):
-        x, y = random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1)
-        grid[y][x] = 1
-    
-    agents = [
-        {"id": 1, "x": 1, "y": 1, "targetX": 13, "targetY": 13, "color": "agent1"},
-        {"id": 2, "x": 13, "y": 1, "targetX": 1, "targetY": 13, "color": "agent2"},
-        {"id": 3, "x": 1, "y": 13, "targetX": 13, "targetY": 1, "color": "agent3"},
-        {"id": 4, "x": 13, "y": 13, "targetX": 1, "targetY": 1, "color": "agent4"}
-    ]
-    
-    # Clear agent positions
-    for agent in agents:
-        grid[agent["y"]][agent["x"]] = 0
-        grid[agent["targetY"]][agent["targetX"]] = 0
-    
-    await websocket.send_json({
-        "type": "init",
-        "grid": grid,
-        "agents": agents
-    })
-    
-    # Simple movement simulation
-    steps = 0
-    max_steps = 50
-    while steps < max_steps:
-        for agent in agents:
-            dx = 1 if agent["x"] < agent["targetX"] else -1 if agent["x"] > agent["targetX"] else 0
-            dy = 1 if agent["y"] < agent["targetY"] else -1 if agent["y"] > agent["targetY"] else 0
-            
-            nx, ny = agent["x"] + dx, agent["y"] + dy
-            if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and grid[ny][nx] == 0:
-                agent["x"], agent["y"] = nx, ny
-        
-        steps += 1
-        await websocket.send_json({
-            "type": "update",
-            "step": steps,
-            "agents": agents
-        })
-        
-        await asyncio.sleep(0.2)
-    
-    await websocket.send_json({"type": "complete", "steps": steps})
-
-async def run_warehouse_simulation(websocket: WebSocket):
-    """Task 4: Warehouse Pickup"""
-    await websocket.send_json({"type": "info", "message": "Warehouse simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_rescue_simulation(websocket: WebSocket):
-    """Task 5: Rescue Bots"""
-    await websocket.send_json({"type": "info", "message": "Rescue simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_drone_simulation(websocket: WebSocket):
-    """Task 6: Drone Delivery"""
-    await websocket.send_json({"type": "info", "message": "Drone simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_painting_simulation(websocket: WebSocket):
-    """Task 7: Grid Painting"""
-    await websocket.send_json({"type": "info", "message": "Painting simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_resource_simulation(websocket: WebSocket):
-    """Task 8: Resource Collection"""
-    await websocket.send_json({"type": "info", "message": "Resource simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_firefighter_simulation(websocket: WebSocket):
-    """Task 9: Firefighters"""
-    await websocket.send_json({"type": "info", "message": "Firefighter simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
-
-async def run_exploration_simulation(websocket: WebSocket):
-    """Task 10: Map Exploration"""
-    await websocket.send_json({"type": "info", "message": "Exploration simulation starting..."})
-    await asyncio.sleep(1)
-    await websocket.send_json({"type": "complete", "message": "Simulation complete"})
+        pass
+    finally:
+        await leave()
+        manager.disconnect(connection)
+
+def _is_count(value):
+    """value is a non-negative int (bools excluded), as step values need"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def _is_rate(value):
+    """value is a finite positive number, as speed and fps commands need"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 < value < math.inf
+
+async def start_session(task_id: str, connection: Connection, data: dict):
+    """Start (or join, for shared runs) the simulation for task_id.
+
+    data["params"] must already be validated.
+    """
+    seed = data.get("seed")
+    params = data.get("params", {})
+    record = bool(data.get("record", config.RECORD_ALL))
+    if data.get("shared"):
+        scenario = str(data.get("scenario", "default"))
+        session = await registry.join(task_id, scenario, connection,
+                                      lambda: open_simulation(task_id, connection, params, seed, record))
+    else:
+        simulation = await open_simulation(task_id, connection, params, seed, record)
+        if simulation is None:
+            return None
+        session = registry.start(task_id, connection, simulation)
+    if session is None:
+        return None
+    if "speed" in data:
+        session.set_speed(data["speed"])
+    if "fps" in data:
+        session.set_fps(data["fps"])
+    for recorder in session.recorders:
+        if isinstance(recorder, SessionLog):
+            connection.send_json({"type": "recording", "id": recorder.id})
+    return session
+
+async def replay_session(task_id: str, connection: Connection, data: dict):
+    """Start a replay of a recording of task_id; None if there is no such recording"""
+    recording = recordings.open(str(data.get("recording", "")))
+    if recording is None or recording.meta["task_id"] != task_id:
+        return None
+    await admit(task_id, connection)
+    try:
+        simulation = replay_simulation(recording, data.get("step", 0))
+    except BaseException:
+        admission.release(task_id)
+        raise
+    return registry.start(task_id, connection, simulation)
+
+async def admit(task_id: str, connection: Connection):
+    """Wait for a session slot, telling the viewer its place in the queue"""
+    await admission.acquire(task_id, lambda position: connection.send_json({"type": "queued", "position": position}))
+
+async def open_simulation(task_id: str, connection: Connection, params, seed=None, record=False):
+    """(frame source, interval, recorders) for task_id, holding an admission slot.
+
+    A seeded run is replayed from the run cache when it is there; otherwise
+    it runs in the worker pool (when it is up) and is recorded into the cache
+    once it completes. Unseeded runs are never cached. With record the
+    session's frames are also logged for replay.
+    """
+    simulation = get_simulation(task_id)
+    if simulation is None:
+        return None
+    factory, interval = simulation
+    await admit(task_id, connection)
+    recorders = []
+    try:
+        if record:
+            recorders.append(recordings.create(task_id, interval, params, seed))
+        if seed is None or not cache.enabled:
+            return pool.frames(partial(factory, seed=seed, **params)), interval, recorders
+        key = cache.key(task_id, factory, params, seed)
+        entry = await cache.get_async(key, frames=True)
+        if entry is not None:
+            return CachedFrames(*entry), interval, recorders
+        recorders.append(cache.recorder(key, {"task_id": task_id, "params": params, "seed": seed}))
+        return pool.frames(partial(factory, seed=seed, **params)), interval, recorders
+    except BaseException:
+        for recorder in recorders:
+            recorder.close()
+        admission.release(task_id)
+        raise
+
+def replay_simulation(recording, step):
+    """(frame source, interval, recorders) replaying recording from step"""
+    return recording.frames(int(step)), recording.meta["interval"], []
 
 if __name__ == "__main__":
     import uvicorn
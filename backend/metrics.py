@@ -0,0 +1,176 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are updated inline on the hot path (a dict lookup
+and a bisect per observation) and gauges that describe current state are
+read from callbacks only when /metrics is scraped, so leaving collection on
+costs next to nothing. No client library or external service is involved.
+
+    TICK_SECONDS.observe(0.004, "task2")
+    FRAMES_SENT.inc("keyframe", "binary")
+    REGISTRY.gauge("sim_sessions", "Running sessions", (), lambda: [((), 3)])
+"""
+import bisect
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds in seconds: 100 us up to 10 s
+DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.values = {}  # label values -> total
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self.values = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = _labels((*self.label_names, "le"), (*labels, _number(bound)))
+                yield f"{self.name}_bucket", le, cumulative
+            label_text = _labels(self.label_names, labels)
+            yield f"{self.name}_sum", label_text, series[-1]
+            yield f"{self.name}_count", label_text, cumulative
+
+
+class Gauge:
+    """Read at scrape time: collect() returns (label values, value) pairs"""
+
+    def __init__(self, name, help, labels, collect, kind="gauge"):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in self.collect():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, labels, collect, kind="gauge"):
+        """Register (or replace) a gauge read from collect() on every scrape.
+
+        kind="counter" exposes a total kept elsewhere (the OS, another object).
+        """
+        gauge = Gauge(name, help, labels, collect, kind)
+        self.metrics[name] = gauge
+        return gauge
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+
+# ============= PROCESS =============
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _resident_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return [((), int(statm.read().split()[1]) * _PAGE_SIZE)]
+    except OSError:
+        pass
+    if resource is None:
+        return []
+    # No procfs: report the peak instead, in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return [((), peak if os.uname().sysname == "Darwin" else peak * 1024)]
+
+
+_STARTED = time.time()
+
+# ============= SERVER METRICS =============
+REGISTRY = Registry()
+
+TICK_SECONDS = REGISTRY.histogram(
+    "sim_tick_seconds", "Time spent running one simulation tick, not counting waits for a busy worker", ("task",))
+ENCODE_SECONDS = REGISTRY.histogram(
+    "sim_encode_seconds", "Time to serialise one keyframe or delta", ("encoding",))
+FRAMES_SENT = REGISTRY.counter(
+    "sim_frames_sent_total", "Messages written to WebSockets", ("kind", "encoding"))
+BYTES_SENT = REGISTRY.counter(
+    "sim_bytes_sent_total", "Bytes written to WebSockets", ("encoding",))
+FRAMES_DROPPED = REGISTRY.counter(
+    "sim_frames_dropped_total", "Frames discarded for viewers that fell behind", ("encoding",))
+
+REGISTRY.gauge("process_cpu_seconds_total", "User and system CPU time of the server process", (),
+               lambda: [((), time.process_time())], kind="counter")
+REGISTRY.gauge("process_resident_memory_bytes", "Resident memory of the server process", (), _resident_bytes)
+REGISTRY.gauge("process_start_time_seconds", "Start time of the server process", (), lambda: [((), _STARTED)])
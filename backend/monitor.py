@@ -0,0 +1,46 @@
+"""
+Event loop lag monitor.
+
+A background task sleeps for a fixed interval and records how late it wakes
+up. Anything that blocks the loop (a slow simulation tick, a big keyframe
+being encoded) shows up as lag, which is what every other WebSocket and
+HTTP request in the process waits for.
+"""
+import asyncio
+from collections import deque
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.05, window=1200):
+        self.interval = interval
+        self.samples = deque(maxlen=window)  # seconds late per wake-up
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def stats(self):
+        """Lag over the last window of samples, in milliseconds"""
+        if not self.samples:
+            return {"samples": 0, "last_ms": 0.0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "last_ms": round(self.samples[-1] * 1000, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
@@ -0,0 +1,233 @@
+"""
+Session recordings.
+
+A recorded session appends its frame timeline to a compact binary log as it
+runs, and the byte offset of every keyframe to an index, so a replay can
+jump to any step by decoding forward from the nearest keyframe at or before
+it instead of from step 0. Replays read the log; the simulation is never run
+again.
+
+Each recording is three files named after its id:
+
+    {id}.log   records of <BI (kind, payload length) then the payload:
+               KIND_FRAME  a keyframe/delta in the binary wire format
+                           (see frames.py)
+               KIND_CONTROL a control message as UTF-8 JSON
+    {id}.idx   one <II (step, log offset) per keyframe, in log order
+    {id}.json  task, tick interval, params, seed, start/end time, steps,
+               size and final summary
+
+Both the log and the index are append-only; a recording that is still being
+written can be read up to its last flushed keyframe.
+"""
+import bisect
+import json
+import os
+import re
+import struct
+import time
+import uuid
+
+import config
+from frames import FRAME_TYPES, FrameStream, decode_binary, encode_binary
+from workers import ReplayFrames
+
+RECORD = struct.Struct("<BI")
+INDEX = struct.Struct("<II")
+KIND_FRAME = 1
+KIND_CONTROL = 2
+
+_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+class SessionLog:
+    """Recorder that appends a session's frames to a recording"""
+
+    def __init__(self, directory, task_id, interval, params=None, seed=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = os.path.join(directory, self.id)
+        self.meta = {
+            "id": self.id,
+            "task_id": task_id,
+            "interval": interval,
+            "params": params or {},
+            "seed": seed,
+            "started": time.time(),
+            "finished": None,
+            "complete": False,
+            "first_step": None,
+            "last_step": None,
+            "keyframes": 0,
+            "bytes": 0,
+            "summary": None,
+        }
+        self._shape = (0, 0)
+        os.makedirs(directory, exist_ok=True)
+        self._log = open(f"{self.path}.log", "wb")
+        self._index = open(f"{self.path}.idx", "wb")
+        self._write_meta()
+
+    def add(self, frame):
+        """Append one keyframe, delta or control message"""
+        if self._log is None:
+            return
+        if frame.get("type") not in FRAME_TYPES:
+            self._append(KIND_CONTROL, json.dumps(frame).encode())
+            return
+        keyframe = frame["type"] == "keyframe"
+        if keyframe:
+            grid = frame.get("grid")
+            self._shape = (len(grid[0]), len(grid)) if grid else (0, 0)
+            self._index.write(INDEX.pack(frame["step"], self._log.tell()))
+            self.meta["keyframes"] += 1
+        if self.meta["first_step"] is None:
+            self.meta["first_step"] = frame["step"]
+        self.meta["last_step"] = frame["step"]
+        self._append(KIND_FRAME, encode_binary(frame, self._shape))
+        if keyframe:
+            # Readers only see what has been flushed; keep them a keyframe behind at most
+            self._log.flush()
+            self._index.flush()
+
+    def finish(self, summary):
+        self.meta["complete"] = True
+        self.meta["summary"] = summary
+        self.close()
+
+    def close(self):
+        if self._log is None:
+            return
+        self.meta["bytes"] = self._log.tell()
+        self.meta["finished"] = time.time()
+        self._log.close()
+        self._index.close()
+        self._log = self._index = None
+        self._write_meta()
+
+    def _append(self, kind, payload):
+        self._log.write(RECORD.pack(kind, len(payload)))
+        self._log.write(payload)
+
+    def _write_meta(self):
+        temporary = f"{self.path}.json.tmp"
+        with open(temporary, "w") as out:
+            json.dump(self.meta, out)
+        os.replace(temporary, f"{self.path}.json")
+
+
+class Recording:
+    """Read side of a recording"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(f"{path}.json") as meta:
+            self.meta = json.load(meta)
+        with open(f"{path}.idx", "rb") as index:
+            data = index.read()
+        entries = [INDEX.unpack_from(data, offset)
+                   for offset in range(0, len(data) - INDEX.size + 1, INDEX.size)]
+        self.steps = [step for step, _ in entries]
+        self.offsets = [offset for _, offset in entries]
+
+    def records(self, offset=0):
+        """Decoded frames and control messages from a log offset to the end"""
+        with open(f"{self.path}.log", "rb") as log:
+            log.seek(offset)
+            while True:
+                head = log.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                kind, length = RECORD.unpack(head)
+                payload = log.read(length)
+                if len(payload) < length:
+                    return  # still being written
+                yield decode_binary(payload) if kind == KIND_FRAME else json.loads(payload)
+
+    def keyframe_offset(self, step):
+        """Log offset of the last keyframe at or before step (the first one if none)"""
+        if not self.offsets:
+            return None
+        return self.offsets[max(0, bisect.bisect_right(self.steps, step) - 1)]
+
+    def seek(self, step):
+        """Keyframe of the state at step (or the last step recorded before it)"""
+        offset = self.keyframe_offset(step)
+        if offset is None:
+            return None
+        stream = FrameStream()
+        for frame in self.records(offset):
+            if frame.get("type") not in FRAME_TYPES:
+                continue
+            if stream.started and frame["step"] > step:
+                break
+            stream.apply(frame)
+        return stream.keyframe()
+
+    def frames(self, step=0):
+        return LogFrames(self, step)
+
+
+class LogFrames(ReplayFrames):
+    """Frame source that replays a recording, starting at any step"""
+
+    def __init__(self, recording, step=0):
+        super().__init__()
+        self.recording = recording
+        self.final_summary = recording.meta.get("summary")
+        self.seek(step)
+
+    def seek(self, step):
+        """Continue the replay from step; the next frame is its keyframe"""
+        self.close()
+        keyframe = self.recording.seek(step)
+        if keyframe is None:
+            return
+        records = self.recording.records(self.recording.keyframe_offset(step))
+        self.records = self._after(records, keyframe)
+
+    @staticmethod
+    def _after(records, keyframe):
+        """keyframe, then everything recorded after its step"""
+        yield keyframe
+        caught_up = False
+        for record in records:
+            if not caught_up:
+                if record.get("type") not in FRAME_TYPES or record["step"] <= keyframe["step"]:
+                    continue
+                caught_up = True
+            yield record
+
+
+class Recordings:
+    """Recordings kept in one directory"""
+
+    def __init__(self, directory=config.RECORD_DIR):
+        self.directory = directory
+
+    def create(self, task_id, interval, params=None, seed=None):
+        return SessionLog(self.directory, task_id, interval, params, seed)
+
+    def open(self, recording_id):
+        """The Recording for recording_id, or None if there is none"""
+        if not _ID.match(recording_id):
+            return None
+        path = os.path.join(self.directory, recording_id)
+        try:
+            return Recording(path)
+        except (OSError, ValueError):
+            return None
+
+    def list(self):
+        found = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return found
+        for name in names:
+            if name.endswith(".json") and _ID.match(name[:-len(".json")]):
+                try:
+                    with open(os.path.join(self.directory, name)) as meta:
+                        found.append(json.load(meta))
+                except (OSError, ValueError):
+                    continue
+        return sorted(found, key=lambda meta: meta["started"])
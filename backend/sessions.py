@@ -0,0 +1,417 @@
+"""
+Simulation sessions.
+
+A session owns one simulation run and drives it from its own asyncio task,
+so the WebSocket receive loop stays free to handle stop/pause/resume/step/
+speed commands while the simulation is producing frames. Frames are handed
+to each subscriber's outbound queue, so a tick never waits on the network.
+
+The simulation itself is read through a frame source (see workers.py), so
+its ticks can run in a worker process and only keyframes and deltas come
+back to the event loop.
+
+Private sessions have a single subscriber and end when it leaves. Shared
+sessions run one authoritative simulation per task/scenario for every
+viewer that joins; late joiners get the latest keyframe straight away and
+the simulation stops when the last subscriber leaves.
+"""
+import asyncio
+import time
+import uuid
+
+import config
+from frames import FRAME_TYPES, KEYFRAME_INTERVAL, FrameStream, coalesce, encode_frame, is_state, merge_events
+from metrics import ENCODE_SECONDS, TICK_SECONDS
+
+MIN_SPEED = 0.1
+MAX_SPEED = 20.0
+
+# Frames per second sent to viewers; faster simulations skip ticks in between
+MIN_FPS = 1.0
+MAX_FPS = 60.0
+DEFAULT_FPS = 30.0
+
+# Share of a viewer's queue that, once filled, halves the frame rate
+BACKLOG_LIMIT = 0.5
+BACKLOG_RECOVERY = 2.0  # frame rate growth per frame once the queues are empty
+
+# Frames in a row over the tick budget before the budget policy steps in
+BUDGET_STRIKES = 3
+
+# Tries to join a shared run that keeps starting or ending elsewhere meanwhile
+JOIN_ATTEMPTS = 3
+
+
+class SimulationSession:
+    def __init__(self, task_id, frames, interval, scenario=None, recorders=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.task_id = task_id
+        self.scenario = scenario
+        self.frames = frames
+        self.interval = interval
+        # Sinks for the frame timeline (run cache, session log): add(frame),
+        # finish(summary) when the run completes, close() when it ends
+        self.recorders = list(recorders)
+        self.speed = 1.0
+        self.fps = DEFAULT_FPS
+        self.paused = False
+        self.subscribers = []
+        self.stream = FrameStream()
+        self.keyframe_interval = KEYFRAME_INTERVAL
+        self._frames_since_keyframe = 0
+        self._ticks_since_keyframe = 0  # recorded ticks, which may outnumber frames sent
+        self._throttle = 1.0  # share of fps sent while viewers' queues back up
+        self.tick_budget = config.TICK_BUDGET_MS / 1000
+        self.budget_policy = config.BUDGET_POLICY
+        self._overruns = 0
+        self._pending_steps = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def shared(self):
+        return self.scenario is not None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def on_end(self, callback):
+        """Call callback() once the run is over, right away if it already is"""
+        if self._task is None or self._task.done():
+            callback()
+        else:
+            self._task.add_done_callback(lambda _: callback())
+
+    def subscribe(self, connection):
+        """Add a viewer; if frames were already sent it gets the latest keyframe now"""
+        connection.needs_keyframe = True
+        self.subscribers.append(connection)
+        if self.stream.started:
+            data = encode_frame(self.stream.keyframe(), connection.encoding, self.stream.shape)
+            connection.send_frame(data, "keyframe")
+
+    def unsubscribe(self, connection):
+        if connection in self.subscribers:
+            self.subscribers.remove(connection)
+
+    def broadcast(self, message):
+        for connection in self.subscribers:
+            connection.send_json(message)
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self._wake.set()
+
+    def step(self, count=1):
+        """Advance count ticks, even while paused"""
+        self._pending_steps += max(1, int(count))
+        self._wake.set()
+
+    def set_speed(self, speed):
+        self.speed = min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+        self._wake.set()
+        return self.speed
+
+    def set_fps(self, fps):
+        self.fps = min(MAX_FPS, max(MIN_FPS, float(fps)))
+        self._wake.set()
+        return self.fps
+
+    @property
+    def unwatched(self):
+        """Nobody is subscribed but the run continues to feed its recorders"""
+        return not self.subscribers and bool(self.recorders) and not self.paused
+
+    def seek(self, step):
+        """Jump to step if the frame source supports it (replays); False otherwise"""
+        seek = getattr(self.frames, "seek", None)
+        if seek is None:
+            return False
+        seek(int(step))
+        self._frames_since_keyframe = 0
+        # Deliver the new keyframe right away, even while paused
+        self._pending_steps = max(self._pending_steps, 1)
+        self._wake.set()
+        return True
+
+    async def stop(self):
+        """Cancel the run and release the simulation"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.frames.close()
+        self._close_recorders()
+
+    def info(self):
+        ticks, period = self._frame_plan()
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "scenario": self.scenario,
+            "step": self.stream.step,
+            "speed": self.speed,
+            "fps": self.fps,
+            "frame_rate": round(1 / period, 2),
+            "ticks_per_frame": ticks,
+            "paused": self.paused,
+            "subscribers": len(self.subscribers),
+        }
+
+    async def _run(self):
+        ticks = 1
+        while self._live_subscribers() or self.unwatched:
+            # Recorders get every tick, so replays and seeks land on real steps
+            passed = [] if self.recorders else None
+            message = await self.frames.next(ticks, passed)
+            # Time spent running the ticks, not waiting behind other sessions' on a shared worker
+            tick_seconds = self.frames.seconds / ticks
+            TICK_SECONDS.observe(tick_seconds, self.task_id)
+            if not self._within_budget(tick_seconds):
+                break
+            if message is None:
+                for tick in passed or ():
+                    self._tick(tick)
+                summary = self.frames.summary or {}
+                for recorder in self.recorders:
+                    recorder.finish(summary)
+                self.broadcast({"type": "complete", **summary})
+                return
+            if is_state(message) or message["type"] in FRAME_TYPES:
+                ticked = [*(passed or ()), message]
+                deltas = [self._tick(tick) for tick in ticked]
+                self._publish(None if None in deltas else coalesce(deltas), merge_events(ticked))
+            else:
+                self._record(message)
+                self.broadcast(message)
+            ticks = await self._wait_for_next_frame()
+        # Every viewer went away mid-run; nobody is left to read frames
+        self.frames.close()
+        self._close_recorders()
+
+    def _tick(self, message):
+        """Apply one tick's state or frame to the stream and record it; returns its delta, None for a keyframe"""
+        if is_state(message):
+            delta = self.stream.update(message)
+        else:
+            # Already diffed by a worker process, or replayed
+            delta = self.stream.apply(message)
+        if self.recorders:
+            self._ticks_since_keyframe += 1
+            if delta is None or self._ticks_since_keyframe >= self.keyframe_interval:
+                self._ticks_since_keyframe = 0
+                self._record(self.stream.keyframe())
+            else:
+                self._record(delta)
+        return delta
+
+    def _record(self, frame):
+        for recorder in self.recorders:
+            recorder.add(frame)
+
+    def _close_recorders(self):
+        for recorder in self.recorders:
+            recorder.close()
+
+    def _live_subscribers(self):
+        self.subscribers = [connection for connection in self.subscribers if not connection.closed]
+        return self.subscribers
+
+    def _publish(self, delta, events=None):
+        """Send the latest state to every subscriber as a keyframe or delta.
+
+        Keyframes carry events, the merged events of every tick since the
+        last frame (see frames.EVENT_KEYS), as deltas already do. Each
+        (kind, encoding) pair is serialised once per tick however many
+        viewers share it.
+        """
+        self._adapt_to_backlog()
+        self._frames_since_keyframe += 1
+        keyframe_due = delta is None or self._frames_since_keyframe >= self.keyframe_interval
+        if keyframe_due:
+            self._frames_since_keyframe = 0
+        encoded = {}
+        for connection in self.subscribers:
+            kind = "keyframe" if keyframe_due or connection.needs_keyframe else "delta"
+            key = (kind, connection.encoding)
+            if key not in encoded:
+                frame = {**self.stream.keyframe(), **(events or {})} if kind == "keyframe" else delta
+                started = time.perf_counter()
+                encoded[key] = encode_frame(frame, connection.encoding, self.stream.shape)
+                ENCODE_SECONDS.observe(time.perf_counter() - started, connection.encoding)
+            connection.send_frame(encoded[key], kind)
+
+    def _within_budget(self, tick_seconds):
+        """Apply the budget policy after BUDGET_STRIKES slow frames in a row; False ends the run"""
+        if not self.tick_budget or tick_seconds <= self.tick_budget:
+            self._overruns = 0
+            return True
+        self._overruns += 1
+        if self._overruns < BUDGET_STRIKES:
+            return True
+        self._overruns = 0
+        budget_ms = round(self.tick_budget * 1000)
+        if self.budget_policy == "throttle" and self.speed > MIN_SPEED:
+            # Slow ticks stay slow, but fewer of them per second free the CPU for other sessions
+            speed = self.set_speed(self.speed / 2)
+            self.broadcast({"type": "throttled", "speed": speed, "budget_ms": budget_ms})
+            return True
+        # Terminate, or throttled down to the minimum speed and still over budget
+        self.broadcast({"type": "error", "message": f"Session stopped: ticks take over {budget_ms} ms"})
+        return False
+
+    def _adapt_to_backlog(self):
+        """Halve the frame rate while any viewer's queue is backing up, recover once drained"""
+        backlog = max((connection.depth / connection.queue_size for connection in self.subscribers), default=0)
+        if backlog >= BACKLOG_LIMIT:
+            self._throttle = max(MIN_FPS / self.fps, self._throttle / 2)
+        elif backlog == 0 and self._throttle < 1.0:
+            self._throttle = min(1.0, self._throttle * BACKLOG_RECOVERY)
+
+    def _frame_plan(self):
+        """(ticks per frame, seconds per frame) for the current speed, fps and backlog"""
+        tick_rate = self.speed / self.interval
+        frame_rate = min(self.fps * self._throttle, tick_rate)
+        ticks = max(1, round(tick_rate / frame_rate))
+        return ticks, ticks / tick_rate
+
+    async def _wait_for_next_frame(self):
+        """Wait until the next frame is due; returns how many ticks it covers"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while True:
+            if self._pending_steps:
+                self._pending_steps -= 1
+                return 1
+            self._wake.clear()
+            if self.paused:
+                await self._wake.wait()
+                continue
+            ticks, period = self._frame_plan()
+            if self.unwatched:
+                # No viewer to pace for: run flat out, yielding to the loop between frames
+                await asyncio.sleep(0)
+                return ticks
+            remaining = started + period - loop.time()
+            if remaining <= 0:
+                return ticks
+            # Not wait_for(): on Python 3.11 it swallows a cancel (stop()) that
+            # lands as the wait completes, and the session then never ends
+            timer = loop.call_later(remaining, self._wake.set)
+            try:
+                await self._wake.wait()
+            finally:
+                timer.cancel()
+
+
+class SessionRegistry:
+    def __init__(self, admission=None, cluster=None):
+        self.sessions = {}  # session id -> session
+        self.shared = {}    # (task_id, scenario) -> shared session
+        # Every session started here holds an admission slot, given back when it ends
+        self.admission = admission
+        # Other server workers' sessions, relayed to viewers here (see cluster.py)
+        self.cluster = cluster
+
+    def start(self, task_id, connection, simulation, scenario=None):
+        """Start a session for simulation = (frame source, interval, recorders) with connection subscribed"""
+        frames, interval, recorders = simulation
+        session = SimulationSession(task_id, frames, interval, scenario, recorders)
+        session.subscribe(connection)
+        self.sessions[session.id] = session
+        if session.shared:
+            self.shared[(task_id, scenario)] = session
+        if self.cluster is not None:
+            self.cluster.announce(session)
+        session.start().add_done_callback(lambda _: self._forget(session))
+        return session
+
+    async def join(self, task_id, scenario, connection, open_simulation):
+        """Subscribe to the shared run for task/scenario, starting one if needed.
+
+        await open_simulation() is only called when no run is live, and must
+        take an admission slot for it; returns None if it returns None
+        (unknown task). In a cluster the run may live in another worker, and
+        connection is then relayed to it.
+        """
+        for _ in range(JOIN_ATTEMPTS):
+            session = self.running(task_id, scenario)
+            if session is not None:
+                session.subscribe(connection)
+                return session
+            if self.cluster is not None:
+                session = await self.cluster.attach(connection, task_id=task_id, scenario=scenario)
+                if session is not None:
+                    return session
+            simulation = await open_simulation()
+            if simulation is None:
+                return None
+            # Another viewer may have started the run while this one was opening
+            if self.running(task_id, scenario) is None and (
+                    self.cluster is None or self.cluster.claim(task_id, scenario)):
+                return self.start(task_id, connection, simulation, scenario)
+            frames, _, recorders = simulation
+            frames.close()
+            for recorder in recorders:
+                recorder.close()
+            self._release(task_id)
+        return None
+
+    async def watch(self, session_id, connection):
+        """Subscribe connection to the session with session_id, here or in another worker"""
+        session = self.sessions.get(session_id)
+        if session is not None and session.running:
+            session.subscribe(connection)
+            return session
+        if self.cluster is not None:
+            return await self.cluster.attach(connection, session_id=session_id)
+        return None
+
+    async def leave(self, session, connection):
+        """Unsubscribe connection; the session stops once nobody is watching.
+
+        A private session stops when its owner leaves, even if read-only
+        viewers are still streaming it. A recorded run that is not paused
+        finishes unwatched instead, at full speed and without frames, so its
+        recording and cache entry are whole.
+        """
+        session.unsubscribe(connection)
+        viewers = session.subscribers if session.shared else [
+            viewer for viewer in session.subscribers if not viewer.read_only]
+        if viewers or session.unwatched:
+            return
+        await session.stop()
+
+    async def stop_all(self):
+        """Stop every session running here, before the frame sources' workers go away"""
+        await asyncio.gather(*(session.stop() for session in list(self.sessions.values())))
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def running(self, task_id, scenario):
+        """The live shared session of task/scenario in this process, or None"""
+        session = self.shared.get((task_id, scenario))
+        return session if session is not None and session.running else None
+
+    def _forget(self, session):
+        self.sessions.pop(session.id, None)
+        if self.cluster is not None:
+            self.cluster.forget(session)
+        if self.shared.get((session.task_id, session.scenario)) is session:
+            del self.shared[(session.task_id, session.scenario)]
+        self._release(session.task_id)
+
+    def _release(self, task_id):
+        if self.admission is not None:
+            self.admission.release(task_id)
@@ -0,0 +1,432 @@
+"""
+Backend simulations as tick generators.
+
+Each simulation is a plain generator that yields one state per tick and
+returns an optional summary when it finishes. The session that drives it
+decides when to pull the next tick, so pausing, stepping and stopping never
+need to reach into the simulation itself.
+
+States are untyped dicts ({"step", "grid", "agents", ...}) that the session
+turns into keyframes and deltas (see frames.py); typed dicts such as
+{"type": "info"} are sent to the client as-is.
+
+Task 3 runs the cooperative planner from task3_path_planners once and sends
+the whole plan in the first frame; later ticks only report arrivals.
+
+Tasks 4-10 stream the engines in the task folders through their headless
+simulate_* generators. An engine is imported from its file the first time
+one of its runs starts (in the worker process that runs it), so importing
+this module, and starting the server, never loads an engine; nothing here
+imports matplotlib.
+
+Tasks that take start parameters (grid size, agent count, densities) list
+them in PARAMETERS with bounds from the server config; validate_params()
+checks a client's values before any simulation is created.
+"""
+import importlib.util
+import os
+import random
+import sys
+from collections import deque
+
+import config
+
+# The task engines live in the task folders next to backend/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The grid package every engine builds on; its code decides their frames too
+GRIDCORE = [os.path.join(ROOT, "gridcore", name) for name in ("__init__.py", "astar.py", "bfs.py", "grid.py", "neighbors.py", "search.py")]
+
+
+# ============= TASK 2: CLEANING =============
+MOVES = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+
+def _spawn_points(size, count):
+    """The four corners first, then an even lattice over the rest of the grid"""
+    corners = [(0, 0), (size - 1, 0), (0, size - 1), (size - 1, size - 1)]
+    points = list(dict.fromkeys(corners))[:count]
+    side = 1
+    while side * side < count:
+        side += 1
+    for i in range(side * side):
+        if len(points) >= count:
+            break
+        point = ((i % side) * size // side + size // (2 * side),
+                 (i // side) * size // side + size // (2 * side))
+        if point not in points:
+            points.append(point)
+    return points
+
+
+def _nearest_dirt(x, y, size, dirty, claimed):
+    """Closest dirty cell to (x, y) by Manhattan distance that no agent has claimed.
+
+    Searches outward ring by ring, so the cost grows with the distance to the
+    nearest dirt; once the rings would cover more cells than are left dirty
+    it scans the dirty set instead.
+    """
+    available = len(dirty) - len(claimed)
+    if available <= 0:
+        return None
+    searched = 0
+    for d in range(2 * size):
+        if searched > available:
+            break
+        for i in range(-d, d + 1):
+            nx = x + i
+            if not 0 <= nx < size:
+                continue
+            rest = d - abs(i)
+            for ny in ((y - rest, y + rest) if rest else (y,)):
+                if 0 <= ny < size:
+                    searched += 1
+                    if (nx, ny) in dirty and (nx, ny) not in claimed:
+                        return nx, ny
+    candidates = [cell for cell in dirty if cell not in claimed]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda cell: abs(cell[0] - x) + abs(cell[1] - y))
+
+
+def cleaning_frames(size=20, agent_count=4, dirt_density=1.0, seed=None):
+    """Task 2: Cleaning Simulation
+
+    Every agent heads for its own nearest dirty cell. The dirty cells and the
+    occupied cells are tracked incrementally, so a tick costs O(agents) plus
+    the search for new targets rather than a rescan of the whole grid per move.
+    With dirt_density below 1 the seed decides which cells start dirty;
+    otherwise the run does not depend on it.
+    """
+    if dirt_density >= 1:
+        grid = [[1 for _ in range(size)] for _ in range(size)]
+    else:
+        rng = random.Random(seed)
+        grid = [[1 if rng.random() < dirt_density else 0 for _ in range(size)] for _ in range(size)]
+    dirty = {(x, y) for y in range(size) for x in range(size) if grid[y][x]}
+    total = len(dirty)
+    agents = [
+        {"id": i + 1, "x": x, "y": y, "color": f"agent{i % 4 + 1}"}
+        for i, (x, y) in enumerate(_spawn_points(size, agent_count))
+    ]
+    occupied = {(agent["x"], agent["y"]) for agent in agents}
+    targets = {}  # agent id -> claimed dirty cell
+    cleaned = {agent["id"]: 0 for agent in agents}
+
+    steps = 0
+    while dirty:
+        # Clean current positions
+        for agent in agents:
+            cell = (agent["x"], agent["y"])
+            if cell in dirty:
+                dirty.discard(cell)
+                grid[cell[1]][cell[0]] = 0
+                cleaned[agent["id"]] += 1
+
+        # Move agents
+        for agent in agents:
+            x, y = agent["x"], agent["y"]
+            target = targets.get(agent["id"])
+            if target is None or target not in dirty:
+                claimed = {cell for aid, cell in targets.items() if aid != agent["id"] and cell in dirty}
+                target = _nearest_dirt(x, y, size, dirty, claimed)
+                if target is None:
+                    # More agents than dirt left: share a target
+                    target = _nearest_dirt(x, y, size, dirty, ())
+                if target is None:
+                    targets.pop(agent["id"], None)
+                    continue
+                targets[agent["id"]] = target
+
+            best_move = None
+            min_dist = float('inf')
+            for dx, dy in MOVES:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in occupied:
+                    dist = abs(target[0] - nx) + abs(target[1] - ny)
+                    if dist < min_dist:
+                        min_dist = dist
+                        best_move = (nx, ny)
+
+            if best_move and (x, y) != target:
+                occupied.discard((x, y))
+                occupied.add(best_move)
+                agent["x"], agent["y"] = best_move
+
+        steps += 1
+        yield {
+            "step": steps,
+            "agents": agents,
+            "grid": grid,
+            "progress": round(((total - len(dirty)) / total) * 100, 1)
+        }
+
+    return {"steps": steps, "cells_cleaned": total, "per_agent": cleaned}
+
+
+# ============= TASK 3: PATH PLANNING =============
+# 30 obstacles on the original 15x15 grid
+DEFAULT_OBSTACLE_DENSITY = 30 / (15 * 15)
+
+# The cooperative planner, relative to the repository root
+PLANNER = "task3_path_planners/path_planning.py"
+
+
+def _ring_points(size, count):
+    """count cells on the ring one in from the border: its corners first, then evenly spaced"""
+    low, high = 1, size - 2
+    ring = ([(x, low) for x in range(low, high)] + [(high, y) for y in range(low, high)]
+            + [(x, high) for x in range(high, low, -1)] + [(low, y) for y in range(high, low, -1)])
+    corners = [(low, low), (high, low), (low, high), (high, high)]
+    points = list(dict.fromkeys(corners))[:count]
+    rest = [cell for cell in ring if cell not in points]
+    extra = count - len(points)
+    return points + [rest[i * len(rest) // extra] for i in range(extra)]
+
+
+def _regions(grid):
+    """Label of the 4-connected free region of every free cell (None for obstacles)"""
+    size = len(grid)
+    labels = [[None] * size for _ in range(size)]
+    for sy in range(size):
+        for sx in range(size):
+            if grid[sy][sx] or labels[sy][sx] is not None:
+                continue
+            label = (sx, sy)
+            labels[sy][sx] = label
+            queue = deque([(sx, sy)])
+            while queue:
+                x, y = queue.popleft()
+                for dx, dy in MOVES:
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < size and 0 <= ny < size and not grid[ny][nx] and labels[ny][nx] is None:
+                        labels[ny][nx] = label
+                        queue.append((nx, ny))
+    return labels
+
+
+def pathfinding_frames(size=15, agent_count=4, obstacle_density=DEFAULT_OBSTACLE_DENSITY, seed=None):
+    """Task 3: Path Planning
+
+    Agents start on the ring one in from the border and head for the cell
+    opposite them through the centre. Their paths are planned together once
+    with plan_paths_cooperatively(); the first frame carries the plan as
+    {"start": step, "paths": [{"id", "path": [x0, y0, x1, y1, ...]}]}, one
+    position per step, and later frames only the step and the ids of the
+    agents that arrived on it. Agents whose target cannot be reached stay
+    where they are.
+    """
+    GRID_SIZE = size
+    rng = random.Random(seed)
+
+    # Create grid with obstacles
+    grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    for _ in range(round(obstacle_density * GRID_SIZE * GRID_SIZE)):
+        x, y = rng.randint(0, GRID_SIZE-1), rng.randint(0, GRID_SIZE-1)
+        grid[y][x] = 1
+
+    agents = [
+        {"id": i + 1, "x": x, "y": y, "targetX": GRID_SIZE - 1 - x, "targetY": GRID_SIZE - 1 - y,
+         "color": f"agent{i % 4 + 1}"}
+        for i, (x, y) in enumerate(_ring_points(GRID_SIZE, agent_count))
+    ]
+
+    # Clear agent positions
+    for agent in agents:
+        grid[agent["y"]][agent["x"]] = 0
+        grid[agent["targetY"]][agent["targetX"]] = 0
+
+    # Only agents that can reach their target are planned; an unreachable
+    # target would make the space-time search run to its time limit
+    planner = load_engine(PLANNER)
+    path_grid = planner.PathGrid(GRID_SIZE)
+    path_grid.add_obstacles((x, y) for y, row in enumerate(grid) for x, value in enumerate(row) if value)
+    regions = _regions(grid)
+    planned = [planner.PathAgent(agent["id"], (agent["x"], agent["y"]), (agent["targetX"], agent["targetY"]))
+               for agent in agents
+               if regions[agent["y"]][agent["x"]] == regions[agent["targetY"]][agent["targetX"]]]
+    planner.plan_paths_cooperatively(planned, path_grid)
+
+    paths = {agent["id"]: [(agent["x"], agent["y"])] for agent in agents}
+    paths.update((agent.id, agent.path) for agent in planned)
+    arrivals = {}
+    for agent in agents:
+        path = paths[agent["id"]]
+        if path[-1] == (agent["targetX"], agent["targetY"]):
+            arrivals.setdefault(len(path) - 1, []).append(agent["id"])
+
+    yield {
+        "step": 0,
+        "grid": grid,
+        "agents": agents,
+        "plan": {
+            "start": 0,
+            "paths": [{"id": agent_id, "path": [c for cell in path for c in cell]}
+                      for agent_id, path in paths.items()],
+        },
+    }
+
+    # The plan plays out on the client; ticks only mark arrivals
+    steps = max(len(path) for path in paths.values()) - 1
+    for step in range(1, steps + 1):
+        state = {"step": step}
+        if step in arrivals:
+            state["arrived"] = arrivals[step]
+        yield state
+
+    reached = sum(len(ids) for ids in arrivals.values())
+    return {"steps": steps, "agents_reached": reached, "total_agents": len(agents)}
+
+
+# Planner changes change the frames too (for the run cache)
+pathfinding_frames.source_files = [os.path.abspath(__file__), os.path.join(ROOT, PLANNER), *GRIDCORE]
+
+
+# ============= TASKS 4-10: ENGINES =============
+class Engine:
+    """Frame generator factory for a task engine, imported on first use.
+
+    Only the engine's file and function names are kept, so an Engine can be
+    sent to a worker process before anything has been imported.
+    """
+
+    def __init__(self, path, simulate, to_state):
+        self.path = path  # relative to the repository root
+        self.simulate = simulate
+        self.to_state = to_state
+
+    @property
+    def source_files(self):
+        """Files whose code decides the frames (for the run cache)"""
+        return [os.path.abspath(__file__), os.path.join(ROOT, self.path), *GRIDCORE]
+
+    def load(self):
+        return load_engine(self.path)
+
+    def __call__(self, seed=None):
+        module = self.load()
+        return engine_frames(getattr(module, self.simulate), getattr(module, self.to_state), seed)
+
+
+def load_engine(path):
+    """The module at path (relative to the repository root), imported from its file once per process"""
+    name = path[:-len(".py")].replace("/", ".")
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return module
+
+
+def engine_frames(simulate, to_state, seed=None):
+    """Stream a task engine's headless run, converting each tick with to_state"""
+    ticks = simulate(seed)
+    try:
+        while True:
+            yield to_state(*next(ticks))
+    except StopIteration as done:
+        return done.value
+
+
+# ============= REGISTRY =============
+# task_id -> (frame generator factory, seconds between ticks). Factories are
+# module-level functions, partials or Engines so they can be sent to worker
+# processes.
+SIMULATIONS = {
+    "task2": (cleaning_frames, 0.1),
+    "task3": (pathfinding_frames, 0.2),
+    "task4": (Engine("task4_warehouse_pickup/warehouse_simulation.py", "simulate_warehouse", "warehouse_state"), 0.2),
+    "task5": (Engine("task5_rescue_bots/rescue_simulation.py", "simulate_rescue", "rescue_state"), 0.2),
+    "task6": (Engine("task6_drone_delivery/drone_delivery.py", "simulate_delivery", "delivery_state"), 0.2),
+    "task7": (Engine("task7_grid_painting/painting_simulation.py", "simulate_painting", "painting_state"), 0.2),
+    "task8": (Engine("task8_resource_collection/resource_collection.py", "simulate_collection", "collection_state"), 0.2),
+    "task9": (Engine("task9_firefighters/firefighter_simulation.py", "simulate_firefighting", "firefighting_state"), 0.2),
+    "task10": (Engine("task10_map_exploration/exploration_simulation.py", "simulate_exploration", "exploration_state"), 0.2),
+}
+
+
+def preload(task_ids):
+    """Import the engines of task_ids now instead of on their first run ("all" for every task)"""
+    if "all" in task_ids:
+        task_ids = list(SIMULATIONS)
+    for task_id in task_ids:
+        if task_id not in SIMULATIONS:
+            raise ValueError(f"Unknown task to preload: {task_id}")
+        factory, _ = SIMULATIONS[task_id]
+        if isinstance(factory, Engine):
+            factory.load()
+        elif factory is pathfinding_frames:
+            load_engine(PLANNER)
+
+
+def get_simulation(task_id):
+    """Return (factory, interval) for task_id, or None if the task is unknown"""
+    return SIMULATIONS.get(task_id)
+
+
+# ============= PARAMETERS =============
+class Param:
+    """A start parameter: int or float, inclusive bounds and default"""
+
+    def __init__(self, kind, low, high, default):
+        self.kind = kind
+        self.low = low
+        self.high = high
+        self.default = default
+
+    def check(self, name, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (
+                self.kind is int and not isinstance(value, int)):
+            raise ValueError(f"{name} must be {'an integer' if self.kind is int else 'a number'}")
+        if not self.low <= value <= self.high:
+            raise ValueError(f"{name} must be between {self.low} and {self.high}")
+        return self.kind(value)
+
+    def info(self):
+        return {"type": self.kind.__name__, "min": self.low, "max": self.high, "default": self.default}
+
+
+# task_id -> parameter name -> Param; tasks not listed take no parameters
+PARAMETERS = {
+    "task2": {
+        "size": Param(int, 2, config.MAX_GRID_SIZE, 20),
+        "agent_count": Param(int, 1, config.MAX_AGENTS, 4),
+        "dirt_density": Param(float, 0.0, 1.0, 1.0),
+    },
+    "task3": {
+        "size": Param(int, 4, config.MAX_GRID_SIZE, 15),
+        "agent_count": Param(int, 1, config.MAX_AGENTS, 4),
+        "obstacle_density": Param(float, 0.0, 0.9, DEFAULT_OBSTACLE_DENSITY),
+    },
+}
+
+# Most agents a grid of the given size has room for
+AGENT_CAPACITY = {
+    "task2": lambda size: size * size,
+    "task3": lambda size: 4 * (size - 3),
+}
+
+
+def validate_params(task_id, params):
+    """params checked against the task's bounds, with defaults filled in.
+
+    Raises ValueError naming the first offending parameter.
+    """
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    spec = PARAMETERS.get(task_id, {})
+    unknown = sorted(set(params) - set(spec))
+    if unknown:
+        raise ValueError(f"Unknown parameters for {task_id}: {', '.join(unknown)}")
+    values = {name: param.check(name, params[name]) if name in params else param.default
+              for name, param in spec.items()}
+    capacity = AGENT_CAPACITY.get(task_id)
+    if capacity is not None and values["agent_count"] > capacity(values["size"]):
+        raise ValueError(f"agent_count must be at most {capacity(values['size'])} on a {values['size']} grid")
+    return values
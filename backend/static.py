@@ -0,0 +1,149 @@
+"""
+Static frontend assets.
+
+The dashboard (frontend/) and every task page (task*/index.html, script.js,
+style.css) are served by the API server under /app/, keeping the repository
+layout so the pages' relative links keep working:
+
+    /app/frontend/index.html
+    /app/task4_warehouse_pickup/index.html
+    /app/shadcn-design-system.css
+
+All files are read, hashed and compressed once at startup (gzip, plus
+brotli when the brotli package is installed); requests are answered from
+memory with the smallest variant the client accepts. Every variant has a
+strong ETag, so revalidation is a 304 without a body.
+
+HTML pages are rewritten to link their local stylesheets and scripts as
+"style.css?v=<hash>". A request whose ?v= matches the file's current hash
+is cached for a year as immutable; anything else (the pages themselves,
+unversioned or outdated links) is served with "no-cache" and revalidated.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+import config
+
+# Top-level folders that hold web pages; root-level stylesheets are served too
+SITE_DIRS = re.compile(r"^(frontend|task\d+_\w+)$")
+SUFFIXES = (".html", ".css", ".js", ".svg", ".png", ".jpg", ".ico", ".woff2")
+COMPRESSIBLE = (".html", ".css", ".js", ".svg")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Local stylesheet and script links in HTML pages
+_LINK = re.compile(r'(\b(?:href|src)=")([^"#?:]+\.(?:css|js))(")')
+
+
+def accepted_encodings(header):
+    """Encodings a client accepts, from its Accept-Encoding header (q=0 excluded)"""
+    accepted = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def not_modified(if_none_match, etag):
+    """Whether an If-None-Match header matches etag (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class Asset:
+    def __init__(self, path, content):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.version = hashlib.sha256(content).hexdigest()[:16]
+        # encoding -> (body, ETag); "identity" always, others only when smaller
+        self.variants = {"identity": (content, f'"{self.version}"')}
+        if path.endswith(COMPRESSIBLE):
+            self._compress(content)
+
+    def _compress(self, content):
+        compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(content, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(content):
+                self.variants[encoding] = (body, f'"{self.version}-{encoding}"')
+
+    def variant(self, accept_encoding):
+        """(encoding, body, ETag) of the smallest variant the client accepts"""
+        accepted = accepted_encodings(accept_encoding)
+        encoding = min((name for name in self.variants if name == "identity" or name in accepted),
+                       key=lambda name: len(self.variants[name][0]))
+        return (encoding, *self.variants[encoding])
+
+
+class StaticAssets:
+    def __init__(self, root=config.STATIC_ROOT):
+        self.root = root
+        self.assets = {}  # path relative to root, with "/" separators -> Asset
+
+    def build(self):
+        """Read and compress every asset; pages are rewritten to link versioned assets"""
+        assets = {}
+        pages = []
+        for path in self._files():
+            with open(os.path.join(self.root, path), "rb") as source:
+                content = source.read()
+            if path.endswith(".html"):
+                pages.append((path, content))
+            else:
+                assets[path] = Asset(path, content)
+        for path, content in pages:
+            assets[path] = Asset(path, self._versioned_links(path, content, assets))
+        self.assets = assets
+        return self
+
+    def get(self, path):
+        """The Asset at path, or None; "dir/" means "dir/index.html" """
+        if not path or path.endswith("/"):
+            path += "index.html"
+        return self.assets.get(path)
+
+    def _files(self):
+        for name in sorted(os.listdir(self.root)):
+            full = os.path.join(self.root, name)
+            if os.path.isfile(full) and name.endswith(".css"):
+                yield name
+            elif os.path.isdir(full) and SITE_DIRS.match(name):
+                for directory, subdirs, files in os.walk(full):
+                    subdirs[:] = sorted(d for d in subdirs if not d.startswith((".", "__")))
+                    for file in sorted(files):
+                        if file.endswith(SUFFIXES):
+                            relative = os.path.relpath(os.path.join(directory, file), self.root)
+                            yield relative.replace(os.sep, "/")
+
+    @staticmethod
+    def _versioned_links(path, content, assets):
+        base = posixpath.dirname(path)
+
+        def version(match):
+            target = posixpath.normpath(posixpath.join(base, match.group(2)))
+            asset = assets.get(target)
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}?v={asset.version}{match.group(3)}"
+
+        return _LINK.sub(version, content.decode("utf-8")).encode("utf-8")
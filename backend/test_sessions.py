@@ -0,0 +1,86 @@
+"""
+Sessions that skip ticks must still deliver every per-tick event.
+
+    cd backend && python -m pytest -q test_sessions.py
+"""
+import asyncio
+import json
+from functools import partial
+
+from cache import CachedFrames
+from sessions import SessionRegistry
+from simulations import pathfinding_frames
+from workers import LocalFrames
+
+PARAMS = {"seed": 5, "size": 40, "agent_count": 20}
+
+
+class Viewer:
+    """Connection stand-in that keeps the JSON frames and messages it is sent"""
+    encoding = "json"
+    queue_size = 64
+    depth = 0
+    closed = False
+    read_only = False
+
+    def __init__(self):
+        self.needs_keyframe = True
+        self.messages = []
+
+    def send_frame(self, data, kind):
+        self.needs_keyframe = False
+        self.messages.append(json.loads(data))
+
+    def send_json(self, message):
+        self.messages.append(message)
+
+
+def watch(frames, speed, fps, recorders=()):
+    """Messages a viewer receives from a run of frames at speed and fps"""
+    async def run():
+        viewer = Viewer()
+        session = SessionRegistry().start("task3", viewer, (frames, 0.2, list(recorders)))
+        session.set_speed(speed)
+        session.set_fps(fps)
+        while session.running:
+            await asyncio.sleep(0.01)
+        return viewer.messages
+    return asyncio.run(run())
+
+
+def arrivals(messages):
+    return sorted(agent_id for message in messages for agent_id in message.get("arrived", ()))
+
+
+class Collector:
+    """Recorder keeping the frames it is given, like the run cache does"""
+
+    def __init__(self):
+        self.frames = []
+
+    def add(self, frame):
+        self.frames.append(json.dumps(frame))
+
+    def finish(self, summary):
+        self.summary = summary
+
+    def close(self):
+        pass
+
+
+def test_skipped_ticks_keep_arrivals():
+    messages = watch(LocalFrames(partial(pathfinding_frames, **PARAMS)), speed=20, fps=5)
+    complete = messages[-1]
+    assert complete["type"] == "complete"
+    assert complete["agents_reached"] == 20
+    assert arrivals(messages) == list(range(1, 21))
+
+
+def test_recorded_and_replayed_arrivals():
+    recorder = Collector()
+    messages = watch(LocalFrames(partial(pathfinding_frames, **PARAMS)), speed=20, fps=5, recorders=[recorder])
+    assert arrivals(messages) == list(range(1, 21))
+    assert arrivals(json.loads(frame) for frame in recorder.frames) == list(range(1, 21))
+    # A replay coalesces the recorded ticks it skips
+    replayed = watch(CachedFrames({"summary": recorder.summary}, recorder.frames), speed=20, fps=5)
+    assert arrivals(replayed) == list(range(1, 21))
@@ -0,0 +1,305 @@
+"""
+Simulation worker processes.
+
+Simulation ticks are plain Python and can take milliseconds on large grids;
+run on the event loop they would stall every other WebSocket and HTTP
+request in the process. A WorkerPool keeps one single-process executor per
+core and pins each run to one of them, so the generator lives in that worker
+for the whole run. Every tick the worker advances the generator, diffs the
+state with its own FrameStream and sends back only the keyframe or delta;
+the session mirrors it with FrameStream.apply().
+
+Sessions read from a frame source: await source.next(ticks) advances up to
+ticks ticks and returns the latest message (a state, a keyframe/delta or a
+control message) or None once the run is over, with the run's summary in
+source.summary. Skipped ticks are never diffed or sent; the returned state
+or frame covers everything that changed since the previous one. Sessions
+that record every tick pass a list as well, await source.next(ticks,
+passed): every tick is then diffed as soon as it runs, the frames of the
+ticks before the returned one are appended to passed, in order, and the
+returned frame covers its own tick only.
+source.seconds is the time the last next() spent running ticks, not
+counting any wait for a busy worker. LocalFrames runs the generator
+in-process and is used when the pool is disabled (SIM_WORKERS=0) or not
+started.
+"""
+import asyncio
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import config
+from frames import FRAME_TYPES, FrameStream, coalesce, has_events, is_state, with_events
+
+class Ticks:
+    """Advances a simulation generator several ticks at a time"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.summary = None
+        self.done = False
+        self._held = None  # control message met while skipping ticks
+
+    def advance(self, ticks=1, passed=None, keep=None):
+        """Latest state after up to ticks ticks, a control message, or None at the end.
+
+        With a passed list every state is turned into a frame by keep(state)
+        as soon as it is yielded, before the generator runs on and can change
+        the objects it holds; the frames of the ticks before the returned one
+        are appended to passed. Otherwise skipped states are dropped, but the
+        returned one carries their events too (see frames.EVENT_KEYS).
+        """
+        if self._held is not None:
+            message, self._held = self._held, None
+            return message
+        state = None
+        skipped = []  # dropped states that carry events
+        for _ in range(max(1, ticks)):
+            if self.done:
+                break
+            try:
+                message = next(self.frames)
+            except StopIteration as end:
+                self.done = True
+                self.summary = end.value
+                break
+            if not is_state(message):
+                if state is None:
+                    return message
+                self._held = message
+                break
+            if passed is not None:
+                message = keep(message)
+                if state is not None:
+                    passed.append(state)
+            elif state is not None and has_events(state):
+                skipped.append(state)
+            state = message
+        return with_events(skipped, state)
+
+    def close(self):
+        close = getattr(self.frames, "close", None)
+        if close is not None:
+            close()
+
+
+# ============= WORKER SIDE =============
+# run id -> (Ticks, FrameStream), per worker process
+_runs = {}
+
+
+def _warm(preload=()):
+    """Import the simulations, and the engines of the preload tasks, before the first run"""
+    import simulations
+    simulations.preload(preload)
+
+
+def _open(run_id, factory):
+    _runs[run_id] = (Ticks(factory()), FrameStream())
+
+
+def _step(run_id, ticks=1, every=False):
+    """Advance a run up to ticks ticks; returns (message, None, passed, seconds) or (None, summary, passed, seconds).
+
+    passed holds the frames of the ticks before message when every is set,
+    and is empty otherwise; seconds is the time spent in this call.
+    """
+    started = time.perf_counter()
+    frames, stream = _runs[run_id]
+    passed = []
+    message = frames.advance(ticks, passed if every else None, partial(_diff, stream, copy=True))
+    if message is None:
+        del _runs[run_id]
+        return None, frames.summary, passed, time.perf_counter() - started
+    if is_state(message):
+        # Pickled on return, so sharing the grid with the stream is safe
+        message = _diff(stream, message)
+    return message, None, passed, time.perf_counter() - started
+
+
+def _diff(stream, state, copy=False):
+    """Keyframe or delta of state; copy keyframes that must outlive the next update"""
+    delta = stream.update(state)
+    if delta is not None:
+        return delta
+    keyframe = stream.keyframe()
+    if copy and "grid" in keyframe:
+        keyframe["grid"] = [list(row) for row in keyframe["grid"]]
+    return keyframe
+
+
+def _close(run_id):
+    run = _runs.pop(run_id, None)
+    if run is not None:
+        run[0].close()
+
+
+# ============= FRAME SOURCES =============
+class LocalFrames:
+    """Runs the simulation generator on the event loop"""
+
+    def __init__(self, factory):
+        self.frames = Ticks(factory())
+        self.stream = FrameStream()  # diffs the ticks handed back in passed
+        self.summary = None
+        self.seconds = 0.0
+
+    async def next(self, ticks=1, passed=None):
+        started = time.perf_counter()
+        message = self.frames.advance(ticks, passed, partial(_diff, self.stream, copy=True))
+        self.seconds = time.perf_counter() - started
+        if message is None:
+            self.summary = self.frames.summary
+        return message
+
+    def close(self):
+        self.frames.close()
+
+
+class RemoteFrames:
+    """Runs the simulation generator in a worker process"""
+
+    def __init__(self, worker, run_id, factory):
+        self.worker = worker
+        self.run_id = run_id
+        self.summary = None
+        self.seconds = 0.0
+        self.closed = False
+        worker.runs += 1
+        # Single-process executors run jobs in order, so no need to wait
+        self._opened = worker.executor.submit(_open, run_id, factory)
+
+    async def next(self, ticks=1, passed=None):
+        if self._opened is not None:
+            await asyncio.wrap_future(self._opened)
+            self._opened = None
+        loop = asyncio.get_running_loop()
+        message, summary, frames, self.seconds = await loop.run_in_executor(
+            self.worker.executor, _step, self.run_id, ticks, passed is not None)
+        if passed is not None:
+            passed.extend(frames)
+        if message is None:
+            self.summary = summary
+            self._release()
+        return message
+
+    def close(self):
+        if not self.closed:
+            self.worker.executor.submit(_close, self.run_id)
+            self._release()
+
+    def _release(self):
+        if not self.closed:
+            self.closed = True
+            self.worker.runs -= 1
+
+
+class ReplayFrames:
+    """Base for sources replaying already-diffed frames from self.records.
+
+    Each frame record is one tick. Skipped frames are merged with
+    frames.coalesce(), or handed back in passed; subclasses set self.records
+    and self.final_summary.
+    """
+
+    def __init__(self):
+        self.summary = None
+        self.final_summary = None
+        self.seconds = 0.0
+        self.records = iter(())
+        self._held = None
+
+    async def next(self, ticks=1, passed=None):
+        started = time.perf_counter()
+        try:
+            return self._next(ticks, passed)
+        finally:
+            self.seconds = time.perf_counter() - started
+
+    def _next(self, ticks, passed):
+        if self._held is not None:
+            message, self._held = self._held, None
+            return message
+        batch = []
+        for record in self.records:
+            if record.get("type") not in FRAME_TYPES:
+                if not batch:
+                    return record
+                self._held = record
+                break
+            batch.append(record)
+            if len(batch) >= ticks:
+                break
+        if batch and passed is not None:
+            passed.extend(batch[:-1])
+            return batch[-1]
+        if batch:
+            return coalesce(batch)
+        self.summary = self.final_summary
+        return None
+
+    def close(self):
+        close = getattr(self.records, "close", None)
+        if close is not None:
+            close()
+        self.records = iter(())
+        self._held = None
+
+
+# ============= POOL =============
+class Worker:
+    def __init__(self, context):
+        self.executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        self.runs = 0
+
+
+class WorkerPool:
+    def __init__(self, size=config.WORKERS):
+        self.size = size
+        self.workers = []
+        self._run_ids = itertools.count(1)
+
+    @property
+    def running(self):
+        return bool(self.workers)
+
+    async def start(self, preload=config.PRELOAD):
+        """Spawn the workers and wait until each has imported the simulations.
+
+        Engines of the preload tasks are imported up front as well; without a
+        pool they are imported into this process instead.
+        """
+        if self.workers:
+            return
+        if self.size <= 0:
+            _warm(preload)
+            return
+        context = multiprocessing.get_context("spawn")
+        self.workers = [Worker(context) for _ in range(self.size)]
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(worker.executor, _warm, preload)
+                               for worker in self.workers))
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.executor.shutdown(wait=False, cancel_futures=True)
+        self.workers = []
+
+    def frames(self, factory):
+        """Frame source for factory(), on the least busy worker if the pool is running.
+
+        factory must be picklable (a module-level function or a
+        functools.partial of one) to be sent to a worker.
+        """
+        if not self.workers:
+            return LocalFrames(factory)
+        worker = min(self.workers, key=lambda w: w.runs)
+        return RemoteFrames(worker, next(self._run_ids), factory)
+
+    def stats(self):
+        return {
+            "workers": len(self.workers),
+            "runs": [worker.runs for worker in self.workers],
+        }
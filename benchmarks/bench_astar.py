@@ -0,0 +1,105 @@
+"""
+A* benchmark: the shared gridcore kernel against the tuple-keyed astar the
+warehouse, drone delivery and resource collection engines each carried.
+
+Runs the same random start/goal queries through both on 100x100 and
+1000x1000 grids, open (like those three engines' maps) and with 20%
+obstacles, and reports queries per second and cells expanded per query.
+Both must find paths of the same length.
+
+    python benchmarks/bench_astar.py [queries]
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gridcore import GridMap
+
+CASES = [(100, 0.0), (100, 0.2), (1000, 0.0), (1000, 0.2)]
+
+
+def legacy_astar(start, goal, grid, avoid=None):
+    """The engines' astar before the shared kernel, kept here for comparison"""
+    if avoid is None:
+        avoid = set()
+
+    def heuristic(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    frontier = [(0, start)]
+    came_from = {start: None}
+    cost = {start: 0}
+    legacy_astar.expanded = 0
+
+    while frontier:
+        _, current = heapq.heappop(frontier)
+
+        if current == goal:
+            break
+        legacy_astar.expanded += 1
+
+        for next_pos in grid.get_neighbors(current):
+            if next_pos in avoid:
+                continue
+
+            new_cost = cost[current] + 1
+            if next_pos not in cost or new_cost < cost[next_pos]:
+                cost[next_pos] = new_cost
+                priority = new_cost + heuristic(next_pos, goal)
+                heapq.heappush(frontier, (priority, next_pos))
+                came_from[next_pos] = current
+
+    if goal not in came_from:
+        return []
+
+    path = []
+    current = goal
+    while current:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
+
+
+def make_case(size, density, count):
+    rng = random.Random(size)
+    grid = GridMap(size)
+    grid.add_obstacles((rng.randrange(size), rng.randrange(size)) for _ in range(int(size * size * density)))
+    free = [(x, y) for y in range(size) for x in range(size) if grid.is_valid((x, y))]
+    return grid, [tuple(rng.sample(free, 2)) for _ in range(count)]
+
+
+def run(search, queries, expanded):
+    lengths = []
+    cells = 0
+    started = time.perf_counter()
+    for start, goal in queries:
+        lengths.append(len(search(start, goal)))
+        cells += expanded()
+    return len(queries) / (time.perf_counter() - started), cells / len(queries), lengths
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{'grid':>9} | {'obstacles':>9} | {'legacy q/s':>10} | {'expanded':>9} | "
+          f"{'kernel q/s':>10} | {'expanded':>9} | {'speedup':>7}")
+    print("-" * 84)
+    for size, density in CASES:
+        # Legacy searches on the large grid take seconds each: run fewer of them
+        queries = max(5, count // 10) if size >= 1000 else count
+        grid, pairs = make_case(size, density, queries)
+        grid.neighbors  # built once per map, outside the timing
+        old_rate, old_expanded, old_lengths = run(lambda start, goal: legacy_astar(start, goal, grid), pairs,
+                                                  lambda: legacy_astar.expanded)
+        new_rate, new_expanded, new_lengths = run(grid.find_path, pairs, lambda: grid.astar.expanded)
+        assert old_lengths == new_lengths, "paths of different lengths"
+        print(f"{size:>4}x{size:<4} | {density:>9.0%} | {old_rate:>10,.1f} | {old_expanded:>9,.0f} | "
+              f"{new_rate:>10,.1f} | {new_expanded:>9,.0f} | {new_rate / old_rate:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+BFS benchmark: the shared multi-target BFS (parent array) against the
+path-copying BFS of bfs_to_victim, bfs_to_fire and bfs_nearest_unexplored.
+
+On a 500x500 maze (a random spanning tree of corridors, so paths are long
+and winding) and an open 500x500 room (a wide frontier, each entry holding
+its own path) runs searches from a corner to the far corner and to the
+nearest of a few scattered targets, and reports time and peak memory
+(tracemalloc) per search. The kernel's scratch arrays, allocated once per
+grid, are reported separately; both searches must return the same path.
+
+    python benchmarks/bench_bfs.py [size]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gridcore import BFS, GridMap
+
+TARGET_COUNTS = [1, 20]
+
+
+def legacy_bfs(start, targets, grid, avoid=None):
+    """The engines' BFS before the shared kernel, kept here for comparison"""
+    if avoid is None:
+        avoid = set()
+
+    queue = deque([(start, [start])])
+    visited = {start}
+
+    while queue:
+        current, path = queue.popleft()
+
+        if current in targets:
+            return path
+
+        for next_pos in grid.get_neighbors(current):
+            if next_pos not in visited and next_pos not in avoid:
+                visited.add(next_pos)
+                queue.append((next_pos, path + [next_pos]))
+
+    return []
+
+
+def maze(size, rng):
+    """Maze with walls on every even row and column and the border, carved by a randomised depth-first search"""
+    grid = GridMap(size)
+    walls = {(x, y) for y in range(size) for x in range(size)
+             if x % 2 == 0 or y % 2 == 0 or x == size - 1 or y == size - 1}
+    stack = [(1, 1)]
+    carved = {(1, 1)}
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy) for dx, dy in ((0, 2), (2, 0), (0, -2), (-2, 0))
+                   if 0 < x + dx < size - 1 and 0 < y + dy < size - 1 and (x + dx, y + dy) not in carved]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        walls.discard(((x + nx) // 2, (y + ny) // 2))
+        carved.add((nx, ny))
+        stack.append((nx, ny))
+    grid.add_obstacles(walls)
+    return grid
+
+
+def measure(search):
+    """(result, seconds, peak bytes) of search(); timed without tracemalloc, which slows allocations"""
+    started = time.perf_counter()
+    search()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    result = search()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(1)
+    layouts = {"maze": maze(size, rng), "open": GridMap(size)}
+    print(f"{size}x{size} grids; kernel scratch arrays: "
+          f"{measure(lambda: BFS(layouts['open']))[2] / 2**20:.1f} MiB per grid")
+    print(f"{'layout':>6} | {'targets':>7} | {'path':>6} | {'legacy ms':>9} | {'peak MiB':>8} | "
+          f"{'kernel ms':>9} | {'peak MiB':>8} | {'memory':>6}")
+    print("-" * 86)
+    for name, grid in layouts.items():
+        free = [(x, y) for y in range(size) for x in range(size) if grid.is_valid((x, y))]
+        start = min(free)
+        far = max(free, key=lambda pos: pos[0] + pos[1])
+        grid.neighbors  # built once per map, outside the measurements
+        grid.bfs.search(0, ())  # allocate the scratch arrays before measuring
+        for count in TARGET_COUNTS:
+            targets = {far} if count == 1 else set(rng.sample(free, count))
+            old, old_seconds, old_peak = measure(lambda: legacy_bfs(start, targets, grid))
+            new, new_seconds, new_peak = measure(lambda: grid.find_nearest(start, targets))
+            assert old == new, "different paths"
+            print(f"{name:>6} | {count:>7} | {len(new):>6} | {old_seconds * 1000:>9,.0f} | {old_peak / 2**20:>8.1f} | "
+                  f"{new_seconds * 1000:>9,.0f} | {new_peak / 2**20:>8.2f} | {old_peak / new_peak:>5.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cleaning simulation benchmark: per-tick cost of the backend cleaning engine.
+
+Compares the original tick, which rescans the whole grid for every candidate
+move and every occupancy check, with the incremental engine in
+backend/simulations.py at several grid sizes and agent counts. The legacy
+tick is only sampled for a few ticks on large grids; the incremental engine
+is also run to completion to show the cost over a whole run.
+
+    python benchmarks/bench_cleaning.py [ticks]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from simulations import _spawn_points, cleaning_frames
+
+CASES = [(20, 4), (100, 16), (500, 32), (500, 64)]
+FPS = 10
+LEGACY_TICKS = 3
+
+
+def legacy_tick(grid, agents):
+    """One tick of the original engine, kept here for comparison"""
+    size = len(grid)
+    for agent in agents:
+        grid[agent["y"]][agent["x"]] = 0
+    for agent in agents:
+        best_move = None
+        min_dist = float('inf')
+        for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
+            nx, ny = agent["x"] + dx, agent["y"] + dy
+            if 0 <= nx < size and 0 <= ny < size:
+                occupied = any(a["x"] == nx and a["y"] == ny and a["id"] != agent["id"] for a in agents)
+                if not occupied:
+                    dist = sum(1 for row in grid for cell in row if cell == 1)
+                    if dist < min_dist:
+                        min_dist = dist
+                        best_move = (nx, ny)
+        if best_move:
+            agent["x"], agent["y"] = best_move
+    all(cell == 0 for row in grid for cell in row)
+    sum(1 for row in grid for cell in row if cell == 0)
+
+
+def measure_legacy(size, agent_count, ticks):
+    grid = [[1] * size for _ in range(size)]
+    agents = [{"id": i + 1, "x": x, "y": y} for i, (x, y) in enumerate(_spawn_points(size, agent_count))]
+    started = time.perf_counter()
+    for _ in range(ticks):
+        legacy_tick(grid, agents)
+    return (time.perf_counter() - started) / ticks
+
+
+def measure_incremental(size, agent_count, ticks):
+    """Mean seconds per tick over the first ticks, plus (steps, seconds) for the full run"""
+    frames = cleaning_frames(size, agent_count)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        next(frames)
+    per_tick = (time.perf_counter() - started) / ticks
+    try:
+        while True:
+            next(frames)
+    except StopIteration as done:
+        steps = done.value["steps"]
+    return per_tick, steps, time.perf_counter() - started
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"frame budget at {FPS} fps: {1000 / FPS:.0f} ms/tick")
+    print(f"{'grid':>9} | {'agents':>6} | {'legacy ms/tick':>14} | {'incremental ms/tick':>19} | "
+          f"{'run steps':>9} | {'run ms/tick':>11}")
+    print("-" * 85)
+    for size, agent_count in CASES:
+        legacy = measure_legacy(size, agent_count, LEGACY_TICKS)
+        per_tick, steps, run_time = measure_incremental(size, agent_count, ticks)
+        print(f"{size:>4}x{size:<4} | {agent_count:>6} | {legacy * 1000:>14.1f} | {per_tick * 1000:>19.3f} | "
+              f"{steps:>9,} | {run_time / steps * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
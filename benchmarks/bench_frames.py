@@ -0,0 +1,97 @@
+"""
+Frame protocol benchmark: full JSON updates vs keyframe + delta frames,
+in both the JSON and the binary encoding.
+
+Replays a cleaning-style workload (four agents sweeping a dirty grid, one
+cell cleaned per agent per tick) at several grid sizes and reports bytes per
+second at the cleaning simulation's 10 fps, plus the time spent building
+and serialising each frame.
+
+    python benchmarks/bench_frames.py [ticks]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from frames import KEYFRAME_INTERVAL, FrameStream, encode_binary
+
+SIZES = [20, 200, 1000]
+FPS = 10
+
+
+def sweeping_states(size, ticks):
+    """Four agents sweeping boustrophedon lanes from the corners"""
+    grid = [[1] * size for _ in range(size)]
+    agents = [
+        {"id": 1, "x": 0, "y": 0, "color": "agent1"},
+        {"id": 2, "x": size - 1, "y": 0, "color": "agent2"},
+        {"id": 3, "x": 0, "y": size - 1, "color": "agent3"},
+        {"id": 4, "x": size - 1, "y": size - 1, "color": "agent4"},
+    ]
+    directions = {1: 1, 2: -1, 3: 1, 4: -1}
+    cleaned = 0
+    for step in range(1, ticks + 1):
+        for agent in agents:
+            if grid[agent["y"]][agent["x"]]:
+                grid[agent["y"]][agent["x"]] = 0
+                cleaned += 1
+            nx = agent["x"] + directions[agent["id"]]
+            if 0 <= nx < size:
+                agent["x"] = nx
+            else:
+                directions[agent["id"]] *= -1
+                agent["y"] = (agent["y"] + (1 if agent["id"] <= 2 else -1)) % size
+        yield {
+            "step": step,
+            "agents": agents,
+            "grid": grid,
+            "progress": round(cleaned / (size * size) * 100, 1),
+        }
+
+
+def measure_full(size, ticks):
+    total_bytes = 0
+    started = time.perf_counter()
+    for state in sweeping_states(size, ticks):
+        total_bytes += len(json.dumps({"type": "update", **state}).encode())
+    return total_bytes, time.perf_counter() - started
+
+
+def measure_delta(size, ticks, binary=False):
+    stream = FrameStream()
+    total_bytes = 0
+    since_keyframe = 0
+    started = time.perf_counter()
+    for state in sweeping_states(size, ticks):
+        delta = stream.update(state)
+        since_keyframe += 1
+        if delta is None or since_keyframe >= KEYFRAME_INTERVAL:
+            since_keyframe = 0
+            delta = stream.keyframe()
+        if binary:
+            total_bytes += len(encode_binary(delta, stream.shape))
+        else:
+            total_bytes += len(json.dumps(delta).encode())
+    return total_bytes, time.perf_counter() - started
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{ticks} ticks at {FPS} fps, keyframe every {KEYFRAME_INTERVAL} frames")
+    print(f"{'grid':>11} | {'full JSON B/s':>14} | {'delta B/s':>12} | {'binary B/s':>12} | "
+          f"{'full ms/frame':>13} | {'delta ms/frame':>14} | {'binary ms/frame':>15}")
+    print("-" * 114)
+    for size in SIZES:
+        full_bytes, full_time = measure_full(size, ticks)
+        delta_bytes, delta_time = measure_delta(size, ticks)
+        binary_bytes, binary_time = measure_delta(size, ticks, binary=True)
+        print(f"{size:>5}x{size:<5} | {full_bytes / ticks * FPS:>14,.0f} | {delta_bytes / ticks * FPS:>12,.0f} | "
+              f"{binary_bytes / ticks * FPS:>12,.0f} | {full_time / ticks * 1000:>13.2f} | "
+              f"{delta_time / ticks * 1000:>14.2f} | {binary_time / ticks * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
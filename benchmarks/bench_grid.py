@@ -0,0 +1,140 @@
+"""
+Grid core benchmark: the shared gridcore.GridMap against the tuple-set grid
+every engine used to copy.
+
+On a 1000x1000 grid with 30% obstacles and a second layer on every free
+cell (dirt, fire, ...), reports the memory of both layers (tracemalloc) and
+the throughput of the per-cell queries the engines make (is_valid,
+get_neighbors, and the neighbour table rows searches iterate instead), the
+vectorised queries over every cell at once, and drawing a frame state. The
+neighbour table's build time and the cost of an obstacle change follow.
+
+    python benchmarks/bench_grid.py [size]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gridcore import GridMap
+
+OBSTACLE_DENSITY = 0.3
+QUERIES = 200_000
+
+
+class LegacyGrid:
+    """The engines' grid before gridcore, kept here for comparison"""
+
+    def __init__(self, size):
+        self.size = size
+        self.obstacles = set()
+        self.dirt = set()
+
+    def add_obstacles(self, obstacle_list):
+        self.obstacles = set(obstacle_list)
+
+    def is_valid(self, pos):
+        x, y = pos
+        return (0 <= x < self.size and 0 <= y < self.size and
+                pos not in self.obstacles)
+
+    def get_neighbors(self, pos):
+        x, y = pos
+        neighbors = []
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            new_pos = (nx, ny)
+            if self.is_valid(new_pos):
+                neighbors.append(new_pos)
+        return neighbors
+
+    def draw(self):
+        return [[2 if (x, y) in self.obstacles else 1 if (x, y) in self.dirt else 0
+                 for x in range(self.size)] for y in range(self.size)]
+
+
+def build(grid_class, size, obstacles):
+    """(grid, bytes allocated for its obstacle and dirt layers)"""
+    tracemalloc.start()
+    grid = grid_class(size)
+    grid.add_obstacles(obstacles)
+    dirt = grid.dirt if isinstance(grid, LegacyGrid) else grid.layer("dirt")
+    dirt.update((x, y) for y in range(size) for x in range(size) if grid.is_valid((x, y)))
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return grid, used
+
+
+def rate(function, count):
+    started = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(1)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    obstacles = rng.sample(cells, int(len(cells) * OBSTACLE_DENSITY))
+    probes = [(rng.randrange(-1, size + 1), rng.randrange(-1, size + 1)) for _ in range(QUERIES)]
+    del cells
+
+    legacy, legacy_bytes = build(LegacyGrid, size, obstacles)
+    grid, grid_bytes = build(GridMap, size, obstacles)
+    dirt = grid.layer("dirt")
+    assert [legacy.get_neighbors(pos) for pos in probes[:1000]] == [grid.get_neighbors(pos) for pos in probes[:1000]]
+
+    print(f"{size}x{size} grid, {len(obstacles)} obstacles, {len(dirt)} dirty cells")
+    print(f"{'measure':>26} | {'tuple sets':>12} | {'gridcore':>12} | {'ratio':>6}")
+    print("-" * 68)
+
+    def row(label, old, new, unit, higher_is_better=True):
+        ratio = new / old if higher_is_better else old / new
+        print(f"{label:>26} | {old:>12,.0f} | {new:>12,.0f} | {ratio:>5.1f}x  {unit}")
+
+    row("layer memory", legacy_bytes / 1024, grid_bytes / 1024, "KiB", higher_is_better=False)
+    row("is_valid", rate(lambda: [legacy.is_valid(pos) for pos in probes], QUERIES),
+        rate(lambda: [grid.is_valid(pos) for pos in probes], QUERIES), "queries/s")
+    row("get_neighbors", rate(lambda: [legacy.get_neighbors(pos) for pos in probes], QUERIES),
+        rate(lambda: [grid.get_neighbors(pos) for pos in probes], QUERIES), "queries/s")
+    started = time.perf_counter()
+    table = grid.neighbors
+    build_seconds = time.perf_counter() - started
+    inside = [pos for pos in probes if grid.in_bounds(pos)]
+    cells = [grid.cell_id(pos) for pos in inside]
+    indices, offsets, ends = table.indices, table.offsets, table.ends
+    row("neighbour table rows", rate(lambda: [legacy.get_neighbors(pos) for pos in inside], len(inside)),
+        rate(lambda: [indices[offsets[cell]:ends[cell]] for cell in cells], len(cells)), "queries/s")
+
+    # Every cell at once: the legacy grid can only loop
+    count = size * size
+    ids = grid.free().ravel().nonzero()[0]
+    xs, ys = ids % size, ids // size
+    row("valid, all free cells",
+        rate(lambda: [legacy.is_valid(pos) for pos in zip(xs.tolist(), ys.tolist())], len(ids)),
+        rate(lambda: grid.valid(xs, ys), len(ids)), "cells/s")
+    row("neighbours, all free cells",
+        rate(lambda: [legacy.get_neighbors(pos) for pos in zip(xs.tolist(), ys.tolist())], len(ids)),
+        rate(lambda: grid.neighbor_ids(ids), len(ids)), "cells/s")
+    row("draw state", rate(legacy.draw, count),
+        rate(lambda: grid.draw((dirt, 1), (grid.obstacles, 2)), count), "cells/s")
+
+    toggles = inside[:QUERIES // 10]
+
+    def toggle_obstacles():
+        for pos in toggles:
+            if pos in grid.obstacles:
+                grid.obstacles.discard(pos)
+            else:
+                grid.obstacles.add(pos)
+
+    print(f"\nneighbour table: built in {build_seconds * 1000:.0f} ms, "
+          f"{(len(table.indices) + len(table.offsets) + len(table.ends)) * table.indices.itemsize / 2**20:.1f} MiB, "
+          f"{rate(toggle_obstacles, len(toggles)):,.0f} obstacle changes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Event loop lag benchmark: simulation ticks on the event loop vs in worker
+processes.
+
+Runs 20 concurrent sessions of a large cleaning simulation for a few
+seconds, once with every tick on the event loop (SIM_WORKERS=0) and once
+with the worker pool, and reports how late the loop wakes up (what every
+other WebSocket and HTTP request would wait for) plus the ticks delivered.
+
+    python benchmarks/bench_loop_lag.py [seconds] [sessions]
+"""
+import asyncio
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import config
+from monitor import LoopLagMonitor
+from sessions import SessionRegistry
+from simulations import cleaning_frames
+from workers import WorkerPool
+
+GRID_SIZE = 300
+AGENTS = 32
+INTERVAL = 0.1
+
+
+class SinkConnection:
+    """Stands in for a viewer; counts what it is sent"""
+
+    def __init__(self):
+        self.encoding = "json"
+        self.queue_size = 32
+        self.depth = 0
+        self.needs_keyframe = True
+        self.closed = False
+        self.frames = 0
+        self.bytes = 0
+
+    def send_frame(self, data, kind):
+        self.needs_keyframe = False
+        self.frames += 1
+        self.bytes += len(data)
+
+    def send_json(self, message):
+        pass
+
+
+async def measure(workers, seconds, sessions):
+    pool = WorkerPool(workers)
+    started = time.perf_counter()
+    await pool.start()
+    warm_up = time.perf_counter() - started
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    registry = SessionRegistry()
+    factory = partial(cleaning_frames, GRID_SIZE, AGENTS)
+    connections = []
+    for _ in range(sessions):
+        connection = SinkConnection()
+        connections.append(connection)
+        registry.start("task2", connection, (pool.frames(factory), INTERVAL, ()))
+    await asyncio.sleep(seconds)
+    lag = monitor.stats()
+    monitor.stop()
+    for session in list(registry.sessions.values()):
+        await session.stop()
+    pool.shutdown()
+    return lag, sum(c.frames for c in connections) / seconds, warm_up
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{sessions} sessions of {GRID_SIZE}x{GRID_SIZE} cleaning with {AGENTS} agents "
+          f"at {1 / INTERVAL:.0f} fps for {seconds:.0f} s, {config.WORKERS} cores available")
+    print(f"{'mode':>18} | {'mean lag ms':>11} | {'p99 lag ms':>10} | {'max lag ms':>10} | "
+          f"{'frames/s':>8} | {'warm-up s':>9}")
+    print("-" * 82)
+    for label, workers in [("event loop", 0), (f"{config.WORKERS} worker(s)", config.WORKERS)]:
+        lag, fps, warm_up = asyncio.run(measure(workers, seconds, sessions))
+        print(f"{label:>18} | {lag['mean_ms']:>11.2f} | {lag['p99_ms']:>10.2f} | {lag['max_ms']:>10.2f} | "
+              f"{fps:>8.0f} | {warm_up:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold start benchmark: server import time and time to each task's first frame.
+
+Every measurement runs in a fresh interpreter under python -X importtime, so
+nothing is cached in memory (bytecode caches on disk are used, as on a real
+restart). Reports the median of a few runs against the budgets below and
+exits with status 1 when one is exceeded, or when the server process ends up
+importing a task engine or matplotlib.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+sys.path.insert(0, BACKEND)
+
+from simulations import SIMULATIONS
+
+# Budgets in milliseconds
+SERVER_IMPORT_BUDGET_MS = 500  # import main, framework included
+BACKEND_IMPORT_BUDGET_MS = 30  # the backend's own modules
+FIRST_FRAME_BUDGET_MS = 150    # import the simulations, start a run, produce its first state (numpy included)
+
+SERVER = """
+import sys
+import main
+print([name for name in sys.modules if name.startswith("task") or name.split(".")[0] == "matplotlib"])
+"""
+
+FIRST_FRAME = """
+import time
+started = time.perf_counter()
+from simulations import get_simulation
+factory, _ = get_simulation({task_id!r})
+next(factory(seed=1))
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def run(code):
+    """(stdout, import records) of code in a fresh interpreter.
+
+    Records are (module, self ms, cumulative ms) in -X importtime order.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND,
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        own, cumulative, name = fields
+        imports.append((name.strip(), int(own) / 1000, int(cumulative) / 1000))
+    return result.stdout.strip(), imports
+
+
+def server_import(imports):
+    """(total ms, ms spent in the backend's own module bodies) for import main"""
+    ours = {name[:-len(".py")] for name in os.listdir(BACKEND) if name.endswith(".py")}
+    total = next(cumulative for name, _, cumulative in imports if name == "main")
+    backend = sum(own for name, own, _ in imports if name in ours)
+    return total, backend
+
+
+def check(label, value, budget):
+    ok = value <= budget
+    print(f"{label:>28} | {value:>8.1f} | {budget:>9} | {'ok' if ok else 'OVER'}")
+    return ok
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"median of {runs} cold runs")
+    print(f"{'measure':>28} | {'ms':>8} | {'budget ms':>9} |")
+    print("-" * 56)
+
+    totals, backend = [], []
+    for _ in range(runs):
+        loaded, imports = run(SERVER)
+        total, own = server_import(imports)
+        totals.append(total)
+        backend.append(own)
+    ok = check("server import", statistics.median(totals), SERVER_IMPORT_BUDGET_MS)
+    ok &= check("  of which backend modules", statistics.median(backend), BACKEND_IMPORT_BUDGET_MS)
+    if loaded != "[]":
+        print(f"server process imported {loaded}")
+        ok = False
+
+    for task_id in SIMULATIONS:
+        times = [float(run(FIRST_FRAME.format(task_id=task_id))[0]) for _ in range(runs)]
+        ok &= check(f"{task_id} first frame", statistics.median(times), FIRST_FRAME_BUDGET_MS)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-const API_URL = 'http://localhost:8000';
+// Same origin when the API server serves the dashboard (/app/), else the default port
+const API_URL = location.protocol.startsWith('http') ? location.origin : 'http://localhost:8000';
 
 function openTask(taskId) {
     // Map task IDs to their HTML files
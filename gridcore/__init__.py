@@ -0,0 +1,27 @@
+"""
+Shared grid core for the task engines.
+
+    from gridcore import GridMap
+
+    class MazeGrid(GridMap):
+        def __init__(self, size=14):
+            super().__init__(size)
+            self.walls = self.obstacles
+
+GridMap provides is_valid/get_neighbors over an obstacle layer, named
+layers (dirt, fire, paint, explored, ...) that behave like sets of (x, y)
+cells, and vectorised queries over whole arrays of cells (see grid.py).
+grid.neighbors is its NeighborTable, the CSR neighbour lists over cell ids
+that searches iterate (see neighbors.py); grid.find_path() runs the
+shared A* over it (see astar.py) and grid.find_nearest() the multi-target
+BFS (see bfs.py).
+
+The engines are run as scripts from their own folders, so each one puts the
+repository root on sys.path before importing this package.
+"""
+from gridcore.astar import AStar
+from gridcore.bfs import BFS
+from gridcore.grid import GridMap, Layer
+from gridcore.neighbors import MOVES, NeighborTable
+
+__all__ = ["MOVES", "AStar", "BFS", "GridMap", "Layer", "NeighborTable"]
@@ -0,0 +1,70 @@
+"""
+A* on cell ids, over a grid's neighbour table.
+
+Besides the parents and reach stamps of every Search (see search.py), A*
+keeps a g-score and a closed stamp per cell, all reused across searches.
+
+Ties are broken deterministically: among equal f = g + h the cell closest
+to the goal (lowest h) is expanded first, then the lowest cell id. Entries
+made stale by a cheaper path are skipped when popped (lazy deletion), and
+closed cells are never expanded twice; the Manhattan heuristic is
+consistent on a 4-connected grid, so the first path to the goal is a
+shortest one.
+"""
+import heapq
+from array import array
+
+from gridcore.search import Search
+
+
+class AStar(Search):
+    def __init__(self, grid):
+        super().__init__(grid)
+        cells = grid.size * grid.size
+        self.g = array("i", [0]) * cells
+        self.closed = array("I", [0]) * cells  # generation of the last search to expand the cell
+        self.stamps.append(self.closed)
+        self.expanded = 0  # cells expanded by the last search
+
+    def search(self, start, goal, avoid=()):
+        """Cell ids of a shortest path from start to goal, both included; [] if there is none.
+
+        avoid holds cell ids that may not be entered.
+        """
+        generation = self._next_generation()
+        size = self.grid.size
+        table = self.grid.neighbors
+        indices, offsets, ends = table.indices, table.offsets, table.ends
+        g, parent, reached, closed = self.g, self.parent, self.reached, self.closed
+        goal_x, goal_y = goal % size, goal // size
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        g[start] = 0
+        parent[start] = -1
+        reached[start] = generation
+        remaining = abs(start % size - goal_x) + abs(start // size - goal_y)
+        frontier = [(remaining, remaining, start)]
+        expanded = 0
+        while frontier:
+            _, _, current = heappop(frontier)
+            if closed[current] == generation:
+                continue  # stale entry
+            if current == goal:
+                break
+            closed[current] = generation
+            expanded += 1
+            cost = g[current] + 1
+            for neighbor in indices[offsets[current]:ends[current]]:
+                if closed[neighbor] == generation or neighbor in avoid:
+                    continue
+                if reached[neighbor] != generation or cost < g[neighbor]:
+                    reached[neighbor] = generation
+                    g[neighbor] = cost
+                    parent[neighbor] = current
+                    remaining = abs(neighbor % size - goal_x) + abs(neighbor // size - goal_y)
+                    heappush(frontier, (cost + remaining, remaining, neighbor))
+        else:
+            self.expanded = expanded
+            return []
+        self.expanded = expanded
+        return self._path(goal)
@@ -0,0 +1,54 @@
+"""
+Multi-target breadth-first search on cell ids, over a grid's neighbour table.
+
+The queue is an array of cell ids and each reached cell only records its
+parent (see search.py), so a search holds a few bytes per reached cell
+instead of a copy of the path to every queued one. It stops at the first
+target it reaches and rebuilds only that path.
+
+Cells are queued in neighbour-table (MOVES) order, so the target found is
+the same one a FIFO search checking cells as they leave the queue would
+return; checking them as they are reached just stops a level earlier.
+"""
+from array import array
+
+from gridcore.search import Search
+
+
+class BFS(Search):
+    def __init__(self, grid):
+        super().__init__(grid)
+        self.visited = 0  # cells reached by the last search
+
+    def search(self, start, targets, avoid=(), include_start=True):
+        """Cell ids of a shortest path from start to the nearest cell in targets; [] if none is reachable.
+
+        targets and avoid hold cell ids; cells in avoid may not be entered.
+        With include_start=False a start cell in targets does not count.
+        """
+        generation = self._next_generation()
+        if include_start and start in targets:
+            self.visited = 1
+            return [start]
+        table = self.grid.neighbors
+        indices, offsets, ends = table.indices, table.offsets, table.ends
+        parent, reached = self.parent, self.reached
+
+        parent[start] = -1
+        reached[start] = generation
+        queue = array("i", [start])
+        head = 0
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            for neighbor in indices[offsets[current]:ends[current]]:
+                if reached[neighbor] == generation or neighbor in avoid:
+                    continue
+                reached[neighbor] = generation
+                parent[neighbor] = current
+                if neighbor in targets:
+                    self.visited = len(queue) + 1
+                    return self._path(neighbor)
+                queue.append(neighbor)
+        self.visited = len(queue)
+        return []
@@ -0,0 +1,256 @@
+"""
+Grid maps backed by uint8 cell arrays.
+
+Every layer is one byte per cell in a bytearray, viewed as a (size, size)
+NumPy array indexed [y, x]. Single cells are read and written through the
+bytearray (as fast as a set lookup, without a tuple per cell); whole-grid
+work (drawing states, masks, bulk validity and neighbour queries) goes
+through the array view without copying.
+
+Cells are addressed as (x, y) tuples, like the engines always have, or as
+integer cell ids y * size + x.
+"""
+from collections.abc import MutableSet
+
+import numpy as np
+
+from gridcore.astar import AStar
+from gridcore.bfs import BFS
+from gridcore.neighbors import MOVES, NeighborTable
+
+
+class Layer(MutableSet):
+    """A named set of cells, with a uint8 value (1-255) per cell in the set.
+
+    Behaves like the set of (x, y) tuples it replaces: in, len, iteration
+    (row-major), add/discard/remove and the set operators, which return
+    plain sets. Watchers are called with the cell id of every cell that
+    enters or leaves the layer, and with None when it is cleared.
+    """
+
+    def __init__(self, size, name):
+        self.size = size
+        self.name = name
+        self.cells = bytearray(size * size)
+        self.array = np.frombuffer(self.cells, dtype=np.uint8).reshape(size, size)
+        self.watchers = []
+        self._count = 0
+
+    @classmethod
+    def _from_iterable(cls, cells):
+        return set(cells)
+
+    def __contains__(self, pos):
+        x, y = pos
+        size = self.size
+        return 0 <= x < size and 0 <= y < size and self.cells[y * size + x] != 0
+
+    def __iter__(self):
+        ys, xs = np.nonzero(self.array)
+        return zip(xs.tolist(), ys.tolist())
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return f"<Layer {self.name!r}: {self._count} of {self.size}x{self.size} cells>"
+
+    def add(self, pos, value=1):
+        """Add pos, or change its value; IndexError if pos is outside the grid"""
+        if not 0 < value < 256:
+            raise ValueError(f"{self.name} values must be between 1 and 255")
+        x, y = pos
+        size = self.size
+        if not (0 <= x < size and 0 <= y < size):
+            # y * size + x would silently land on another cell
+            raise IndexError(f"{pos} is outside the {size}x{size} {self.name} layer")
+        cell = y * size + x
+        if self.cells[cell]:
+            self.cells[cell] = value
+            return
+        self.cells[cell] = value
+        self._count += 1
+        for watcher in self.watchers:
+            watcher(cell)
+
+    def discard(self, pos):
+        if pos in self:
+            x, y = pos
+            cell = y * self.size + x
+            self.cells[cell] = 0
+            self._count -= 1
+            for watcher in self.watchers:
+                watcher(cell)
+
+    def update(self, cells):
+        for pos in cells:
+            self.add(pos)
+
+    def clear(self):
+        self.array[:] = 0
+        self._count = 0
+        for watcher in self.watchers:
+            watcher(None)
+
+    def get(self, pos, default=0):
+        """Value at pos, or default for cells outside the layer"""
+        if pos not in self:
+            return default
+        return self.cells[pos[1] * self.size + pos[0]]
+
+    def items(self):
+        """((x, y), value) for every cell in the layer, row-major"""
+        ys, xs = np.nonzero(self.array)
+        return zip(zip(xs.tolist(), ys.tolist()), self.array[ys, xs].tolist())
+
+    def ids(self):
+        """Cell ids of the layer, ascending"""
+        return np.flatnonzero(self.array)
+
+
+class GridMap:
+    """Square grid with an obstacle layer and any number of named layers"""
+
+    def __init__(self, size):
+        self.size = size
+        self.layers = {}
+        self.obstacles = self.layer("obstacles")
+        self.obstacles.watchers.append(self._obstacle_changed)
+        self._neighbors = None
+        self._astar = None
+        self._bfs = None
+
+    @property
+    def neighbors(self):
+        """NeighborTable of the grid, built on first use and kept up to date with the obstacles"""
+        if self._neighbors is None:
+            self._neighbors = NeighborTable(self)
+        return self._neighbors
+
+    @property
+    def astar(self):
+        """AStar search over the neighbour table, its arrays allocated on first use"""
+        if self._astar is None:
+            self._astar = AStar(self)
+        return self._astar
+
+    def find_path(self, start, goal, avoid=None):
+        """Shortest path from start to goal as (x, y) positions, both included; [] if there is none.
+
+        avoid holds positions that may not be entered.
+        """
+        blocked = {self.cell_id(pos) for pos in avoid if self.in_bounds(pos)} if avoid else ()
+        path = self.astar.search(self.cell_id(start), self.cell_id(goal), blocked)
+        return [(cell % self.size, cell // self.size) for cell in path]
+
+    @property
+    def bfs(self):
+        """BFS search over the neighbour table, its arrays allocated on first use"""
+        if self._bfs is None:
+            self._bfs = BFS(self)
+        return self._bfs
+
+    def find_nearest(self, start, targets, avoid=None, include_start=True):
+        """Shortest path from start to the nearest of targets as (x, y) positions; [] if none is reachable.
+
+        targets is a Layer or any collection of positions; avoid holds
+        positions that may not be entered.
+        """
+        if isinstance(targets, Layer):
+            goals = set(targets.ids().tolist())
+        else:
+            goals = {self.cell_id(pos) for pos in targets if self.in_bounds(pos)}
+        blocked = {self.cell_id(pos) for pos in avoid if self.in_bounds(pos)} if avoid else ()
+        path = self.bfs.search(self.cell_id(start), goals, blocked, include_start)
+        return [(cell % self.size, cell // self.size) for cell in path]
+
+    def _obstacle_changed(self, cell):
+        if self._neighbors is None:
+            return
+        if cell is None:
+            self._neighbors = None  # rebuilt when next needed
+        else:
+            self._neighbors.refresh(cell)
+
+    def layer(self, name):
+        """The layer called name, created empty on first use"""
+        if name not in self.layers:
+            self.layers[name] = Layer(self.size, name)
+        return self.layers[name]
+
+    def add_obstacles(self, obstacle_list):
+        """Replace the obstacles"""
+        self.obstacles.clear()
+        self.obstacles.update(obstacle_list)
+
+    # ============= CELLS =============
+    def cell_id(self, pos):
+        return pos[1] * self.size + pos[0]
+
+    def cell_pos(self, cell):
+        return cell % self.size, cell // self.size
+
+    def in_bounds(self, pos):
+        x, y = pos
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def is_valid(self, pos):
+        """Inside the grid and not an obstacle"""
+        x, y = pos
+        size = self.size
+        return 0 <= x < size and 0 <= y < size and not self.obstacles.cells[y * size + x]
+
+    def get_neighbors(self, pos):
+        """Valid 4-neighbours of pos, in MOVES order"""
+        x, y = pos
+        size = self.size
+        blocked = self.obstacles.cells
+        neighbors = []
+        for dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size and not blocked[ny * size + nx]:
+                neighbors.append((nx, ny))
+        return neighbors
+
+    # ============= VECTORISED =============
+    def free(self):
+        """bool array [y, x] of the cells that are not obstacles"""
+        return self.obstacles.array == 0
+
+    def valid(self, xs, ys):
+        """is_valid() for arrays of coordinates at once"""
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        inside = (xs >= 0) & (xs < self.size) & (ys >= 0) & (ys < self.size)
+        valid = inside.copy()
+        valid[inside] = self.obstacles.array[ys[inside], xs[inside]] == 0
+        return valid
+
+    def neighbor_ids(self, cells):
+        """(len(cells), 4) array of the valid neighbours' cell ids in MOVES order, -1 where there is none"""
+        cells = np.asarray(cells)
+        xs, ys = cells % self.size, cells // self.size
+        neighbors = np.full((len(cells), len(MOVES)), -1, dtype=np.int64)
+        for index, (dx, dy) in enumerate(MOVES):
+            nx, ny = xs + dx, ys + dy
+            valid = self.valid(nx, ny)
+            neighbors[valid, index] = ny[valid] * self.size + nx[valid]
+        return neighbors
+
+    def draw(self, *layers):
+        """Cell codes as nested lists of rows, for frame states.
+
+        layers are (cells, code) pairs drawn in order, later ones on top:
+        cells is a Layer or any iterable of (x, y), and code an int or, for
+        a Layer, a (size, size) array of per-cell codes.
+        """
+        codes = np.zeros((self.size, self.size), dtype=np.uint8)
+        for cells, code in layers:
+            if isinstance(cells, Layer):
+                mask = cells.array != 0
+                codes[mask] = code[mask] if isinstance(code, np.ndarray) else code
+                continue
+            points = list(cells)
+            if points:
+                xs, ys = zip(*points)
+                codes[list(ys), list(xs)] = code
+        return codes.tolist()
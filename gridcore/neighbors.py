@@ -0,0 +1,80 @@
+"""
+Neighbour tables: the valid 4-neighbours of every cell, precomputed.
+
+The table is CSR (compressed sparse row) over cell ids: the neighbours of
+cell c are indices[offsets[c]:ends[c]], in MOVES order. Searches iterate
+those slices instead of calling get_neighbors(), so an expansion no longer
+allocates a list of tuples or re-checks bounds and obstacles.
+
+Each row has room for all of its cell's in-bounds neighbours (4, or fewer
+on the border), which never changes; the valid ones are packed at the start
+of the row and ends[c] marks where they stop. When an obstacle is added or
+removed only the rows of the cells around it are rewritten, in place.
+"""
+from array import array
+
+import numpy as np
+
+# Neighbour order of get_neighbors(), of the table rows, and of every search built on them
+MOVES = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+
+class NeighborTable:
+    def __init__(self, grid):
+        self.grid = grid
+        self.build()
+
+    def build(self):
+        """Fill the whole table from the grid's obstacles"""
+        size = self.grid.size
+        cells = np.arange(size * size)
+        xs, ys = cells % size, cells // size
+        inside = np.stack([(xs + dx >= 0) & (xs + dx < size) & (ys + dy >= 0) & (ys + dy < size)
+                           for dx, dy in MOVES], axis=1)
+        # Valid neighbours first, in MOVES order, then padding up to the row's capacity
+        neighbors = self.grid.neighbor_ids(cells)
+        valid = neighbors >= 0
+        packed = np.full(neighbors.shape, -1, dtype=np.int64)
+        rows, _ = np.nonzero(valid)
+        packed[rows, np.cumsum(valid, axis=1)[valid] - 1] = neighbors[valid]
+        slots = np.arange(len(MOVES)) < inside.sum(axis=1, keepdims=True)
+        offsets = np.zeros(size * size + 1, dtype=np.int32)
+        np.cumsum(slots.sum(axis=1), out=offsets[1:])
+        self.indices = _int_array(packed[slots])
+        self.offsets = _int_array(offsets)
+        self.ends = _int_array(offsets[:-1] + valid.sum(axis=1))
+
+    def __getitem__(self, cell):
+        """Cell ids of the valid neighbours of cell"""
+        return self.indices[self.offsets[cell]:self.ends[cell]]
+
+    def __len__(self):
+        return len(self.ends)
+
+    def refresh(self, cell):
+        """Rewrite the rows around cell after its obstacle was added or removed"""
+        size = self.grid.size
+        x, y = cell % size, cell // size
+        for dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size:
+                self._fill_row(ny * size + nx)
+
+    def _fill_row(self, cell):
+        size = self.grid.size
+        blocked = self.grid.obstacles.cells
+        x, y = cell % size, cell // size
+        end = self.offsets[cell]
+        for dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size and not blocked[ny * size + nx]:
+                self.indices[end] = ny * size + nx
+                end += 1
+        self.ends[cell] = end
+
+
+def _int_array(values):
+    """array('i') with the values of a NumPy array"""
+    table = array("i")
+    table.frombytes(np.ascontiguousarray(values, dtype=np.intc).tobytes())
+    return table
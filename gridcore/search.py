@@ -0,0 +1,41 @@
+"""
+Reusable state for searches on cell ids.
+
+The state lives in flat arrays with one slot per cell (parent, and the
+generation that last reached the cell), allocated once per grid and reused
+by every search. A new search bumps the generation instead of clearing
+them: a slot whose stamp is not the current generation counts as never
+reached.
+"""
+from array import array
+
+# Generations are stored as uint32; the stamps are cleared when they wrap
+_LAST_GENERATION = 2**32 - 1
+
+
+class Search:
+    def __init__(self, grid):
+        self.grid = grid
+        cells = grid.size * grid.size
+        self.parent = array("i", [0]) * cells
+        self.reached = array("I", [0]) * cells  # generation of the last search to reach the cell
+        self.stamps = [self.reached]  # every generation-stamped array
+        self.generation = 0
+
+    def _next_generation(self):
+        if self.generation == _LAST_GENERATION:
+            for stamps in self.stamps:
+                stamps[:] = array("I", [0]) * len(stamps)
+            self.generation = 0
+        self.generation += 1
+        return self.generation
+
+    def _path(self, cell):
+        """Cell ids from the search's start to cell, following the parents"""
+        parent = self.parent
+        path = []
+        while cell != -1:
+            path.append(cell)
+            cell = parent[cell]
+        path.reverse()
+        return path
@@ -2,46 +2,33 @@
 Map Exploration Partners - Simple Implementation
 Two agents explore unknown regions cooperatively
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class ExplorationGrid:
+class ExplorationGrid(GridMap):
     def __init__(self, size=15):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
-        self.explored = set()
-        self.obstacles = set()
+        self.explored = self.layer("explored")
     
     def add_agent(self, agent_id, pos):
         self.agents[agent_id] = pos
     
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
     def move_agent(self, agent_id, pos):
         if self.is_valid(pos):
             self.agents[agent_id] = pos
             return True
         return False
     
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-    
     def mark_explored(self, pos):
         self.explored.add(pos)
 
@@ -70,26 +57,7 @@ class ExplorerAgent:
 # ============= PATHFINDING (BFS for exploration) =============
 def bfs_nearest_unexplored(start, unexplored, grid, avoid=None):
     """Find path to nearest unexplored cell"""
-    if avoid is None:
-        avoid = set()
-    
-    from collections import deque
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        # Found unexplored cell
-        if current in unexplored and current != start:
-            return path
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
+    return grid.find_nearest(start, unexplored, avoid, include_start=False)
 
 # ============= REGION PARTITIONING =============
 def partition_grid(grid_size, num_agents=2):
@@ -110,6 +78,10 @@ def partition_grid(grid_size, num_agents=2):
 
 # ============= VISUALIZATION =============
 def visualize_exploration(grid, agents, step, total_cells):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+    import numpy as np
+
     plt.clf()
     
     # Create heatmap data
@@ -150,6 +122,9 @@ def visualize_exploration(grid, agents, step, total_cells):
 
 def create_heatmap(grid, agent1, agent2):
     """Create final exploration heatmap"""
+    import matplotlib.pyplot as plt
+    import numpy as np
+
     plt.figure(figsize=(12, 5))
     
     # Subplot 1: Agent 1 exploration
@@ -184,10 +159,35 @@ def create_heatmap(grid, agent1, agent2):
     plt.tight_layout()
     plt.show()
 
-# ============= MAIN SIMULATION =============
-def run_exploration():
-    print("Starting Map Exploration Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+UNKNOWN, EXPLORED, OBSTACLE = 0, 1, 2
+
+def exploration_state(grid, agents, step, total_cells):
+    """Per-tick state as plain data: grid cell codes, agents and counters"""
+    return {
+        "step": step,
+        "grid": grid.draw((grid.explored, EXPLORED), (grid.obstacles, OBSTACLE)),
+        "agents": [{"id": agent.id, "x": agent.pos[0], "y": agent.pos[1],
+                    "explored": len(agent.explored)}
+                   for agent in agents],
+        "progress": round(len(grid.explored) / total_cells * 100, 1),
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_exploration(seed=None, log=_silent):
+    """Headless exploration run.
+
+    Yields (grid, agents, step, total_explorable) after every tick and
+    returns the final metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Map Exploration Simulation...")
+    log("=" * 50)
     
     # Setup
     GRID_SIZE = 15
@@ -198,7 +198,7 @@ def run_exploration():
     # Create random obstacles
     obstacles = set()
     while len(obstacles) < NUM_OBSTACLES:
-        x, y = random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1)
+        x, y = rng.randint(0, GRID_SIZE-1), rng.randint(0, GRID_SIZE-1)
         if (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]:
             obstacles.add((x, y))
     
@@ -221,9 +221,9 @@ def run_exploration():
     agent1.assign_region(regions[0])
     agent2.assign_region(regions[1])
     
-    print(f"Agent 1 region: {len(regions[0])} cells")
-    print(f"Agent 2 region: {len(regions[1])} cells")
-    print(f"Obstacles: {len(obstacles)}")
+    log(f"Agent 1 region: {len(regions[0])} cells")
+    log(f"Agent 2 region: {len(regions[1])} cells")
+    log(f"Obstacles: {len(obstacles)}")
     
     # Mark starting positions as explored
     agent1.explore()
@@ -232,14 +232,14 @@ def run_exploration():
     grid.mark_explored(agent2.pos)
     
     # Simulation
-    plt.figure(figsize=(10, 10))
     steps = 0
     max_steps = 500
     
     total_explorable = GRID_SIZE * GRID_SIZE - len(obstacles)
     
     while steps < max_steps:
-        print(f"\n--- Step {steps} ---")
+        if trace:
+            log(f"\n--- Step {steps} ---")
         
         # Agent 1 planning
         if not agent1.path:
@@ -264,8 +264,9 @@ def run_exploration():
         grid.move_agent(1, new_pos1)
         grid.move_agent(2, new_pos2)
         
-        print(f"Agent 1: Moved to {new_pos1}")
-        print(f"Agent 2: Moved to {new_pos2}")
+        if trace:
+            log(f"Agent 1: Moved to {new_pos1}")
+            log(f"Agent 2: Moved to {new_pos2}")
         
         # Explore
         agent1.explore()
@@ -273,16 +274,13 @@ def run_exploration():
         grid.mark_explored(agent1.pos)
         grid.mark_explored(agent2.pos)
         
-        if agent1.pos not in agent1.explored or agent2.pos not in agent2.explored:
+        if trace and (agent1.pos not in agent1.explored or agent2.pos not in agent2.explored):
             if agent1.pos not in agent1.explored:
-                print(f"Agent 1: Explored new cell at {agent1.pos}")
+                log(f"Agent 1: Explored new cell at {agent1.pos}")
             if agent2.pos not in agent2.explored:
-                print(f"Agent 2: Explored new cell at {agent2.pos}")
-        
-        # Visualize every 10 steps
-        if steps % 10 == 0:
-            visualize_exploration(grid, [agent1, agent2], steps, total_explorable)
+                log(f"Agent 2: Explored new cell at {agent2.pos}")
         
+        yield grid, [agent1, agent2], steps, total_explorable
         steps += 1
         
         # Check if fully explored
@@ -293,20 +291,45 @@ def run_exploration():
     explored_pct = (len(grid.explored) / total_explorable) * 100
     efficiency = (total_explorable / steps) * 100 if steps > 0 else 0
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Steps: {steps}")
-    print(f"  Cells Explored: {len(grid.explored)}/{total_explorable}")
-    print(f"  Agent 1: {len(agent1.explored)} cells")
-    print(f"  Agent 2: {len(agent2.explored)} cells")
-    print(f"  Coverage: {explored_pct:.1f}%")
-    print(f"  Efficiency: {efficiency:.2f} cells/step")
-    print(f"{'='*50}")
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Steps: {steps}")
+    log(f"  Cells Explored: {len(grid.explored)}/{total_explorable}")
+    log(f"  Agent 1: {len(agent1.explored)} cells")
+    log(f"  Agent 2: {len(agent2.explored)} cells")
+    log(f"  Coverage: {explored_pct:.1f}%")
+    log(f"  Efficiency: {efficiency:.2f} cells/step")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "cells_explored": len(grid.explored),
+        "explorable_cells": total_explorable,
+        "coverage": round(explored_pct, 1),
+        "efficiency": round(efficiency, 2),
+        "per_agent": {agent.id: len(agent.explored) for agent in (agent1, agent2)},
+    }
+
+# ============= MAIN SIMULATION =============
+def run_exploration(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 10))
+    ticks = simulate_exploration(seed, log=print)
+    while True:
+        try:
+            grid, agents, step, total_explorable = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize every 10 steps
+        if step % 10 == 0:
+            visualize_exploration(grid, agents, step, total_explorable)
     
     # Show final heatmap
-    visualize_exploration(grid, [agent1, agent2], steps, total_explorable)
+    visualize_exploration(grid, agents, results["steps"], total_explorable)
     plt.pause(1)
-    create_heatmap(grid, agent1, agent2)
+    create_heatmap(grid, *agents)
 
 if __name__ == "__main__":
     run_exploration()
@@ -2,44 +2,7 @@ import os
 os.environ['MPLBACKEND'] = 'Agg'
 
 import random
-from collections import deque
-
-class ExplorationGrid:
-    def __init__(self, size=15):
-        self.size = size
-        self.agents = {}
-        self.explored = set()
-        self.obstacles = set()
-    
-    def add_agent(self, agent_id, pos):
-        self.agents[agent_id] = pos
-    
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
-    def move_agent(self, agent_id, pos):
-        if self.is_valid(pos):
-            self.agents[agent_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-    
-    def mark_explored(self, pos):
-        self.explored.add(pos)
+from exploration_simulation import ExplorationGrid, bfs_nearest_unexplored
 
 class ExplorerAgent:
     def __init__(self, agent_id, start_pos):
@@ -61,26 +24,6 @@ class ExplorerAgent:
         self.explored.add(self.pos)
 
 
-def bfs_nearest_unexplored(start, unexplored, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        if current in unexplored and current != start:
-            return path
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
-
 def partition_grid(grid_size, num_agents=2):
     regions = [set() for _ in range(num_agents)]
     mid = grid_size // 2
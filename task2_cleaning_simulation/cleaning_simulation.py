@@ -2,16 +2,24 @@
 Cleaning Crew Coordination - Simple Implementation
 Two bots clean a grid cooperatively
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import sys
 from collections import deque
 
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
+
 # ============= ENVIRONMENT =============
-class Grid:
+class Grid(GridMap):
     def __init__(self, size=10):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
+        self.dirt = self.layer("dirt")
     
     def add_agent(self, agent_id, pos):
         self.agents[agent_id] = pos
@@ -21,15 +29,6 @@ class Grid:
             self.agents[agent_id] = pos
             return True
         return False
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.size and 0 <= ny < self.size:
-                neighbors.append((nx, ny))
-        return neighbors
 
 # ============= AGENT =============
 class CleaningBot:
@@ -37,11 +36,14 @@ class CleaningBot:
         self.id = bot_id
         self.pos = start_pos
         self.path = []
+        self.target = None
         self.cleaned = set()
         self.tasks = []
+        self.pending = set()  # tasks still dirty
     
     def assign_tasks(self, cells):
         self.tasks = list(cells)
+        self.pending = set(self.tasks)
     
     def move(self):
         if self.path:
@@ -53,45 +55,28 @@ class CleaningBot:
 
 # ============= PATHFINDING (A*) =============
 def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-    
-    while frontier:
-        frontier.sort()
-        _, current = frontier.pop(0)
-        
-        if current == goal:
-            break
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-            
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                frontier.append((priority, next_pos))
-                came_from[next_pos] = current
-    
-    # Reconstruct path
-    if goal not in came_from:
-        return []
-    
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
+    """Shortest path from start to goal avoiding the avoid positions; [] if there is none"""
+    return grid.find_path(start, goal, avoid)
+
+def plan_route(bot, grid, avoid):
+    """Path the bot to its nearest pending cell.
+
+    A planned path is kept across ticks until it is walked or its target
+    gets cleaned (by either bot), so a bot searches once per target.
+    """
+    if bot.path and bot.target in bot.pending:
+        return
+    bot.path = []
+    bot.target = None
+    if not bot.pending:
+        return
+    x, y = bot.pos
+    # Nearest first, then the first in row-major order
+    target = min(bot.pending, key=lambda c: (abs(c[0] - x) + abs(c[1] - y), c[1], c[0]))
+    path = astar(bot.pos, target, grid, avoid)
+    if path:
+        bot.path = path[1:]
+        bot.target = target
 
 # ============= TASK ALLOCATION =============
 def divide_tasks(dirty_cells, pos1, pos2):
@@ -111,6 +96,9 @@ def divide_tasks(dirty_cells, pos1, pos2):
 
 # ============= VISUALIZATION =============
 def visualize(grid, dirty, cleaned, step, total):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     plt.xlim(0, grid.size)
     plt.ylim(0, grid.size)
@@ -143,26 +131,36 @@ def visualize(grid, dirty, cleaned, step, total):
     
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_simulation():
-    print("Starting Cleaning Crew Simulation...")
-    print("=" * 50)
-    
-    # Setup
-    GRID_SIZE = 10
-    NUM_DIRTY = 20
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_cleaning(seed=None, size=10, dirty=20, log=_silent):
+    """Headless cleaning run on a size x size grid with dirty cells.
+
+    Yields (grid, bots, remaining dirty cells, step) after every tick and
+    returns the final metrics. dirty is capped at size*size. Pass log=print
+    for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Cleaning Crew Simulation...")
+    log("=" * 50)
     
-    grid = Grid(GRID_SIZE)
+    grid = Grid(size)
     
-    # Create dirty cells
-    dirty_cells = set()
-    while len(dirty_cells) < NUM_DIRTY:
-        x, y = random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1)
+    # Create dirty cells; asking for more than the grid holds would never finish
+    dirty = min(dirty, size * size)
+    dirty_cells = grid.dirt
+    while len(dirty_cells) < dirty:
+        x, y = rng.randint(0, size-1), rng.randint(0, size-1)
         dirty_cells.add((x, y))
+    remaining_dirty = set(dirty_cells)
     
     # Initialize bots
     bot1 = CleaningBot(1, (0, 0))
-    bot2 = CleaningBot(2, (GRID_SIZE-1, GRID_SIZE-1))
+    bot2 = CleaningBot(2, (size-1, size-1))
+    bots = [bot1, bot2]
     
     grid.add_agent(1, bot1.pos)
     grid.add_agent(2, bot2.pos)
@@ -172,104 +170,98 @@ def run_simulation():
     bot1.assign_tasks(tasks1)
     bot2.assign_tasks(tasks2)
     
-    print(f"Bot 1: {len(tasks1)} tasks | Bot 2: {len(tasks2)} tasks")
+    log(f"Bot 1: {len(tasks1)} tasks | Bot 2: {len(tasks2)} tasks")
     
-    # Simulation
-    plt.figure(figsize=(8, 8))
     steps = 0
-    max_steps = 300
+    max_steps = max(300, dirty * size)
     
     while steps < max_steps:
         # Plan paths if needed
-        if not bot1.path and bot1.tasks:
-            remaining = [c for c in bot1.tasks if c not in bot1.cleaned]
-            if remaining:
-                target = min(remaining, key=lambda c: abs(c[0]-bot1.pos[0]) + abs(c[1]-bot1.pos[1]))
-                path = astar(bot1.pos, target, grid, {bot2.pos})
-                if path:
-                    bot1.path = path[1:]
-        
-        if not bot2.path and bot2.tasks:
-            remaining = [c for c in bot2.tasks if c not in bot2.cleaned]
-            if remaining:
-                target = min(remaining, key=lambda c: abs(c[0]-bot2.pos[0]) + abs(c[1]-bot2.pos[1]))
-                path = astar(bot2.pos, target, grid, {bot1.pos})
-                if path:
-                    bot2.path = path[1:]
-        
-        # Move bots
-        new_pos1 = bot1.move()
-        new_pos2 = bot2.move()
-        
-        if steps % 5 == 0:
-            print(f"Bot 1: Moved to {new_pos1}")
-            print(f"Bot 2: Moved to {new_pos2}")
-        
-        grid.move_agent(1, new_pos1)
-        grid.move_agent(2, new_pos2)
-        
-        # Clean
-        if bot1.pos in dirty_cells:
-            bot1.clean()
-            if steps % 5 == 0:
-                print(f"Bot 1: Cleaned cell at {bot1.pos}")
-        if bot2.pos in dirty_cells:
-            bot2.clean()
-            if steps % 5 == 0:
-                print(f"Bot 2: Cleaned cell at {bot2.pos}")
-        
-        # Print grid every 5 steps
-        if steps % 5 == 0:
-            cleaned = bot1.cleaned | bot2.cleaned
-            remaining_dirty = dirty_cells - cleaned
-            print("\nCurrent Grid:")
-            for y in range(grid.size-1, -1, -1):
-                row = ""
-                for x in range(grid.size):
-                    pos = (x, y)
-                    if pos == bot1.pos and pos == bot2.pos:
-                        row += "X "
-                    elif pos == bot1.pos:
-                        row += "1 "
-                    elif pos == bot2.pos:
-                        row += "2 "
-                    elif pos in cleaned:
-                        row += "C "
-                    elif pos in remaining_dirty:
-                        row += "D "
-                    else:
-                        row += "· "
-                print(row)
-            print(f"Cleaned: {len(cleaned)}/{len(dirty_cells)}")
-            print()
-        
-        # Visualize
-        cleaned = bot1.cleaned | bot2.cleaned
-        remaining_dirty = dirty_cells - cleaned
+        plan_route(bot1, grid, {bot2.pos})
+        plan_route(bot2, grid, {bot1.pos})
         
-        if steps % 5 == 0:  # Update every 5 steps for speed
-            visualize(grid, remaining_dirty, cleaned, steps, len(dirty_cells))
+        # Move and clean
+        for bot in bots:
+            grid.move_agent(bot.id, bot.move())
+            if trace and steps % 5 == 0:
+                log(f"Bot {bot.id}: Moved to {bot.pos}")
+            if bot.pos in remaining_dirty:
+                bot.clean()
+                remaining_dirty.discard(bot.pos)
+                bot1.pending.discard(bot.pos)
+                bot2.pending.discard(bot.pos)
+                if trace and steps % 5 == 0:
+                    log(f"Bot {bot.id}: Cleaned cell at {bot.pos}")
         
+        yield grid, bots, remaining_dirty, steps
         steps += 1
         
         # Check if done
         if not remaining_dirty:
             break
     
-    # Final results
-    total_cleaned = len(bot1.cleaned | bot2.cleaned)
-    efficiency = (total_cleaned / len(dirty_cells)) * 100
+    total_cleaned = len(dirty_cells) - len(remaining_dirty)
+    return {
+        "steps": steps,
+        "cells_cleaned": total_cleaned,
+        "total_dirty": len(dirty_cells),
+        "per_agent": {bot.id: len(bot.cleaned) for bot in bots},
+        "efficiency": round(total_cleaned / len(dirty_cells) * 100, 1),
+    }
+
+# ============= MAIN SIMULATION =============
+def print_grid(grid, bots, remaining_dirty):
+    bot1, bot2 = bots
+    cleaned = bot1.cleaned | bot2.cleaned
+    print("\nCurrent Grid:")
+    for y in range(grid.size-1, -1, -1):
+        row = ""
+        for x in range(grid.size):
+            pos = (x, y)
+            if pos == bot1.pos and pos == bot2.pos:
+                row += "X "
+            elif pos == bot1.pos:
+                row += "1 "
+            elif pos == bot2.pos:
+                row += "2 "
+            elif pos in cleaned:
+                row += "C "
+            elif pos in remaining_dirty:
+                row += "D "
+            else:
+                row += "· "
+        print(row)
+    print(f"Cleaned: {len(cleaned)}/{len(grid.dirt)}")
+    print()
+
+def run_simulation(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 8))
+    ticks = simulate_cleaning(seed, log=print)
+    while True:
+        try:
+            grid, bots, remaining_dirty, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Print and draw every 5 steps for speed
+        if step % 5 == 0:
+            print_grid(grid, bots, remaining_dirty)
+            cleaned = bots[0].cleaned | bots[1].cleaned
+            visualize(grid, remaining_dirty, cleaned, step, len(grid.dirt))
     
+    # Final results
     print(f"\n{'='*50}")
     print(f"RESULTS:")
-    print(f"  Total Steps: {steps}")
-    print(f"  Cells Cleaned: {total_cleaned}/{len(dirty_cells)}")
-    print(f"  Bot 1: {len(bot1.cleaned)} cells")
-    print(f"  Bot 2: {len(bot2.cleaned)} cells")
-    print(f"  Efficiency: {efficiency:.1f}%")
+    print(f"  Total Steps: {results['steps']}")
+    print(f"  Cells Cleaned: {results['cells_cleaned']}/{results['total_dirty']}")
+    for bot_id, cleaned in results["per_agent"].items():
+        print(f"  Bot {bot_id}: {cleaned} cells")
+    print(f"  Efficiency: {results['efficiency']:.1f}%")
     print(f"{'='*50}")
     
-    visualize(grid, set(), bot1.cleaned | bot2.cleaned, steps, len(dirty_cells))
+    visualize(grid, set(), bots[0].cleaned | bots[1].cleaned, results["steps"], results["total_dirty"])
     plt.show()
 
 if __name__ == "__main__":
@@ -2,18 +2,23 @@
 Cooperative Path Planners - Simple Implementation
 Two agents reach their goals while avoiding collisions using A* with shared collision-avoidance
 """
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
 import heapq
+import os
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class PathGrid:
+class PathGrid(GridMap):
     def __init__(self, size=12):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
         self.goals = {}
-        self.obstacles = set()
         self.agent_paths = {}  # Store planned paths
         
     def add_agent(self, agent_id, pos, goal):
@@ -21,29 +26,11 @@ class PathGrid:
         self.goals[agent_id] = goal
         self.agent_paths[agent_id] = []
     
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
     def move_agent(self, agent_id, pos):
         if self.is_valid(pos):
             self.agents[agent_id] = pos
             return True
         return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
 
 # ============= AGENT =============
 class PathAgent:
@@ -55,65 +42,81 @@ class PathAgent:
         self.reached_goal = False
 
 # ============= A* WITH COLLISION AVOIDANCE =============
-def astar_with_collision_avoidance(start, goal, grid, reserved_positions, time_step=0):
-    """A* pathfinding with space-time collision avoidance"""
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    # Priority queue: (priority, time, position)
-    frontier = [(0, time_step, start)]
-    came_from = {(time_step, start): None}
-    cost = {(time_step, start): 0}
+def astar_with_collision_avoidance(start, goal, grid, reserved_positions, time_step=0, max_time=None):
+    """A* pathfinding with space-time collision avoidance
+
+    Paths end by max_time; by default it leaves room to wait out every
+    reservation and then cross the whole grid. Returns [] if there is no
+    such path.
+    """
+    if max_time is None:
+        latest = max((time for time, _ in reserved_positions), default=time_step)
+        max_time = max(latest, time_step) + grid.size * grid.size
+    cells = grid.size * grid.size
+    reserved = {time * cells + grid.cell_id(pos) for time, pos in reserved_positions}
+    path = _space_time_astar(grid.cell_id(start), grid.cell_id(goal), grid, reserved, time_step, max_time)
+    return [grid.cell_pos(cell) for cell in path]
+
+
+def _space_time_astar(start, goal, grid, reserved, time_step, max_time):
+    """astar_with_collision_avoidance on cell ids, over the grid's neighbour table.
+
+    Space-time states are time * cells + cell, as are the reserved ones.
+    """
+    size = grid.size
+    cells = size * size
+    table = grid.neighbors
+    indices, offsets, ends = table.indices, table.offsets, table.ends
+    goal_x, goal_y = goal % size, goal // size
+    
+    # Priority queue: (priority, distance left, time, cell); on equal
+    # priority the state closest to the goal goes first
+    frontier = [(0, 0, time_step, start)]
+    came_from = {time_step * cells + start: None}
+    cost = {time_step * cells + start: 0}
     
     while frontier:
-        _, current_time, current_pos = heapq.heappop(frontier)
+        _, _, current_time, current = heapq.heappop(frontier)
+        current_state = current_time * cells + current
         
-        if current_pos == goal:
+        if current == goal:
             # Reconstruct path
             path = []
-            state = (current_time, current_pos)
-            while state:
-                path.append(state[1])
-                state = came_from.get(state)
+            state = current_state
+            while state is not None:
+                path.append(state % cells)
+                state = came_from[state]
             path.reverse()
             return path
         
         # Try moving to neighbors or waiting
         next_time = current_time + 1
+        if next_time > max_time:
+            continue
+        new_cost = cost[current_state] + 1
+        moves = next_time * cells
         
-        # Option 1: Move to neighbor
-        for next_pos in grid.get_neighbors(current_pos):
+        # Option 1: Move to neighbor; Option 2: Wait at current position
+        for next_cell in (*indices[offsets[current]:ends[current]], current):
+            state = moves + next_cell
             # Check if position is reserved by another agent at this time
-            if (next_time, next_pos) in reserved_positions:
+            if state in reserved:
                 continue
             
-            new_cost = cost[(current_time, current_pos)] + 1
-            state = (next_time, next_pos)
-            
             if state not in cost or new_cost < cost[state]:
                 cost[state] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_time, next_pos))
-                came_from[state] = (current_time, current_pos)
-        
-        # Option 2: Wait at current position
-        if (next_time, current_pos) not in reserved_positions:
-            new_cost = cost[(current_time, current_pos)] + 1
-            state = (next_time, current_pos)
-            
-            if state not in cost or new_cost < cost[state]:
-                cost[state] = new_cost
-                priority = new_cost + heuristic(current_pos, goal)
-                heapq.heappush(frontier, (priority, next_time, current_pos))
-                came_from[state] = (current_time, current_pos)
+                remaining = abs(next_cell % size - goal_x) + abs(next_cell // size - goal_y)
+                heapq.heappush(frontier, (new_cost + remaining, remaining, next_time, next_cell))
+                came_from[state] = current_state
     
     return []
 
 # ============= COOPERATIVE PLANNING =============
-def plan_paths_cooperatively(agents, grid):
-    """Plan paths for all agents with collision avoidance"""
-    reserved_positions = set()
+def plan_paths_cooperatively(agents, grid, max_time=None):
+    """Plan paths for all agents with collision avoidance (see astar_with_collision_avoidance for max_time)"""
+    cells = grid.size * grid.size
+    reserved = set()  # time * cells + cell
+    latest = 0
     
     # Sort agents by distance to goal (prioritize longer paths)
     sorted_agents = sorted(agents, 
@@ -122,14 +125,16 @@ def plan_paths_cooperatively(agents, grid):
     
     for agent in sorted_agents:
         # Plan path avoiding reserved positions
-        path = astar_with_collision_avoidance(agent.pos, agent.goal, grid, 
-                                              reserved_positions)
+        horizon = max_time if max_time is not None else latest + cells
+        path = _space_time_astar(grid.cell_id(agent.pos), grid.cell_id(agent.goal), grid,
+                                 reserved, 0, horizon)
         
         if path:
-            agent.path = path
+            agent.path = [grid.cell_pos(cell) for cell in path]
             # Reserve positions in space-time
-            for time, pos in enumerate(path):
-                reserved_positions.add((time, pos))
+            for time, cell in enumerate(path):
+                reserved.add(time * cells + cell)
+            latest = max(latest, len(path) - 1)
         else:
             agent.path = [agent.pos]  # Stay in place if no path found
     
@@ -137,6 +142,9 @@ def plan_paths_cooperatively(agents, grid):
 
 # ============= VISUALIZATION =============
 def visualize_paths(grid, agents, step, max_steps):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(10, 10)
@@ -207,6 +215,8 @@ def visualize_paths(grid, agents, step, max_steps):
 
 # ============= MAIN SIMULATION =============
 def run_path_planning():
+    import matplotlib.pyplot as plt
+
     print("Starting Cooperative Path Planners Simulation...")
     print("=" * 50)
     
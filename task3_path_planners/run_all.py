@@ -3,43 +3,7 @@ os.environ['MPLBACKEND'] = 'Agg'
 
 import numpy as np
 import heapq
-
-class PathGrid:
-    def __init__(self, size=12):
-        self.size = size
-        self.agents = {}
-        self.goals = {}
-        self.obstacles = set()
-        self.agent_paths = {}
-        
-    def add_agent(self, agent_id, pos, goal):
-        self.agents[agent_id] = pos
-        self.goals[agent_id] = goal
-        self.agent_paths[agent_id] = []
-    
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
-    def move_agent(self, agent_id, pos):
-        if self.is_valid(pos):
-            self.agents[agent_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
+from path_planning import PathGrid
 
 class PathAgent:
     def __init__(self, agent_id, start_pos, goal_pos):
@@ -2,16 +2,21 @@
 Warehouse Pickup Team - Simple Implementation
 Two agents pick and drop items cooperatively using proximity-based assignment
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-import heapq
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class WarehouseGrid:
+class WarehouseGrid(GridMap):
     def __init__(self, size=12):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
         self.items = {}  # item_id -> pickup_location
         self.dropoff_zones = []
@@ -31,20 +36,6 @@ class WarehouseGrid:
             self.agents[agent_id] = pos
             return True
         return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
 
 # ============= AGENT =============
 class WarehouseAgent:
@@ -64,43 +55,8 @@ class WarehouseAgent:
 
 # ============= A* PATHFINDING =============
 def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-    
-    while frontier:
-        _, current = heapq.heappop(frontier)
-        
-        if current == goal:
-            break
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-            
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_pos))
-                came_from[next_pos] = current
-    
-    if goal not in came_from:
-        return []
-    
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
+    """Shortest path from start to goal avoiding the avoid positions; [] if there is none"""
+    return grid.find_path(start, goal, avoid)
 
 # ============= PROXIMITY-BASED ASSIGNMENT =============
 def assign_nearest_item(agent, available_items, warehouse):
@@ -115,6 +71,9 @@ def assign_nearest_item(agent, available_items, warehouse):
 
 # ============= VISUALIZATION =============
 def visualize_warehouse(warehouse, agents, step, total_items):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(12, 6)
@@ -210,10 +169,35 @@ def visualize_warehouse(warehouse, agents, step, total_items):
     plt.tight_layout()
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_warehouse():
-    print("Starting Warehouse Pickup Team Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+EMPTY, DROPOFF, ITEM = 0, 1, 2
+
+def warehouse_state(warehouse, agents, step):
+    """Per-tick state as plain data: grid cell codes, agents and counters"""
+    return {
+        "step": step,
+        "grid": warehouse.draw((warehouse.dropoff_zones, DROPOFF), (warehouse.items.values(), ITEM)),
+        "agents": [{"id": agent.id, "x": agent.pos[0], "y": agent.pos[1],
+                    "carrying": agent.carrying_item, "distance": agent.total_distance}
+                   for agent in agents],
+        "completed": len(warehouse.completed),
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_warehouse(seed=None, log=_silent):
+    """Headless warehouse run.
+
+    Yields (warehouse, agents, step) after every tick and returns the final
+    metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Warehouse Pickup Team Simulation...")
+    log("=" * 50)
     
     WAREHOUSE_SIZE = 12
     NUM_ITEMS = 10
@@ -228,9 +212,9 @@ def run_warehouse():
     # Create random items
     items = {}
     for i in range(1, NUM_ITEMS + 1):
-        x, y = random.randint(2, WAREHOUSE_SIZE-3), random.randint(2, WAREHOUSE_SIZE-3)
+        x, y = rng.randint(2, WAREHOUSE_SIZE-3), rng.randint(2, WAREHOUSE_SIZE-3)
         while (x, y) in dropoff_zones:
-            x, y = random.randint(2, WAREHOUSE_SIZE-3), random.randint(2, WAREHOUSE_SIZE-3)
+            x, y = rng.randint(2, WAREHOUSE_SIZE-3), rng.randint(2, WAREHOUSE_SIZE-3)
         items[i] = (x, y)
         warehouse.add_item(i, (x, y))
     
@@ -243,20 +227,19 @@ def run_warehouse():
     
     agents = [agent1, agent2]
     
-    print(f"Warehouse size: {WAREHOUSE_SIZE}x{WAREHOUSE_SIZE}")
-    print(f"Items to pickup: {NUM_ITEMS}")
-    print(f"Dropoff zones: {len(dropoff_zones)}")
+    log(f"Warehouse size: {WAREHOUSE_SIZE}x{WAREHOUSE_SIZE}")
+    log(f"Items to pickup: {NUM_ITEMS}")
+    log(f"Dropoff zones: {len(dropoff_zones)}")
     
     # Simulation
-    plt.figure(figsize=(12, 6))
     steps = 0
     max_steps = 400
     
     while steps < max_steps and len(warehouse.completed) < NUM_ITEMS:
-        if steps % 10 == 0:
-            print(f"\n{'='*50}")
-            print(f"STEP {steps}")
-            print('='*50)
+        if trace and steps % 10 == 0:
+            log(f"\n{'='*50}")
+            log(f"STEP {steps}")
+            log('='*50)
         
         for agent in agents:
             # If not carrying and no path, assign nearest item
@@ -290,15 +273,15 @@ def run_warehouse():
             # Move agent
             new_pos = agent.move()
             warehouse.move_agent(agent.id, new_pos)
-            if (steps % 10 == 0) and (agent.path or agent.carrying_item):
+            if trace and (steps % 10 == 0) and (agent.path or agent.carrying_item):
                 status = f"carrying item {agent.carrying_item}" if agent.carrying_item else "moving"
-                print(f"Agent {agent.id}: Moved to {new_pos} ({status})")
+                log(f"Agent {agent.id}: Moved to {new_pos} ({status})")
             
             # Check pickup
-            if agent.carrying_item and agent.carrying_item in warehouse.items:
+            if trace and agent.carrying_item and agent.carrying_item in warehouse.items:
                 pickup_pos = warehouse.items[agent.carrying_item]
                 if agent.pos == pickup_pos:
-                    print(f"Step {steps}: Agent {agent.id} picked up item {agent.carrying_item}")
+                    log(f"Step {steps}: Agent {agent.id} picked up item {agent.carrying_item}")
             
             # Check dropoff
             if agent.carrying_item and agent.pos in warehouse.dropoff_zones:
@@ -306,13 +289,11 @@ def run_warehouse():
                     warehouse.completed[agent.carrying_item] = agent.id
                     agent.completed_items.append(agent.carrying_item)
                     del warehouse.items[agent.carrying_item]
-                    print(f"Step {steps}: Agent {agent.id} dropped off item {agent.carrying_item}")
+                    if trace:
+                        log(f"Step {steps}: Agent {agent.id} dropped off item {agent.carrying_item}")
                     agent.carrying_item = None
         
-        # Visualize
-        if steps % 5 == 0:
-            visualize_warehouse(warehouse, agents, steps, NUM_ITEMS)
-        
+        yield warehouse, agents, steps
         steps += 1
     
     # Final results
@@ -320,18 +301,44 @@ def run_warehouse():
     total_distance = sum(agent.total_distance for agent in agents)
     overall_efficiency = (total_completed / total_distance) if total_distance > 0 else 0
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Time: {steps} steps")
-    print(f"  Items Completed: {total_completed}/{NUM_ITEMS}")
-    print(f"  Agent 1: {len(agent1.completed_items)} items, {agent1.total_distance} distance")
-    print(f"  Agent 2: {len(agent2.completed_items)} items, {agent2.total_distance} distance")
-    print(f"  Total Distance: {total_distance}")
-    print(f"  Overall Efficiency: {overall_efficiency:.3f} items/step")
-    print(f"  Status: {'SUCCESS' if total_completed == NUM_ITEMS else 'PARTIAL'}")
-    print(f"{'='*50}")
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Time: {steps} steps")
+    log(f"  Items Completed: {total_completed}/{NUM_ITEMS}")
+    log(f"  Agent 1: {len(agent1.completed_items)} items, {agent1.total_distance} distance")
+    log(f"  Agent 2: {len(agent2.completed_items)} items, {agent2.total_distance} distance")
+    log(f"  Total Distance: {total_distance}")
+    log(f"  Overall Efficiency: {overall_efficiency:.3f} items/step")
+    log(f"  Status: {'SUCCESS' if total_completed == NUM_ITEMS else 'PARTIAL'}")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "items_completed": total_completed,
+        "total_items": NUM_ITEMS,
+        "total_distance": total_distance,
+        "efficiency": round(overall_efficiency, 3),
+        "per_agent": {agent.id: len(agent.completed_items) for agent in agents},
+        "success": total_completed == NUM_ITEMS,
+    }
+
+# ============= MAIN SIMULATION =============
+def run_warehouse(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    ticks = simulate_warehouse(seed, log=print)
+    while True:
+        try:
+            warehouse, agents, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize
+        if step % 5 == 0:
+            visualize_warehouse(warehouse, agents, step, len(warehouse.items) + len(warehouse.completed))
     
-    visualize_warehouse(warehouse, agents, steps, NUM_ITEMS)
+    visualize_warehouse(warehouse, agents, results["steps"], results["total_items"])
     plt.show()
 
 if __name__ == "__main__":
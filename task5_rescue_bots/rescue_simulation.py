@@ -2,18 +2,23 @@
 Rescue Bot Squad - Simple Implementation
 Two rescue bots find and rescue trapped victims in a maze using BFS
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-from collections import deque
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class MazeGrid:
+class MazeGrid(GridMap):
     def __init__(self, size=14):
-        self.size = size
+        super().__init__(size)
         self.bots = {}
-        self.walls = set()
+        self.walls = self.obstacles
         self.victims = set()
         self.rescued = {}  # victim_pos -> bot_id
         
@@ -21,7 +26,7 @@ class MazeGrid:
         self.bots[bot_id] = pos
     
     def add_walls(self, wall_list):
-        self.walls = set(wall_list)
+        self.add_obstacles(wall_list)
     
     def add_victims(self, victim_list):
         self.victims = set(victim_list)
@@ -32,27 +37,12 @@ class MazeGrid:
             return True
         return False
     
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.walls)
-    
     def rescue_victim(self, pos, bot_id):
         if pos in self.victims:
             self.victims.remove(pos)
             self.rescued[pos] = bot_id
             return True
         return False
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
 
 # ============= AGENT =============
 class RescueBot:
@@ -74,24 +64,7 @@ class RescueBot:
 # ============= BFS PATHFINDING =============
 def bfs_to_victim(start, victims, maze, avoid=None):
     """BFS to find nearest victim"""
-    if avoid is None:
-        avoid = set()
-    
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        if current in victims:
-            return path
-        
-        for next_pos in maze.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
+    return maze.find_nearest(start, victims, avoid)
 
 # ============= ZONE ALLOCATION =============
 def allocate_rescue_zones(maze_size, num_bots=2):
@@ -110,13 +83,13 @@ def allocate_rescue_zones(maze_size, num_bots=2):
     return zones
 
 # ============= MAZE GENERATION =============
-def generate_maze_walls(size, density=0.2):
+def generate_maze_walls(size, density=0.2, rng=random):
     """Generate random maze walls"""
     walls = set()
     num_walls = int(size * size * density)
     
     while len(walls) < num_walls:
-        x, y = random.randint(1, size-2), random.randint(1, size-2)
+        x, y = rng.randint(1, size-2), rng.randint(1, size-2)
         if (x, y) not in [(0, 0), (size-1, size-1)]:
             walls.add((x, y))
     
@@ -124,6 +97,9 @@ def generate_maze_walls(size, density=0.2):
 
 # ============= VISUALIZATION =============
 def visualize_rescue(maze, bots, step, total_victims):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(12, 6)
@@ -205,10 +181,36 @@ def visualize_rescue(maze, bots, step, total_victims):
     plt.tight_layout()
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_rescue():
-    print("Starting Rescue Bot Squad Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+EMPTY, WALL, VICTIM, RESCUED = 0, 1, 2, 3
+
+def rescue_state(maze, bots, step):
+    """Per-tick state as plain data: grid cell codes, bots and counters"""
+    return {
+        "step": step,
+        "grid": maze.draw((maze.walls, WALL), (maze.victims, VICTIM), (maze.rescued, RESCUED)),
+        "agents": [{"id": bot.id, "x": bot.pos[0], "y": bot.pos[1],
+                    "rescued": len(bot.rescued_victims)}
+                   for bot in bots],
+        "rescued": len(maze.rescued),
+        "remaining": len(maze.victims),
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_rescue(seed=None, log=_silent):
+    """Headless rescue run.
+
+    Yields (maze, bots, step) after every tick and returns the final
+    metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Rescue Bot Squad Simulation...")
+    log("=" * 50)
     
     MAZE_SIZE = 14
     NUM_VICTIMS = 10
@@ -217,13 +219,13 @@ def run_rescue():
     maze = MazeGrid(MAZE_SIZE)
     
     # Generate maze walls
-    walls = generate_maze_walls(MAZE_SIZE, WALL_DENSITY)
+    walls = generate_maze_walls(MAZE_SIZE, WALL_DENSITY, rng)
     maze.add_walls(walls)
     
     # Place victims randomly (not on walls or start positions)
     victims = set()
     while len(victims) < NUM_VICTIMS:
-        x, y = random.randint(1, MAZE_SIZE-2), random.randint(1, MAZE_SIZE-2)
+        x, y = rng.randint(1, MAZE_SIZE-2), rng.randint(1, MAZE_SIZE-2)
         if ((x, y) not in walls and 
             (x, y) not in [(0, 0), (MAZE_SIZE-1, MAZE_SIZE-1)]):
             victims.add((x, y))
@@ -244,21 +246,21 @@ def run_rescue():
     bot1.assign_zone(zones[0])
     bot2.assign_zone(zones[1])
     
-    print(f"Maze size: {MAZE_SIZE}x{MAZE_SIZE}")
-    print(f"Walls: {len(walls)}")
-    print(f"Victims: {NUM_VICTIMS}")
-    print(f"Bot 1 zone: {len(zones[0])} cells")
-    print(f"Bot 2 zone: {len(zones[1])} cells")
+    log(f"Maze size: {MAZE_SIZE}x{MAZE_SIZE}")
+    log(f"Walls: {len(walls)}")
+    log(f"Victims: {NUM_VICTIMS}")
+    log(f"Bot 1 zone: {len(zones[0])} cells")
+    log(f"Bot 2 zone: {len(zones[1])} cells")
     
     # Simulation
-    plt.figure(figsize=(12, 6))
     steps = 0
     max_steps = 400
     
     while steps < max_steps and len(maze.victims) > 0:
-        print(f"\n{'='*50}")
-        print(f"STEP {steps}")
-        print('='*50)
+        if trace:
+            log(f"\n{'='*50}")
+            log(f"STEP {steps}")
+            log('='*50)
         
         for bot in bots:
             # Plan path to nearest victim
@@ -275,16 +277,18 @@ def run_rescue():
             # Move bot
             new_pos = bot.move()
             maze.move_bot(bot.id, new_pos)
-            print(f"Bot {bot.id}: Moved to {new_pos}")
+            if trace:
+                log(f"Bot {bot.id}: Moved to {new_pos}")
             
             # Rescue victim
             if maze.rescue_victim(bot.pos, bot.id):
                 bot.rescued_victims.append(bot.pos)
-                print(f"Bot {bot.id}: ✓ RESCUED victim at {bot.pos}")
+                if trace:
+                    log(f"Bot {bot.id}: ✓ RESCUED victim at {bot.pos}")
         
         # Print maze every 5 steps
-        if steps % 5 == 0:
-            print("\nCurrent Maze:")
+        if trace and steps % 5 == 0:
+            log("\nCurrent Maze:")
             for y in range(maze.size-1, -1, -1):
                 row = ""
                 for x in range(maze.size):
@@ -303,14 +307,11 @@ def run_rescue():
                         row += "✓ "
                     else:
                         row += "· "
-                print(row)
-            print(f"Victims remaining: {len(maze.victims)}")
-            print()
-        
-        # Visualize
-        if steps % 5 == 0:
-            visualize_rescue(maze, bots, steps, NUM_VICTIMS)
+                log(row)
+            log(f"Victims remaining: {len(maze.victims)}")
+            log()
         
+        yield maze, bots, steps
         steps += 1
     
     # Final results
@@ -318,18 +319,44 @@ def run_rescue():
     success_rate = (total_rescued / NUM_VICTIMS) * 100
     efficiency = (total_rescued / steps) * 100 if steps > 0 else 0
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Time: {steps} steps")
-    print(f"  Victims Rescued: {total_rescued}/{NUM_VICTIMS}")
-    print(f"  Bot 1: {len(bot1.rescued_victims)} rescues")
-    print(f"  Bot 2: {len(bot2.rescued_victims)} rescues")
-    print(f"  Success Rate: {success_rate:.1f}%")
-    print(f"  Efficiency: {efficiency:.2f} rescues/100 steps")
-    print(f"  Status: {'SUCCESS' if total_rescued == NUM_VICTIMS else 'PARTIAL'}")
-    print(f"{'='*50}")
-    
-    visualize_rescue(maze, bots, steps, NUM_VICTIMS)
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Time: {steps} steps")
+    log(f"  Victims Rescued: {total_rescued}/{NUM_VICTIMS}")
+    log(f"  Bot 1: {len(bot1.rescued_victims)} rescues")
+    log(f"  Bot 2: {len(bot2.rescued_victims)} rescues")
+    log(f"  Success Rate: {success_rate:.1f}%")
+    log(f"  Efficiency: {efficiency:.2f} rescues/100 steps")
+    log(f"  Status: {'SUCCESS' if total_rescued == NUM_VICTIMS else 'PARTIAL'}")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "victims_rescued": total_rescued,
+        "total_victims": NUM_VICTIMS,
+        "success_rate": round(success_rate, 1),
+        "efficiency": round(efficiency, 2),
+        "per_agent": {bot.id: len(bot.rescued_victims) for bot in bots},
+        "success": total_rescued == NUM_VICTIMS,
+    }
+
+# ============= MAIN SIMULATION =============
+def run_rescue(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    ticks = simulate_rescue(seed, log=print)
+    while True:
+        try:
+            maze, bots, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize
+        if step % 5 == 0:
+            visualize_rescue(maze, bots, step, len(maze.victims) + len(maze.rescued))
+    
+    visualize_rescue(maze, bots, results["steps"], results["total_victims"])
     plt.show()
 
 if __name__ == "__main__":
@@ -2,52 +2,7 @@ import os
 os.environ['MPLBACKEND'] = 'Agg'
 
 import random
-from collections import deque
-
-class MazeGrid:
-    def __init__(self, size=14):
-        self.size = size
-        self.bots = {}
-        self.walls = set()
-        self.victims = set()
-        self.rescued = {}
-        
-    def add_bot(self, bot_id, pos):
-        self.bots[bot_id] = pos
-    
-    def add_walls(self, wall_list):
-        self.walls = set(wall_list)
-    
-    def add_victims(self, victim_list):
-        self.victims = set(victim_list)
-    
-    def move_bot(self, bot_id, pos):
-        if self.is_valid(pos):
-            self.bots[bot_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.walls)
-    
-    def rescue_victim(self, pos, bot_id):
-        if pos in self.victims:
-            self.victims.remove(pos)
-            self.rescued[pos] = bot_id
-            return True
-        return False
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
+from rescue_simulation import MazeGrid, bfs_to_victim
 
 class RescueBot:
     def __init__(self, bot_id, start_pos):
@@ -65,26 +20,6 @@ class RescueBot:
             self.pos = self.path.pop(0)
         return self.pos
 
-def bfs_to_victim(start, victims, maze, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        if current in victims:
-            return path
-        
-        for next_pos in maze.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
-
 def allocate_rescue_zones(maze_size, num_bots=2):
     zones = [set() for _ in range(num_bots)]
     mid = maze_size // 2
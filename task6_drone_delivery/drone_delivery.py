@@ -2,16 +2,21 @@
 Dual Drone Delivery - Simple Implementation
 Two drones deliver packages using A* and greedy assignment
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-import heapq
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class DeliveryGrid:
+class DeliveryGrid(GridMap):
     def __init__(self, size=14):
-        self.size = size
+        super().__init__(size)
         self.drones = {}
         self.packages = {}  # package_id -> (pickup, delivery)
         self.delivered = {}  # package_id -> drone_id
@@ -30,20 +35,6 @@ class DeliveryGrid:
             self.coverage[pos] = self.coverage.get(pos, 0) + 1
             return True
         return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
 
 # ============= AGENT =============
 class DeliveryDrone:
@@ -62,43 +53,8 @@ class DeliveryDrone:
 
 # ============= A* PATHFINDING =============
 def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-    
-    while frontier:
-        _, current = heapq.heappop(frontier)
-        
-        if current == goal:
-            break
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-            
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_pos))
-                came_from[next_pos] = current
-    
-    if goal not in came_from:
-        return []
-    
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
+    """Shortest path from start to goal avoiding the avoid positions; [] if there is none"""
+    return grid.find_path(start, goal, avoid)
 
 # ============= GREEDY PACKAGE ASSIGNMENT =============
 def greedy_assign_packages(drones, packages, grid):
@@ -123,6 +79,10 @@ def greedy_assign_packages(drones, packages, grid):
 
 # ============= VISUALIZATION =============
 def visualize_delivery(grid, drones, step, total_packages):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+    import numpy as np
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(14, 6)
@@ -199,10 +159,42 @@ def visualize_delivery(grid, drones, step, total_packages):
     plt.tight_layout()
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_delivery():
-    print("Starting Dual Drone Delivery Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+EMPTY, VISITED, PICKUP, DELIVERY = 0, 1, 2, 3
+
+def delivery_state(grid, drones, step):
+    """Per-tick state as plain data: grid cell codes, drones and counters"""
+    cells = grid.draw((grid.coverage, VISITED))
+    carried = {drone.current_package for drone in drones if drone.has_package}
+    for pkg_id, (pickup, delivery) in grid.packages.items():
+        cells[delivery[1]][delivery[0]] = DELIVERY
+        if pkg_id not in carried:
+            cells[pickup[1]][pickup[0]] = PICKUP
+    return {
+        "step": step,
+        "grid": cells,
+        "agents": [{"id": drone.id, "x": drone.pos[0], "y": drone.pos[1],
+                    "package": drone.current_package if drone.has_package else None,
+                    "delivered": len(drone.delivered_packages)}
+                   for drone in drones],
+        "delivered": len(grid.delivered),
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_delivery(seed=None, log=_silent):
+    """Headless delivery run.
+
+    Yields (grid, drones, step) after every tick and returns the final
+    metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Dual Drone Delivery Simulation...")
+    log("=" * 50)
     
     GRID_SIZE = 14
     NUM_PACKAGES = 8
@@ -212,10 +204,10 @@ def run_delivery():
     # Create random packages
     packages = {}
     for i in range(1, NUM_PACKAGES + 1):
-        pickup = (random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1))
-        delivery = (random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1))
+        pickup = (rng.randint(0, GRID_SIZE-1), rng.randint(0, GRID_SIZE-1))
+        delivery = (rng.randint(0, GRID_SIZE-1), rng.randint(0, GRID_SIZE-1))
         while delivery == pickup:
-            delivery = (random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1))
+            delivery = (rng.randint(0, GRID_SIZE-1), rng.randint(0, GRID_SIZE-1))
         packages[i] = (pickup, delivery)
         grid.add_package(i, pickup, delivery)
     
@@ -231,17 +223,17 @@ def run_delivery():
     # Greedy package assignment
     assignments = greedy_assign_packages(drones, packages, grid)
     
-    print(f"Total packages: {NUM_PACKAGES}")
-    print(f"Drone 1 assigned: {len(assignments[1])} packages")
-    print(f"Drone 2 assigned: {len(assignments[2])} packages")
+    log(f"Total packages: {NUM_PACKAGES}")
+    log(f"Drone 1 assigned: {len(assignments[1])} packages")
+    log(f"Drone 2 assigned: {len(assignments[2])} packages")
     
     # Simulation
-    plt.figure(figsize=(14, 6))
     steps = 0
     max_steps = 500
     
     while steps < max_steps and len(grid.delivered) < NUM_PACKAGES:
-        print(f"\n--- Step {steps} ---")
+        if trace:
+            log(f"\n--- Step {steps} ---")
         
         for drone in drones:
             # If no path and has assignment
@@ -266,8 +258,9 @@ def run_delivery():
             # Move drone
             new_pos = drone.move()
             grid.move_drone(drone.id, new_pos)
-            status = f"carrying pkg {drone.current_package}" if drone.has_package else "empty"
-            print(f"Drone {drone.id}: Moved to {new_pos} ({status})")
+            if trace:
+                status = f"carrying pkg {drone.current_package}" if drone.has_package else "empty"
+                log(f"Drone {drone.id}: Moved to {new_pos} ({status})")
             
             # Check pickup
             if drone.current_package and not drone.has_package:
@@ -276,7 +269,8 @@ def run_delivery():
                     pickup, delivery = grid.packages[pkg_id]
                     if drone.pos == pickup:
                         drone.has_package = True
-                        print(f"Drone {drone.id}: ↑ PICKED UP package {pkg_id}")
+                        if trace:
+                            log(f"Drone {drone.id}: ↑ PICKED UP package {pkg_id}")
             
             # Check delivery
             if drone.has_package and drone.current_package:
@@ -290,29 +284,53 @@ def run_delivery():
                         drone.current_package = None
                         assignments[drone.id].pop(0)
                         del grid.packages[pkg_id]
-                        print(f"Drone {drone.id}: ✓ DELIVERED package {pkg_id}")
-        
-        # Visualize
-        if steps % 5 == 0:
-            visualize_delivery(grid, drones, steps, NUM_PACKAGES)
+                        if trace:
+                            log(f"Drone {drone.id}: ✓ DELIVERED package {pkg_id}")
         
+        yield grid, drones, steps
         steps += 1
     
     # Results
     total_delivered = len(grid.delivered)
     overlap = sum(1 for count in grid.coverage.values() if count > 1)
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Time: {steps} steps")
-    print(f"  Packages Delivered: {total_delivered}/{NUM_PACKAGES}")
-    print(f"  Drone 1: {len(drone1.delivered_packages)} packages")
-    print(f"  Drone 2: {len(drone2.delivered_packages)} packages")
-    print(f"  Coverage Overlap: {overlap} cells visited multiple times")
-    print(f"  Efficiency: {(total_delivered/steps)*100:.2f} packages/100 steps")
-    print(f"{'='*50}")
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Time: {steps} steps")
+    log(f"  Packages Delivered: {total_delivered}/{NUM_PACKAGES}")
+    log(f"  Drone 1: {len(drone1.delivered_packages)} packages")
+    log(f"  Drone 2: {len(drone2.delivered_packages)} packages")
+    log(f"  Coverage Overlap: {overlap} cells visited multiple times")
+    log(f"  Efficiency: {(total_delivered/steps)*100:.2f} packages/100 steps")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "packages_delivered": total_delivered,
+        "total_packages": NUM_PACKAGES,
+        "coverage_overlap": overlap,
+        "efficiency": round((total_delivered/steps)*100, 2) if steps else 0,
+        "per_agent": {drone.id: len(drone.delivered_packages) for drone in drones},
+        "success": total_delivered == NUM_PACKAGES,
+    }
+
+# ============= MAIN SIMULATION =============
+def run_delivery(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(14, 6))
+    ticks = simulate_delivery(seed, log=print)
+    while True:
+        try:
+            grid, drones, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize
+        if step % 5 == 0:
+            visualize_delivery(grid, drones, step, len(grid.packages) + len(grid.delivered))
     
-    visualize_delivery(grid, drones, steps, NUM_PACKAGES)
+    visualize_delivery(grid, drones, results["steps"], results["total_packages"])
     plt.show()
 
 if __name__ == "__main__":
@@ -2,40 +2,7 @@ import os
 os.environ['MPLBACKEND'] = 'Agg'
 
 import random
-import heapq
-
-class DeliveryGrid:
-    def __init__(self, size=14):
-        self.size = size
-        self.drones = {}
-        self.packages = {}
-        self.delivered = {}
-        
-    def add_drone(self, drone_id, pos):
-        self.drones[drone_id] = pos
-    
-    def add_package(self, pkg_id, pickup, delivery):
-        self.packages[pkg_id] = (pickup, delivery)
-    
-    def move_drone(self, drone_id, pos):
-        if self.is_valid(pos):
-            self.drones[drone_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
+from drone_delivery import DeliveryGrid, astar
 
 class DeliveryDrone:
     def __init__(self, drone_id, start_pos):
@@ -51,45 +18,6 @@ class DeliveryDrone:
             self.pos = self.path.pop(0)
         return self.pos
 
-def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-    
-    while frontier:
-        _, current = heapq.heappop(frontier)
-        
-        if current == goal:
-            break
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-            
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_pos))
-                came_from[next_pos] = current
-    
-    if goal not in came_from:
-        return []
-    
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
-
 def greedy_assign_packages(drones, packages, grid):
     assignments = {drone.id: [] for drone in drones}
     available = list(packages.keys())
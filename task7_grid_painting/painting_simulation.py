@@ -2,54 +2,41 @@
 Grid Painting Agents - Simple Implementation
 Two painting robots paint cells without overlapping using DFS
 """
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
+import os
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class PaintingGrid:
+class PaintingGrid(GridMap):
     def __init__(self, size=12):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
-        self.painted = {}
-        self.obstacles = set()
+        self.painted = self.layer("paint")  # cell -> agent_id
         
     def add_agent(self, agent_id, pos):
         self.agents[agent_id] = pos
     
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
     def move_agent(self, agent_id, pos):
         if self.is_valid(pos):
             self.agents[agent_id] = pos
             return True
         return False
     
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
     def paint_cell(self, pos, agent_id):
         """Paint cell with agent's color"""
         if pos not in self.painted:
-            self.painted[pos] = agent_id
+            self.painted.add(pos, agent_id)
             return True
         return False
     
     def is_painted(self, pos):
         return pos in self.painted
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
 
 # ============= AGENT =============
 class PaintingRobot:
@@ -103,6 +90,9 @@ def dfs_paint(robot, grid, current_pos):
 
 # ============= VISUALIZATION =============
 def visualize_painting(grid, robots, step, total_cells):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(12, 6)
@@ -177,10 +167,36 @@ def visualize_painting(grid, robots, step, total_cells):
     plt.tight_layout()
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_painting():
-    print("Starting Grid Painting Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend; painted cells are
+# PAINTED + robot id
+EMPTY, OBSTACLE, PAINTED = 0, 1, 1
+
+def painting_state(grid, robots, step):
+    """Per-tick state as plain data: grid cell codes, robots and counters"""
+    return {
+        "step": step,
+        "grid": grid.draw((grid.obstacles, OBSTACLE), (grid.painted, PAINTED + grid.painted.array)),
+        "agents": [{"id": robot.id, "x": grid.agents[robot.id][0], "y": grid.agents[robot.id][1],
+                    "painted": len(robot.painted_cells)}
+                   for robot in robots],
+        "painted": len(grid.painted),
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_painting(seed=None, log=_silent):
+    """Headless painting run.
+
+    Yields (grid, robots, step) after every tick and returns the final
+    metrics. Pass log=print for the console trace. The layout is fixed, so
+    seed is only accepted to match the other engines.
+    """
+    trace = log is not _silent
+    log("Starting Grid Painting Simulation...")
+    log("=" * 50)
     
     # Setup
     GRID_SIZE = 16
@@ -202,7 +218,7 @@ def run_painting():
     
     # Remove obstacles from regions
     for region in regions:
-        region -= grid.obstacles
+        region.difference_update(grid.obstacles)
     
     # Initialize 4 robots at corners
     robot1 = PaintingRobot(1, (0, 0))
@@ -224,16 +240,15 @@ def run_painting():
     
     total_cells = GRID_SIZE * GRID_SIZE
     
-    print(f"Grid size: {GRID_SIZE}x{GRID_SIZE} ({total_cells} cells)")
-    print(f"Obstacles: {len(obstacles)} cells")
-    print(f"Paintable cells: {total_cells - len(obstacles)}")
-    print(f"Robot 1 region: {len(regions[0])} cells")
-    print(f"Robot 2 region: {len(regions[1])} cells")
-    print(f"Robot 3 region: {len(regions[2])} cells")
-    print(f"Robot 4 region: {len(regions[3])} cells")
+    log(f"Grid size: {GRID_SIZE}x{GRID_SIZE} ({total_cells} cells)")
+    log(f"Obstacles: {len(obstacles)} cells")
+    log(f"Paintable cells: {total_cells - len(obstacles)}")
+    log(f"Robot 1 region: {len(regions[0])} cells")
+    log(f"Robot 2 region: {len(regions[1])} cells")
+    log(f"Robot 3 region: {len(regions[2])} cells")
+    log(f"Robot 4 region: {len(regions[3])} cells")
     
     # Simulation
-    plt.figure(figsize=(12, 6))
     steps = 0
     max_steps = 300
     
@@ -241,7 +256,8 @@ def run_painting():
     stacks = [[robot.pos] for robot in robots]
     
     while steps < max_steps:
-        print(f"\n--- Step {steps} ---")
+        if trace:
+            log(f"\n--- Step {steps} ---")
         all_done = True
         
         for idx, robot in enumerate(robots):
@@ -260,7 +276,8 @@ def run_painting():
                         grid.paint_cell(current, robot.id)
                         robot.painted_cells.add(current)
                         grid.move_agent(robot.id, current)
-                        print(f"Robot {robot.id}: Painted cell at {current}")
+                        if trace:
+                            log(f"Robot {robot.id}: Painted cell at {current}")
                     
                     # Find unpainted neighbor
                     found_neighbor = False
@@ -276,10 +293,7 @@ def run_painting():
                         if stacks[idx]:
                             grid.move_agent(robot.id, stacks[idx][-1])
         
-        # Visualize
-        if steps % 3 == 0:
-            visualize_painting(grid, robots, steps, total_cells)
-        
+        yield grid, robots, steps
         steps += 1
         
         # Check if all cells painted
@@ -301,23 +315,49 @@ def run_painting():
     paintable_cells = total_cells - len(grid.obstacles)
     coverage = (painted_count / paintable_cells) * 100
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Time: {steps} steps")
-    print(f"  Total Cells: {total_cells}")
-    print(f"  Obstacles: {len(grid.obstacles)}")
-    print(f"  Paintable Cells: {paintable_cells}")
-    print(f"  Robot 1: {len(robot1.painted_cells)} cells")
-    print(f"  Robot 2: {len(robot2.painted_cells)} cells")
-    print(f"  Robot 3: {len(robot3.painted_cells)} cells")
-    print(f"  Robot 4: {len(robot4.painted_cells)} cells")
-    print(f"  Coverage: {coverage:.1f}%")
-    print(f"  Efficiency: {efficiency:.2f} cells/100 steps")
-    print(f"  No Overlaps: {'✓' if overlaps == 0 else '✗ (' + str(overlaps) + ')'}")
-    print(f"{'='*50}")
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Time: {steps} steps")
+    log(f"  Total Cells: {total_cells}")
+    log(f"  Obstacles: {len(grid.obstacles)}")
+    log(f"  Paintable Cells: {paintable_cells}")
+    log(f"  Robot 1: {len(robot1.painted_cells)} cells")
+    log(f"  Robot 2: {len(robot2.painted_cells)} cells")
+    log(f"  Robot 3: {len(robot3.painted_cells)} cells")
+    log(f"  Robot 4: {len(robot4.painted_cells)} cells")
+    log(f"  Coverage: {coverage:.1f}%")
+    log(f"  Efficiency: {efficiency:.2f} cells/100 steps")
+    log(f"  No Overlaps: {'✓' if overlaps == 0 else '✗ (' + str(overlaps) + ')'}")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "cells_painted": painted_count,
+        "paintable_cells": paintable_cells,
+        "coverage": round(coverage, 1),
+        "efficiency": round(efficiency, 2),
+        "overlaps": overlaps,
+        "per_agent": {robot.id: len(robot.painted_cells) for robot in robots},
+    }
+
+# ============= MAIN SIMULATION =============
+def run_painting(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    ticks = simulate_painting(seed, log=print)
+    while True:
+        try:
+            grid, robots, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize
+        if step % 3 == 0:
+            visualize_painting(grid, robots, step, grid.size * grid.size)
     
     # Final visualization
-    visualize_painting(grid, robots, steps, total_cells)
+    visualize_painting(grid, robots, results["steps"], grid.size * grid.size)
     plt.show()
 
 if __name__ == "__main__":
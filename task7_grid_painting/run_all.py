@@ -1,48 +1,7 @@
 import os
 os.environ['MPLBACKEND'] = 'Agg'
 
-class PaintingGrid:
-    def __init__(self, size=12):
-        self.size = size
-        self.agents = {}
-        self.painted = {}
-        self.obstacles = set()
-        
-    def add_agent(self, agent_id, pos):
-        self.agents[agent_id] = pos
-    
-    def add_obstacles(self, obstacle_list):
-        self.obstacles = set(obstacle_list)
-    
-    def move_agent(self, agent_id, pos):
-        if self.is_valid(pos):
-            self.agents[agent_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return (0 <= x < self.size and 0 <= y < self.size and 
-                pos not in self.obstacles)
-    
-    def paint_cell(self, pos, agent_id):
-        if pos not in self.painted:
-            self.painted[pos] = agent_id
-            return True
-        return False
-    
-    def is_painted(self, pos):
-        return pos in self.painted
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
+from painting_simulation import PaintingGrid
 
 class PaintingRobot:
     def __init__(self, agent_id, start_pos):
@@ -88,7 +47,7 @@ grid.add_obstacles(obstacles)
 regions = allocate_regions(GRID_SIZE, 4)
 
 for region in regions:
-    region -= grid.obstacles
+    region.difference_update(grid.obstacles)
 
 robot1 = PaintingRobot(1, (0, 0))
 robot2 = PaintingRobot(2, (GRID_SIZE - 1, 0))
@@ -1,14 +1,19 @@
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-import heapq
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 
 # ============= ENVIRONMENT =============
-class ResourceGrid:
+class ResourceGrid(GridMap):
     def __init__(self, size=30):
-        self.size = size
+        super().__init__(size)
         self.agents = {}
         self.resources = set()
         self.collected = {}
@@ -25,20 +30,6 @@ class ResourceGrid:
             return True
         return False
 
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-
     def collect_resource(self, pos, agent_id):
         if pos in self.resources:
             self.resources.remove(pos)
@@ -74,47 +65,15 @@ class CollectorAgent:
 
 # ============= PATHFINDING (A*) =============
 def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-
-    while frontier:
-        _, current = heapq.heappop(frontier)
-
-        if current == goal:
-            break
-
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_pos))
-                came_from[next_pos] = current
-
-    if goal not in came_from:
-        return []
-
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
+    """Shortest path from start to goal avoiding the avoid positions; [] if there is none"""
+    return grid.find_path(start, goal, avoid)
 
 
 # ============= VISUALIZATION =============
 def visualize_collection(grid, agents, step, total_resources, collection_history):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(12, 6)
@@ -177,10 +136,38 @@ def visualize_collection(grid, agents, step, total_resources, collection_history
     plt.pause(0.05)
 
 
-# ============= MAIN SIMULATION =============
-def run_collection():
-    print("Starting Resource Collection Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+EMPTY, RESOURCE, COLLECTED = 0, 1, 2
+
+
+def collection_state(grid, agents, step):
+    """Per-tick state as plain data: grid cell codes, agents and counters"""
+    collected = [pos for positions in grid.collected.values() for pos in positions]
+    return {
+        "step": step,
+        "grid": grid.draw((collected, COLLECTED), (grid.resources, RESOURCE)),
+        "agents": [{"id": agent.id, "x": agent.pos[0], "y": agent.pos[1],
+                    "collected": len(agent.collected)}
+                   for agent in agents],
+        "remaining": len(grid.resources),
+    }
+
+
+def _silent(*args, **kwargs):
+    pass
+
+
+# ============= SIMULATION =============
+def simulate_collection(seed=None, log=_silent):
+    """Headless collection run.
+
+    Yields (grid, agents, step) after every tick and returns the final
+    metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    log("Starting Resource Collection Simulation...")
+    log("=" * 50)
 
     GRID_SIZE = 30
     NUM_RESOURCES = 80
@@ -189,7 +176,7 @@ def run_collection():
 
     resources = set()
     while len(resources) < NUM_RESOURCES:
-        x, y = random.randint(1, GRID_SIZE - 2), random.randint(1, GRID_SIZE - 2)
+        x, y = rng.randint(1, GRID_SIZE - 2), rng.randint(1, GRID_SIZE - 2)
         resources.add((x, y))
 
     grid.add_resources(resources)
@@ -206,9 +193,8 @@ def run_collection():
 
     agents = [agent1, agent2, agent3, agent4]
 
-    print(f"Total resources: {NUM_RESOURCES}")
+    log(f"Total resources: {NUM_RESOURCES}")
 
-    plt.figure(figsize=(12, 6))
     steps = 0
     max_steps = 600
 
@@ -234,18 +220,40 @@ def run_collection():
             if grid.collect_resource(agent.pos, agent.id):
                 agent.collected.append(agent.pos)
 
-        if steps % 5 == 0:
-            visualize_collection(grid, agents, steps, NUM_RESOURCES, [])
-
+        yield grid, agents, steps
         steps += 1
 
-    print(f"\n{'=' * 50}")
-    print("Final Results:")
+    log(f"\n{'=' * 50}")
+    log("Final Results:")
     for agent in agents:
-        print(f"  Agent {agent.id}: {len(agent.collected)} collected")
-    print(f"{'=' * 50}")
+        log(f"  Agent {agent.id}: {len(agent.collected)} collected")
+    log(f"{'=' * 50}")
+
+    return {
+        "steps": steps,
+        "resources_collected": NUM_RESOURCES - len(grid.resources),
+        "total_resources": NUM_RESOURCES,
+        "per_agent": {agent.id: len(agent.collected) for agent in agents},
+        "success": not grid.resources,
+    }
+
+
+# ============= MAIN SIMULATION =============
+def run_collection(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    ticks = simulate_collection(seed, log=print)
+    while True:
+        try:
+            grid, agents, step = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        if step % 5 == 0:
+            visualize_collection(grid, agents, step, len(grid.resources) + sum(len(agent.collected) for agent in agents), [])
 
-    visualize_collection(grid, agents, steps, NUM_RESOURCES, [])
+    visualize_collection(grid, agents, results["steps"], results["total_resources"], [])
     plt.show()
 
 
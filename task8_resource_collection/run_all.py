@@ -2,49 +2,7 @@ import os
 os.environ['MPLBACKEND'] = 'Agg'
 
 import random
-import heapq
-
-class ResourceGrid:
-    def __init__(self, size=12):
-        self.size = size
-        self.agents = {}
-        self.resources = set()
-        self.collected = {}
-        
-    def add_agent(self, agent_id, pos):
-        self.agents[agent_id] = pos
-    
-    def add_resources(self, resource_list):
-        self.resources = set(resource_list)
-    
-    def move_agent(self, agent_id, pos):
-        if self.is_valid(pos):
-            self.agents[agent_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-    
-    def collect_resource(self, pos, agent_id):
-        if pos in self.resources:
-            self.resources.remove(pos)
-            if agent_id not in self.collected:
-                self.collected[agent_id] = []
-            self.collected[agent_id].append(pos)
-            return True
-        return False
+from resource_collection import ResourceGrid, astar
 
 class CollectorAgent:
     def __init__(self, agent_id, start_pos):
@@ -67,45 +25,6 @@ class CollectorAgent:
                      key=lambda r: abs(r[0] - self.pos[0]) + abs(r[1] - self.pos[1]))
         return nearest
 
-def astar(start, goal, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    frontier = [(0, start)]
-    came_from = {start: None}
-    cost = {start: 0}
-    
-    while frontier:
-        _, current = heapq.heappop(frontier)
-        
-        if current == goal:
-            break
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos in avoid:
-                continue
-            
-            new_cost = cost[current] + 1
-            if next_pos not in cost or new_cost < cost[next_pos]:
-                cost[next_pos] = new_cost
-                priority = new_cost + heuristic(next_pos, goal)
-                heapq.heappush(frontier, (priority, next_pos))
-                came_from[next_pos] = current
-    
-    if goal not in came_from:
-        return []
-    
-    path = []
-    current = goal
-    while current:
-        path.append(current)
-        current = came_from[current]
-    path.reverse()
-    return path
-
 GRID_SIZE = 12
 NUM_RESOURCES = 15
 
@@ -2,18 +2,24 @@
 Cooperative Firefighters - Simple Implementation
 Two firefighter agents extinguish fires cooperatively with fire spread simulation
 """
+import os
 import random
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-from collections import deque
+import sys
+
+# gridcore/ is at the repository root; the engine also runs as a script from its folder
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gridcore import GridMap
 
 # ============= ENVIRONMENT =============
-class FireGrid:
-    def __init__(self, size=12):
-        self.size = size
+class FireGrid(GridMap):
+    def __init__(self, size=12, rng=random):
+        super().__init__(size)
+        self.rng = rng
         self.agents = {}
-        self.fires = set()
+        self.fires = self.layer("fire")
         self.extinguished = set()
         self.fire_intensity = {}  # Track fire age/intensity
         self.spread_prob = 0.3  # Probability of fire spreading
@@ -31,20 +37,6 @@ class FireGrid:
             return True
         return False
     
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-    
     def extinguish_fire(self, pos):
         """Extinguish fire at position"""
         if pos in self.fires:
@@ -67,7 +59,7 @@ class FireGrid:
             for neighbor in self.get_neighbors(fire_pos):
                 if (neighbor not in self.fires and 
                     neighbor not in self.extinguished and
-                    random.random() < self.spread_prob):
+                    self.rng.random() < self.spread_prob):
                     new_fires.append(neighbor)
         
         # Add new fires
@@ -97,25 +89,7 @@ class FirefighterAgent:
 # ============= PATHFINDING (BFS) =============
 def bfs_to_fire(start, fires, grid, avoid=None):
     """Find shortest path to nearest fire"""
-    if avoid is None:
-        avoid = set()
-    
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        # Found a fire
-        if current in fires:
-            return path
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
+    return grid.find_nearest(start, fires, avoid)
 
 # ============= ZONE ALLOCATION =============
 def allocate_zones(grid_size, num_agents=2):
@@ -136,6 +110,9 @@ def allocate_zones(grid_size, num_agents=2):
 
 # ============= VISUALIZATION =============
 def visualize_firefighting(grid, agents, step, initial_fires, stats):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     plt.clf()
     fig = plt.gcf()
     fig.set_size_inches(12, 6)
@@ -196,22 +173,48 @@ def visualize_firefighting(grid, agents, step, initial_fires, stats):
     plt.tight_layout()
     plt.pause(0.05)
 
-# ============= MAIN SIMULATION =============
-def run_firefighting():
-    print("Starting Cooperative Firefighters Simulation...")
-    print("=" * 50)
+# ============= STATE =============
+# Cell codes in the grid sent to the backend
+EMPTY, FIRE, EXTINGUISHED = 0, 1, 2
+
+def firefighting_state(grid, agents, step, total_fires, stats):
+    """Per-tick state as plain data: grid cell codes, agents and counters"""
+    return {
+        "step": step,
+        "grid": grid.draw((grid.extinguished, EXTINGUISHED), (grid.fires, FIRE)),
+        "agents": [{"id": agent.id, "x": agent.pos[0], "y": agent.pos[1],
+                    "extinguished": len(agent.extinguished)}
+                   for agent in agents],
+        "active_fires": len(grid.fires),
+        "total_fires": total_fires,
+    }
+
+def _silent(*args, **kwargs):
+    pass
+
+# ============= SIMULATION =============
+def simulate_firefighting(seed=None, log=_silent):
+    """Headless firefighting run.
+
+    Yields (grid, agents, step, total_fires, stats) after every tick and
+    returns the final metrics. Pass log=print for the console trace.
+    """
+    rng = random.Random(seed)
+    trace = log is not _silent
+    log("Starting Cooperative Firefighters Simulation...")
+    log("=" * 50)
     
     # Setup
     GRID_SIZE = 12
     NUM_INITIAL_FIRES = 8
     FIRE_SPREAD_INTERVAL = 5  # Fires spread every N steps
     
-    grid = FireGrid(GRID_SIZE)
+    grid = FireGrid(GRID_SIZE, rng)
     
     # Create initial fires
     initial_fires = set()
     while len(initial_fires) < NUM_INITIAL_FIRES:
-        x, y = random.randint(2, GRID_SIZE-3), random.randint(2, GRID_SIZE-3)
+        x, y = rng.randint(2, GRID_SIZE-3), rng.randint(2, GRID_SIZE-3)
         if (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]:
             initial_fires.add((x, y))
     
@@ -230,9 +233,9 @@ def run_firefighting():
     agent1.assign_zone(zones[0])
     agent2.assign_zone(zones[1])
     
-    print(f"Initial fires: {len(initial_fires)}")
-    print(f"Agent 1 zone: {len(zones[0])} cells")
-    print(f"Agent 2 zone: {len(zones[1])} cells")
+    log(f"Initial fires: {len(initial_fires)}")
+    log(f"Agent 1 zone: {len(zones[0])} cells")
+    log(f"Agent 2 zone: {len(zones[1])} cells")
     
     # Statistics tracking
     stats = {
@@ -242,20 +245,21 @@ def run_firefighting():
     }
     
     # Simulation
-    plt.figure(figsize=(12, 6))
     steps = 0
     max_steps = 300
     total_fires_created = len(initial_fires)
     
     while steps < max_steps and len(grid.fires) > 0:
-        print(f"\n--- Step {steps} ---")
+        if trace:
+            log(f"\n--- Step {steps} ---")
         
         # Fire spreading
         if steps % FIRE_SPREAD_INTERVAL == 0 and steps > 0:
             new_fires = grid.spread_fires()
             if new_fires > 0:
                 total_fires_created += new_fires
-                print(f"Step {steps}: {new_fires} new fires spread!")
+                if trace:
+                    log(f"Step {steps}: {new_fires} new fires spread!")
         
         # Agent 1 planning - prioritize fires in own zone, then any fire
         if not agent1.path:
@@ -284,48 +288,72 @@ def run_firefighting():
         grid.move_agent(1, new_pos1)
         grid.move_agent(2, new_pos2)
         
-        print(f"Agent 1: Moved to {new_pos1}")
-        print(f"Agent 2: Moved to {new_pos2}")
+        if trace:
+            log(f"Agent 1: Moved to {new_pos1}")
+            log(f"Agent 2: Moved to {new_pos2}")
         
         # Extinguish fires
         if grid.extinguish_fire(agent1.pos):
             agent1.extinguished.add(agent1.pos)
-            print(f"Agent 1: ✓ EXTINGUISHED fire at {agent1.pos}")
+            if trace:
+                log(f"Agent 1: ✓ EXTINGUISHED fire at {agent1.pos}")
         
         if grid.extinguish_fire(agent2.pos):
             agent2.extinguished.add(agent2.pos)
-            print(f"Agent 2: ✓ EXTINGUISHED fire at {agent2.pos}")
+            if trace:
+                log(f"Agent 2: ✓ EXTINGUISHED fire at {agent2.pos}")
         
         # Track statistics
         stats['active_fires'].append(len(grid.fires))
         stats['extinguished'].append(len(grid.extinguished))
         
-        # Visualize
-        if steps % 3 == 0:
-            visualize_firefighting(grid, [agent1, agent2], steps, 
-                                  total_fires_created, stats)
-        
+        yield grid, [agent1, agent2], steps, total_fires_created, stats
         steps += 1
     
     # Final results
     success = len(grid.fires) == 0
     extinguish_rate = (len(grid.extinguished) / total_fires_created) * 100
     
-    print(f"\n{'='*50}")
-    print(f"RESULTS:")
-    print(f"  Total Time: {steps} steps")
-    print(f"  Total Fires: {total_fires_created}")
-    print(f"  Extinguished: {len(grid.extinguished)}")
-    print(f"  Still Burning: {len(grid.fires)}")
-    print(f"  Agent 1: {len(agent1.extinguished)} fires")
-    print(f"  Agent 2: {len(agent2.extinguished)} fires")
-    print(f"  Success Rate: {extinguish_rate:.1f}%")
-    print(f"  Status: {'SUCCESS' if success else 'PARTIAL'}")
-    print(f"{'='*50}")
+    log(f"\n{'='*50}")
+    log(f"RESULTS:")
+    log(f"  Total Time: {steps} steps")
+    log(f"  Total Fires: {total_fires_created}")
+    log(f"  Extinguished: {len(grid.extinguished)}")
+    log(f"  Still Burning: {len(grid.fires)}")
+    log(f"  Agent 1: {len(agent1.extinguished)} fires")
+    log(f"  Agent 2: {len(agent2.extinguished)} fires")
+    log(f"  Success Rate: {extinguish_rate:.1f}%")
+    log(f"  Status: {'SUCCESS' if success else 'PARTIAL'}")
+    log(f"{'='*50}")
+    
+    return {
+        "steps": steps,
+        "total_fires": total_fires_created,
+        "extinguished": len(grid.extinguished),
+        "still_burning": len(grid.fires),
+        "success_rate": round(extinguish_rate, 1),
+        "per_agent": {agent.id: len(agent.extinguished) for agent in (agent1, agent2)},
+        "success": success,
+    }
+
+# ============= MAIN SIMULATION =============
+def run_firefighting(seed=None):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    ticks = simulate_firefighting(seed, log=print)
+    while True:
+        try:
+            grid, agents, step, total_fires, stats = next(ticks)
+        except StopIteration as done:
+            results = done.value
+            break
+        # Visualize
+        if step % 3 == 0:
+            visualize_firefighting(grid, agents, step, total_fires, stats)
     
     # Final visualization
-    visualize_firefighting(grid, [agent1, agent2], steps, 
-                          total_fires_created, stats)
+    visualize_firefighting(grid, agents, results["steps"], results["total_fires"], stats)
     plt.show()
 
 if __name__ == "__main__":
@@ -2,69 +2,7 @@ import os
 os.environ['MPLBACKEND'] = 'Agg'
 
 import random
-from collections import deque
-
-class FireGrid:
-    def __init__(self, size=12):
-        self.size = size
-        self.agents = {}
-        self.fires = set()
-        self.extinguished = set()
-        self.fire_intensity = {}
-        self.spread_prob = 0.3
-        
-    def add_agent(self, agent_id, pos):
-        self.agents[agent_id] = pos
-    
-    def add_fire(self, pos):
-        self.fires.add(pos)
-        self.fire_intensity[pos] = 1
-    
-    def move_agent(self, agent_id, pos):
-        if self.is_valid(pos):
-            self.agents[agent_id] = pos
-            return True
-        return False
-    
-    def is_valid(self, pos):
-        x, y = pos
-        return 0 <= x < self.size and 0 <= y < self.size
-    
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-            nx, ny = x + dx, y + dy
-            new_pos = (nx, ny)
-            if self.is_valid(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
-    
-    def extinguish_fire(self, pos):
-        if pos in self.fires:
-            self.fires.remove(pos)
-            self.extinguished.add(pos)
-            if pos in self.fire_intensity:
-                del self.fire_intensity[pos]
-            return True
-        return False
-    
-    def spread_fires(self):
-        new_fires = []
-        
-        for fire_pos in list(self.fires):
-            self.fire_intensity[fire_pos] = self.fire_intensity.get(fire_pos, 1) + 1
-            
-            for neighbor in self.get_neighbors(fire_pos):
-                if (neighbor not in self.fires and 
-                    neighbor not in self.extinguished and
-                    random.random() < self.spread_prob):
-                    new_fires.append(neighbor)
-        
-        for pos in new_fires:
-            self.add_fire(pos)
-        
-        return len(new_fires)
+from firefighter_simulation import FireGrid, bfs_to_fire
 
 class FirefighterAgent:
     def __init__(self, agent_id, start_pos):
@@ -82,26 +20,6 @@ class FirefighterAgent:
             self.pos = self.path.pop(0)
         return self.pos
 
-def bfs_to_fire(start, fires, grid, avoid=None):
-    if avoid is None:
-        avoid = set()
-    
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        if current in fires:
-            return path
-        
-        for next_pos in grid.get_neighbors(current):
-            if next_pos not in visited and next_pos not in avoid:
-                visited.add(next_pos)
-                queue.append((next_pos, path + [next_pos]))
-    
-    return []
-
 def allocate_zones(grid_size, num_agents=2):
     zones = [set() for _ in range(num_agents)]
     mid = grid_size // 2